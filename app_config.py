@@ -0,0 +1,41 @@
+import os
+import json
+import logging
+import importlib
+
+logger = logging.getLogger(__name__)
+
+# ACTIVE_TRANSLATE_CONFIG points at another config file (e.g. for benchmark runs); child processes inherit it
+CONFIG_PATH = os.environ.get("ACTIVE_TRANSLATE_CONFIG") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+def config_exists() -> bool:
+    return os.path.exists(CONFIG_PATH)
+
+def load_config() -> dict:
+    """
+    Reads config.json from the project root (or the file named by ACTIVE_TRANSLATE_CONFIG).
+    Returns an empty dict if the file is missing or cannot be parsed, so callers can fall back to defaults.
+    """
+    if not os.path.exists(CONFIG_PATH):
+        return {}
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not read config.json, using defaults. Error: {e}")
+        return {}
+
+def get_config_section(name: str) -> dict:
+    """Returns a single top-level section of config.json (e.g. "translation"), or an empty dict."""
+    section = load_config().get(name, {})
+    return section if isinstance(section, dict) else {}
+
+def import_plugin(spec: str):
+    """
+    Resolves a "package.module:attribute" string from config.json (e.g. a custom transcription backend
+    or translation engine) to the object it names.
+    """
+    module_name, _, attribute = spec.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Expected 'module:attribute', got {spec!r}")
+    return getattr(importlib.import_module(module_name), attribute)
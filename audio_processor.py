@@ -1,13 +1,39 @@
 import os
 import json
+import time
 import logging
+import wave
+import threading
 from pathlib import Path
+from contextlib import closing
+import numpy as np
 import ffmpeg
 
+from telemetry import histogram, counter
+
 # Configure basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+FFPROBE_SECONDS = histogram("ffprobe_seconds", "Time to read a file's metadata and chapters with ffprobe.")
+CHUNK_SECONDS = histogram("chunk_seconds", "Time ffmpeg takes to decode and cut one chunk.", labels=("strategy",))
+AUDIO_CHUNKED_SECONDS = counter("audio_chunked_seconds_total", "Seconds of audio cut into chunks.")
+
+class PcmChunk:
+    """
+    A decoded chunk held in memory instead of written to disk: mono float32 samples in [-1, 1]
+    at the processor's sample rate, which is what both Whisper backends take directly.
+    """
+
+    def __init__(self, name: str, samples: np.ndarray, sample_rate: int):
+        self.name = name
+        self.samples = samples
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / float(self.sample_rate)
+
 class AudioProcessor:
     """
     A robust pipeline to ingest, standardize, and chunk audiobook files
@@ -15,18 +41,72 @@ class AudioProcessor:
     """
     
     ALLOWED_EXTENSIONS = {'.mp3', '.m4b'}
+    CHUNK_SECONDS = 600
+    SAMPLE_RATE = 16000
+    CHUNK_STRATEGIES = {'fixed', 'silence'}
+    # Silence search: how far either side of the target length to look, and the analysis resolution
+    SEARCH_SECONDS = 30
+    FRAME_MS = 20
+    SMOOTHING_MS = 200
     
-    def __init__(self, output_dir: str = "staging"):
+    def __init__(self, output_dir: str = "staging", chunk_strategy: str = "silence",
+                 chunk_seconds: float = CHUNK_SECONDS, search_seconds: float = SEARCH_SECONDS,
+                 in_memory: bool = False, chapter_starts: list | None = None):
         """
         Initialize the processor with a designated staging directory.
         
         Args:
             output_dir: The directory where processed chunks and metadata will be saved.
+            chunk_strategy: "silence" cuts at the quietest point near each target length,
+                "fixed" cuts exactly every `chunk_seconds` with ffmpeg's segment muxer.
+            chunk_seconds: Target chunk length in seconds.
+            search_seconds: How far from the target length the silence search may move a cut.
+            in_memory: Yield decoded PcmChunk arrays straight from the ffmpeg pipe instead of
+                writing chunk_*.wav files to the staging directory.
+            chapter_starts: Start times (seconds) of the book's chapters. A chunk never spans a
+                chapter edge: chunks are cut exactly at every chapter start.
         """
+        if chunk_strategy not in self.CHUNK_STRATEGIES:
+            raise ValueError(f"Unsupported chunk strategy: {chunk_strategy}. Allowed: {self.CHUNK_STRATEGIES}")
         self.output_dir = Path(output_dir)
+        self.chunk_strategy = chunk_strategy
+        self.chunk_seconds = chunk_seconds
+        self.search_seconds = min(search_seconds, chunk_seconds / 2)
+        self.in_memory = in_memory
+        self.chapter_starts = sorted({round(float(t), 3) for t in chapter_starts or [] if float(t) > 0})
         # Create staging directory if it doesn't exist
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+    def chunking_settings(self) -> dict:
+        """Settings that determine the chunk audio, used to content-address staged chunks."""
+        # Fixed chunks cut from the PCM pipe land on exact sample counts, unlike ffmpeg's segment muxer
+        decoder = "segment" if self._uses_segment_muxer() else "pipe"
+        settings = {"strategy": self.chunk_strategy, "chunk_seconds": self.chunk_seconds,
+                    "sample_rate": self.SAMPLE_RATE, "decoder": decoder}
+        if self.chunk_strategy == "silence":
+            settings.update({"search_seconds": self.search_seconds, "frame_ms": self.FRAME_MS, "smoothing_ms": self.SMOOTHING_MS})
+        if self.chapter_starts:
+            settings["chapter_starts"] = self.chapter_starts
+        return settings
+
+    def _uses_segment_muxer(self) -> bool:
+        # Cuts at chapter edges need the PCM pipe, which knows exactly where every sample falls
+        return self.chunk_strategy == "fixed" and not self.in_memory and not self.chapter_starts
+
+    @staticmethod
+    def chapter_starts_from_metadata(metadata: dict) -> list:
+        """Start times of every chapter after the first, from the ffprobe chapters in `metadata`."""
+        duration = metadata.get('duration_seconds') or float('inf')
+        starts = []
+        for chapter in metadata.get('chapters') or []:
+            try:
+                start = float(chapter['start_time'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 < start < duration:
+                starts.append(start)
+        return starts
+
     def _validate_file(self, file_path: Path) -> bool:
         """Check if the file is valid and has an allowed extension."""
         if not file_path.exists() or not file_path.is_file():
@@ -45,7 +125,8 @@ class AudioProcessor:
         """
         logger.info(f"Extracting metadata from {file_path.name}")
         try:
-            probe = ffmpeg.probe(str(file_path))
+            with FFPROBE_SECONDS.time():
+                probe = ffmpeg.probe(str(file_path))
             
             # Extract basic format info
             format_info = probe.get('format', {})
@@ -74,42 +155,229 @@ class AudioProcessor:
             json.dump(metadata, f, indent=4)
         logger.info(f"Saved metadata to {output_path.name}")
 
-    def _process_and_chunk(self, file_path: Path, output_subdir: Path):
+    def iter_chunks(self, file_path: Path, output_subdir: Path):
         """
-        Convert to 16kHz mono .wav and split into 10-minute (600s) chunks.
+        Convert to 16kHz mono .wav chunks (chunk_000.wav, chunk_001.wav, ...) of roughly `chunk_seconds`
+        each, yielding each chunk's path as soon as it is fully written, so transcription can start on
+        the first chunk while the rest of the book is still being decoded.
+        In `in_memory` mode nothing is written and PcmChunk objects are yielded instead.
+        Chunks are contiguous, so their summed durations map exactly onto the original timeline.
         """
-        logger.info(f"Converting and chunking {file_path.name}")
-        
-        # Output pattern for the chunks: chunk_000.wav, chunk_001.wav, etc.
+        if self._uses_segment_muxer():
+            chunks = self._iter_fixed_chunks(file_path, output_subdir)
+        else:
+            chunks = self._iter_pcm_chunks(file_path, output_subdir)
+        # Only the time spent producing each chunk is measured, not the time the caller holds it
+        with closing(chunks):
+            index = 0
+            while True:
+                started = time.time()
+                start = time.perf_counter()
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                CHUNK_SECONDS.record(started, time.perf_counter() - start, trace_args={"chunk": index},
+                                     strategy=self.chunk_strategy)
+                AUDIO_CHUNKED_SECONDS.inc(chunk.duration if hasattr(chunk, "samples") else self._wav_seconds(chunk))
+                index += 1
+                yield chunk
+
+    def _iter_fixed_chunks(self, file_path: Path, output_subdir: Path, poll_interval: float = 0.5):
+        """Cuts exactly every `chunk_seconds` using ffmpeg's segment muxer in the background."""
+        logger.info(f"Converting and chunking {file_path.name} (fixed {self.chunk_seconds}s)")
+
         output_pattern = str(output_subdir / 'chunk_%03d.wav')
-        
-        try:
-            # -ac 1: mono
-            # -ar 16000: 16kHz sample rate
-            # -f segment: chunk output
-            # -segment_time 600: 10 minutes (600 seconds)
-            # -c:a pcm_s16le: standard wav format
-            (
-                ffmpeg
-                .input(str(file_path))
-                .output(
-                    output_pattern,
-                    format='segment',
-                    segment_time=600,
-                    acodec='pcm_s16le',
-                    ac=1,
-                    ar=16000
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+        # ffmpeg appends a chunk to the list only once that chunk file is closed
+        segment_list = output_subdir / 'chunks.txt'
+        if segment_list.exists():
+            segment_list.unlink()
+
+        process = (
+            ffmpeg
+            .input(str(file_path))
+            .output(
+                output_pattern,
+                format='segment',
+                segment_time=self.chunk_seconds,
+                segment_list=str(segment_list),
+                segment_list_type='flat',
+                acodec='pcm_s16le',
+                ac=1,
+                ar=self.SAMPLE_RATE
             )
-            logger.info("Successfully converted and chunked audio.")
-        except ffmpeg.Error as e:
+            .global_args('-loglevel', 'error')
+            .overwrite_output()
+            .run_async(pipe_stderr=True)
+        )
+
+        # Drain stderr in the background so a chatty ffmpeg can never block on a full pipe
+        stderr_lines = []
+        stderr_thread = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+        stderr_thread.start()
+
+        yielded = 0
+        try:
+            while True:
+                finished = process.poll() is not None
+                if segment_list.exists():
+                    with open(segment_list, 'r', encoding='utf-8') as f:
+                        entries = [line.strip() for line in f if line.strip()]
+                    for entry in entries[yielded:]:
+                        yield output_subdir / os.path.basename(entry)
+                    yielded = len(entries)
+                if finished:
+                    break
+                time.sleep(poll_interval)
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            stderr_thread.join(timeout=1)
+
+        if process.returncode != 0:
             logger.error(f"ffmpeg error processing {file_path.name}")
-            if e.stderr:
-                logger.error(f"stderr: {e.stderr.decode('utf8')}")
-            raise RuntimeError(f"Failed to process and chunk audio: Corrupted or invalid file.") from e
+            if stderr_lines:
+                logger.error(f"stderr: {b''.join(stderr_lines).decode('utf8', errors='replace')}")
+            raise RuntimeError("Failed to process and chunk audio: Corrupted or invalid file.")
+        logger.info("Successfully converted and chunked audio.")
+
+    def _find_cut(self, samples: np.ndarray) -> int:
+        """
+        Picks where to end the next chunk: the quietest point within `search_seconds` of the target
+        length. Frame energies are computed in one vectorized pass and smoothed so a short pause
+        between syllables doesn't beat a real gap between sentences; a small distance penalty
+        prefers cuts near the target when several gaps are about as quiet.
+        """
+        rate = self.SAMPLE_RATE
+        if self.chunk_strategy == "fixed":
+            return int(self.chunk_seconds * rate)
+        frame = rate * self.FRAME_MS // 1000
+        window_start = int((self.chunk_seconds - self.search_seconds) * rate)
+        window = samples[window_start:int((self.chunk_seconds + self.search_seconds) * rate)]
+        n_frames = len(window) // frame
+        if n_frames == 0:
+            return min(len(samples), int(self.chunk_seconds * rate))
 
+        frames = window[:n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-9)
+        smoothing = max(1, self.SMOOTHING_MS // self.FRAME_MS)
+        if n_frames >= smoothing:
+            # Edge-padded so the window borders don't look artificially quiet
+            padded = np.pad(energy_db, (smoothing // 2, smoothing - 1 - smoothing // 2), mode='edge')
+            energy_db = np.convolve(padded, np.ones(smoothing) / smoothing, mode='valid')
+
+        frame_times = window_start + (np.arange(n_frames) + 0.5) * frame
+        distance = np.abs(frame_times - self.chunk_seconds * rate) / max(self.search_seconds * rate, 1)
+        best = int(np.argmin(energy_db + 6.0 * distance))
+        return window_start + best * frame + frame // 2
+
+    @staticmethod
+    def _wav_seconds(path: Path) -> float:
+        with wave.open(str(path), 'rb') as wav_file:
+            return wav_file.getnframes() / float(wav_file.getframerate())
+
+    def _write_wav(self, path: Path, pcm: bytes):
+        # Written under a temp name and renamed, so a chunk path is only ever seen complete
+        tmp_path = path.with_suffix('.wav.tmp')
+        with wave.open(str(tmp_path), 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.SAMPLE_RATE)
+            wav_file.writeframes(pcm)
+        os.replace(tmp_path, path)
+
+    def _iter_pcm_chunks(self, file_path: Path, output_subdir: Path):
+        """
+        Decodes PCM through an ffmpeg pipe and cuts each chunk with `_find_cut` (at the quietest
+        point near the target length for the silence strategy). Only about one chunk of audio is
+        buffered at a time. A chapter start within reach of the next cut becomes the cut itself.
+        """
+        logger.info(f"Converting and chunking {file_path.name} ({self.chunk_strategy}, ~{self.chunk_seconds}s"
+                    f"{', in memory' if self.in_memory else ''})")
+
+        process = (
+            ffmpeg
+            .input(str(file_path))
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=self.SAMPLE_RATE)
+            .global_args('-loglevel', 'error')
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+        stderr_lines = []
+        stderr_thread = threading.Thread(target=lambda: stderr_lines.extend(process.stderr), daemon=True)
+        stderr_thread.start()
+
+        bytes_per_second = self.SAMPLE_RATE * 2
+        # Enough audio buffered to search the whole window around the next target cut
+        needed = int((self.chunk_seconds + self.search_seconds) * bytes_per_second)
+        # Chapter starts as byte positions in the PCM stream
+        chapter_cuts = [int(round(start * self.SAMPLE_RATE)) * 2 for start in self.chapter_starts]
+        buffer = bytearray()
+        position = 0
+        index = 0
+        try:
+            while True:
+                data = process.stdout.read(bytes_per_second * 10)
+                if data:
+                    buffer.extend(data)
+                while buffer:
+                    while chapter_cuts and chapter_cuts[0] <= position:
+                        chapter_cuts.pop(0)
+                    chapter_cut = chapter_cuts[0] - position if chapter_cuts else None
+                    if chapter_cut is not None and chapter_cut <= needed:
+                        if len(buffer) < chapter_cut and data:
+                            break
+                        cut = min(chapter_cut, len(buffer))
+                    elif len(buffer) >= needed:
+                        cut = self._find_cut(np.frombuffer(buffer, dtype=np.int16)) * 2
+                    elif not data:
+                        cut = len(buffer)
+                    else:
+                        break
+                    name = f'chunk_{index:03d}.wav'
+                    if self.in_memory:
+                        samples = np.frombuffer(bytes(buffer[:cut]), dtype=np.int16).astype(np.float32) / 32768.0
+                        chunk = PcmChunk(name, samples, self.SAMPLE_RATE)
+                    else:
+                        chunk = output_subdir / name
+                        self._write_wav(chunk, bytes(buffer[:cut]))
+                    del buffer[:cut]
+                    position += cut
+                    index += 1
+                    yield chunk
+                if not data:
+                    break
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            stderr_thread.join(timeout=1)
+
+        if process.returncode != 0:
+            logger.error(f"ffmpeg error processing {file_path.name}")
+            if stderr_lines:
+                logger.error(f"stderr: {b''.join(stderr_lines).decode('utf8', errors='replace')}")
+            raise RuntimeError("Failed to process and chunk audio: Corrupted or invalid file.")
+        logger.info("Successfully converted and chunked audio.")
+
+    def prepare(self, file_path_str: str):
+        """
+        Validates the input, creates its output subdirectory and saves its metadata.
+
+        Returns:
+            (output subdirectory, metadata dict)
+        """
+        file_path = Path(file_path_str)
+
+        if not self._validate_file(file_path):
+            raise ValueError(f"Invalid or unsupported audio file: {file_path}")
+
+        # Create a dedicated subdirectory for this file's outputs within the staging dir
+        file_out_dir = self.output_dir / file_path.stem
+        file_out_dir.mkdir(exist_ok=True)
+
+        metadata = self._extract_metadata(file_path)
+        self._save_metadata(metadata, file_out_dir / 'metadata.json')
+        return file_out_dir, metadata
 
     def process(self, file_path_str: str):
         """
@@ -123,19 +391,13 @@ class AudioProcessor:
         if not self._validate_file(file_path):
             return
             
-        # Create a dedicated subdirectory for this file's outputs within the staging dir
-        base_name = file_path.stem
-        file_out_dir = self.output_dir / base_name
-        file_out_dir.mkdir(exist_ok=True)
-        
         try:
             # 1. Extract and save metadata
-            metadata = self._extract_metadata(file_path)
-            metadata_path = file_out_dir / 'metadata.json'
-            self._save_metadata(metadata, metadata_path)
+            file_out_dir, metadata = self.prepare(file_path_str)
             
             # 2. Convert and chunk audio
-            self._process_and_chunk(file_path, file_out_dir)
+            for _ in self.iter_chunks(file_path, file_out_dir):
+                pass
             
             logger.info(f"Completed processing for {file_path.name}. Outputs at: {file_out_dir}")
             
@@ -0,0 +1,89 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024
+COMPLETE_MARKER = "_complete.json"
+
+def hash_file(file_path: str) -> str:
+    """Returns the SHA-256 hex digest of a file, read in 1 MB blocks."""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def stage_key(stage: str, inputs: dict) -> str:
+    """
+    Content address of a stage's output: a hash of the stage name and everything that determines
+    the output (the upstream stage's key plus the settings that change results).
+    """
+    payload = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def write_json_atomic(path: str, data, **dump_kwargs):
+    """Writes JSON to a temp file and renames it over `path`, so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+    os.replace(tmp_path, path)
+
+class ArtifactStore:
+    """
+    Stores pipeline stage outputs under `<root>/<key>/`, where the key is the stage's content address.
+    A stage directory only counts as usable once it has been marked complete, so partial output from
+    a crashed job is never mistaken for a finished stage.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        stage_dir = os.path.join(self.root, key)
+        os.makedirs(stage_dir, exist_ok=True)
+        return stage_dir
+
+    def is_complete(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.root, key, COMPLETE_MARKER))
+
+    def completion_info(self, key: str) -> dict | None:
+        marker = os.path.join(self.root, key, COMPLETE_MARKER)
+        if not os.path.exists(marker):
+            return None
+        with open(marker, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def mark_complete(self, key: str, info: dict | None = None):
+        write_json_atomic(os.path.join(self.path(key), COMPLETE_MARKER), info or {})
+
+    def invalidate(self, key: str):
+        """Marks a stage incomplete again while keeping its files (e.g. checkpoints that can be resumed)."""
+        marker = os.path.join(self.root, key, COMPLETE_MARKER)
+        if os.path.exists(marker):
+            os.remove(marker)
+
+    def reset(self, key: str) -> str:
+        """Discards any partial output for a stage and returns its empty directory."""
+        stage_dir = os.path.join(self.root, key)
+        if os.path.exists(stage_dir):
+            shutil.rmtree(stage_dir)
+        return self.path(key)
+
+def load_manifest(project_dir: str) -> dict:
+    manifest_path = os.path.join(project_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
+
+def save_manifest(project_dir: str, manifest: dict):
+    write_json_atomic(os.path.join(project_dir, "manifest.json"), manifest, indent=2)
@@ -0,0 +1,241 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+from progress_store import update_progress
+from processing_service import JobCancelled
+from telemetry import histogram, counter, register_collector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 2
+# How many jobs may be inside each pipeline stage at once. Transcription and translation hold
+# large models in memory, so by default only one job at a time may run each of them.
+DEFAULT_STAGE_LIMITS = {"ffmpeg": 2, "transcription": 1, "translation": 1}
+
+JOB_QUEUE_SECONDS = histogram("job_queue_seconds", "Time a job waited in the queue before a worker picked it up.")
+JOBS_FINISHED = counter("jobs_finished_total", "Jobs that left the queue, by outcome.", labels=("status",))
+
+class JobScheduler:
+    """
+    A persistent FIFO/priority job queue backed by SQLite, drained by a bounded pool of worker threads.
+    Jobs left "running" by a crash or restart are put back in the queue on start().
+    """
+
+    def __init__(self, db_path: str, run_job, max_workers: int = DEFAULT_MAX_WORKERS, stage_limits: dict | None = None):
+        """
+        Args:
+            db_path: SQLite file that stores the queue.
+            run_job: Called as run_job(job, progress_callback, stage_slot) on a worker thread.
+            max_workers: Number of jobs processed concurrently.
+            stage_limits: Max concurrent jobs per pipeline stage name.
+        """
+        self.db_path = db_path
+        self.run_job = run_job
+        self.max_workers = max(1, max_workers)
+        limits = dict(DEFAULT_STAGE_LIMITS)
+        limits.update(stage_limits or {})
+        self._stage_semaphores = {stage: threading.BoundedSemaphore(max(1, n)) for stage, n in limits.items()}
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._cancel_requested = set()
+        self._threads = []
+        self._stopping = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_id TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            # Columns added after the first release of the queue
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "source_hash" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN source_hash TEXT")
+        register_collector(self.collect_metrics)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def start(self):
+        """Re-queues interrupted jobs and starts the worker threads."""
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+            self._stopping = False
+        self._publish_queue_positions()
+
+        for i in range(self.max_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job scheduler started with {self.max_workers} workers")
+
+    def stop(self):
+        """Stops picking up new jobs. Jobs still running are re-queued on the next start()."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        self._threads = []
+
+    def enqueue(self, project_id: str, input_path: str, priority: int = 0, source_hash: str | None = None) -> int:
+        """Adds a job to the queue. Higher priority runs first; equal priorities run in FIFO order."""
+        with self._wakeup:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO jobs (project_id, input_path, priority, status, created_at, source_hash) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?)",
+                    (project_id, input_path, priority, time.time(), source_hash)
+                )
+                job_id = cursor.lastrowid
+            self._wakeup.notify()
+        self._publish_queue_positions()
+        return job_id
+
+    def cancel(self, project_id: str) -> bool:
+        """
+        Cancels the queued or running jobs for a project.
+        Queued jobs are dropped immediately; running jobs stop at their next progress update.
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE project_id = ? AND status IN ('queued', 'running')", (project_id,)
+            ).fetchall()
+            for row in rows:
+                if row["status"] == "queued":
+                    conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?", (time.time(), row["id"]))
+                    self._remove_input(row["input_path"])
+                    update_progress(project_id, "cancelled", 0, "Cancelled")
+                else:
+                    self._cancel_requested.add(row["id"])
+        if rows:
+            self._publish_queue_positions()
+        return bool(rows)
+
+    def list_jobs(self) -> list:
+        """Returns queued and running jobs in the order they will be processed."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') "
+                "ORDER BY status = 'queued', priority DESC, id ASC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def collect_metrics(self) -> list:
+        """Queued and running job counts, for the metrics endpoint (see telemetry.register_collector)."""
+        with self._connect() as conn:
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY status"
+            ).fetchall())
+        return [("jobs", "gauge", "Jobs currently queued or running.",
+                 [({"status": status}, counts.get(status, 0)) for status in ("queued", "running")])]
+
+    @contextmanager
+    def stage_slot(self, job_id: int, project_id: str, stage: str):
+        """Holds one of the limited slots for a pipeline stage while the job runs it."""
+        semaphore = self._stage_semaphores.get(stage)
+        if semaphore is None:
+            yield
+            return
+        if not semaphore.acquire(blocking=False):
+            update_progress(project_id, "processing", None, f"Waiting for a free {stage} slot...")
+            while not semaphore.acquire(timeout=1):
+                self._check_cancelled(job_id)
+        try:
+            self._check_cancelled(job_id)
+            yield
+        finally:
+            semaphore.release()
+
+    def _check_cancelled(self, job_id: int):
+        if job_id in self._cancel_requested:
+            raise JobCancelled(f"Job {job_id} was cancelled")
+
+    def _claim_next(self):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, id ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row["id"]))
+            return dict(row)
+
+    def _finish(self, job_id: int, status: str, error: str | None = None):
+        JOBS_FINISHED.inc(status=status)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+            self._cancel_requested.discard(job_id)
+
+    def _worker_loop(self):
+        while True:
+            with self._wakeup:
+                job = None
+                while not self._stopping:
+                    job = self._claim_next()
+                    if job:
+                        break
+                    self._wakeup.wait(timeout=5)
+                if self._stopping:
+                    return
+            self._publish_queue_positions()
+            self._run(job)
+
+    def _run(self, job: dict):
+        job_id = job["id"]
+        project_id = job["project_id"]
+
+        def progress_callback(progress: float, message: str, **extra):
+            self._check_cancelled(job_id)
+            update_progress(project_id, "processing", progress, message, **extra)
+
+        @contextmanager
+        def stage_slot(stage: str):
+            with self.stage_slot(job_id, project_id, stage):
+                yield
+
+        JOB_QUEUE_SECONDS.observe(max(0.0, time.time() - job["created_at"]))
+        update_progress(project_id, "processing", 0, "Starting...", readable=False)
+        try:
+            self.run_job(job, progress_callback, stage_slot)
+            self._finish(job_id, "done")
+            update_progress(project_id, "done", 100, "Processing complete", eta_seconds=0)
+        except JobCancelled:
+            logger.info(f"Job {job_id} ({project_id}) cancelled")
+            self._finish(job_id, "cancelled")
+            update_progress(project_id, "cancelled", 0, "Cancelled")
+        except Exception as e:
+            logger.error(f"Job {job_id} ({project_id}) failed: {e}")
+            self._finish(job_id, "error", str(e))
+            update_progress(project_id, "error", 0, str(e))
+        finally:
+            self._remove_input(job["input_path"])
+
+    def _remove_input(self, input_path: str):
+        if os.path.exists(input_path):
+            os.remove(input_path)
+
+    def _publish_queue_positions(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT project_id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, id ASC"
+            ).fetchall()
+        for position, row in enumerate(rows, start=1):
+            update_progress(row["project_id"], "queued", 0, f"Waiting in queue (position {position})...", queue_position=position)
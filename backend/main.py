@@ -1,8 +1,80 @@
+import time
+import logging
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import router as api_router
+from routes import router as api_router, scheduler, STAGING_DIR
+from search_index import sync_search_index
+from project_catalog import get_project_catalog
+from app_config import get_config_section
+from telemetry import histogram
 
-app = FastAPI(title="Local Media and Transcript Server")
+logger = logging.getLogger(__name__)
+
+HTTP_REQUEST_SECONDS = histogram("http_request_seconds", "Time from receiving an API request to sending the last of "
+                                 "its response.", labels=("method", "route", "status"))
+
+DEFAULT_WARMUP_MODELS = ["translation", "transcription"]
+
+def warm_up_models():
+    """Loads the models listed in config.json's models.warmup so the first request or job doesn't wait for them."""
+    warmup = get_config_section("models").get("warmup", DEFAULT_WARMUP_MODELS)
+    try:
+        if "translation" in warmup:
+            from translation_service import warm_up_translation
+            warm_up_translation()
+        if "transcription" in warmup:
+            from transcriber import warm_up_transcription
+            warm_up_transcription()
+    except Exception as e:
+        logger.error(f"Model warmup failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Resume any jobs left in the persistent queue and start the worker pool
+    scheduler.start()
+    # Validate the saved project catalog against the staging directory before the first request needs it
+    threading.Thread(target=get_project_catalog, args=(STAGING_DIR,), name="catalog-load", daemon=True).start()
+    # Index projects processed before search existed (or changed since) without delaying startup
+    threading.Thread(target=sync_search_index, args=(STAGING_DIR,), name="search-sync", daemon=True).start()
+    # Load models in the background; requests that need one before it is ready wait for the same load
+    threading.Thread(target=warm_up_models, name="model-warmup", daemon=True).start()
+    yield
+    scheduler.stop()
+
+class RequestMetricsMiddleware:
+    """
+    Times every HTTP request by route template (e.g. /api/chapters/{index}/transcript), method and status.
+    A plain ASGI middleware, so streamed and pathsend media responses pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.time()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_and_record_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.record(started, time.perf_counter() - start, method=scope["method"], route=route,
+                                        status=status)
+
+app = FastAPI(title="Local Media and Transcript Server", lifespan=lifespan)
 
 # Configure CORS for local frontend development
 app.add_middleware(
@@ -11,8 +83,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The frontend runs on another origin; without this the browser hides the resumable upload headers from it
+    expose_headers=["Upload-Offset", "Upload-Length", "Location"],
 )
 
+app.add_middleware(RequestMetricsMiddleware)
+
 app.include_router(api_router, prefix="/api")
 
 if __name__ == "__main__":
@@ -1,71 +1,614 @@
 import os
+import json
+import math
+import time
+import queue
 import shutil
 import logging
 import sys
+import threading
+from bisect import bisect_right
+from contextlib import nullcontext, closing
+from pathlib import Path
 
 # Add the project root to sys.path so we can import modules from the parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from audio_processor import AudioProcessor
-from transcriber import transcribe_chunks
+from transcriber import (iter_transcribed_placed_chunks, place_chunks, transcription_settings, get_transcription_config,
+                         checkpoint_path, load_checkpoint, shift_segments, write_transcript, chunk_duration)
+from app_config import get_config_section
+from artifact_store import ArtifactStore, hash_file, stage_key, write_json_atomic, load_manifest, save_manifest
+from search_index import index_transcript
+from project_catalog import get_project_catalog
+from telemetry import Trace, tracing, run_in_context, histogram, counter
 
 logger = logging.getLogger(__name__)
 
-def process_audio_file(input_file: str, staging_dir: str = "staging", progress_callback=None):
+# Max items waiting between two pipeline stages, so a slow downstream stage applies back-pressure
+STAGE_QUEUE_SIZE = 4
+# Minimum seconds between rewrites of the in-progress transcript.json
+TRANSCRIPT_FLUSH_INTERVAL = 10.0
+# Chunks after the one at the listener's position that are transcribed before the rest of the book
+DEFAULT_READ_AHEAD_CHUNKS = 2
+# Untranscribed spans shorter than this are not marked as gaps
+MIN_GAP_SECONDS = 0.01
+
+_STAGE_DONE = object()
+
+JOB_SECONDS = histogram("job_seconds", "Wall time of a whole processing job.")
+SOURCE_HASH_SECONDS = histogram("source_hash_seconds", "Time to hash an input file that arrived without a hash.")
+PIPELINE_STAGE_SECONDS = histogram("pipeline_stage_seconds", "Wall time of a pipeline stage within a job.", labels=("stage",))
+STAGE_WAIT_SECONDS = histogram("stage_wait_seconds", "Time a job waited to start a pipeline stage (for the previous "
+                               "stage or for a free slot held by other jobs).", labels=("stage",))
+STAGES_REUSED = counter("stages_reused_total", "Pipeline stages replayed from the artifact store.", labels=("stage",))
+
+# Latest playback position (seconds) reported by the player for each project being processed
+_hot_positions = {}
+_hot_positions_lock = threading.Lock()
+
+def set_hot_position(project_id: str, position: float):
+    """Records where the listener is, so the project's running job transcribes that part of the book next."""
+    with _hot_positions_lock:
+        _hot_positions[project_id] = position
+
+def get_hot_position(project_id: str) -> float | None:
+    with _hot_positions_lock:
+        return _hot_positions.get(project_id)
+
+def clear_hot_position(project_id: str):
+    with _hot_positions_lock:
+        _hot_positions.pop(project_id, None)
+
+class JobCancelled(Exception):
+    """Raised from a progress callback or stage slot to abort a running pipeline."""
+
+class _TranscriptWriter:
+    """
+    Tracks which chunks of the transcript are finished and atomically rewrites transcript.json from
+    their checkpoints (at most every `min_interval` seconds), so the book can be opened before
+    processing finishes. Only translations are kept in memory; segments are streamed from disk.
+    A rewrite reads every checkpoint, so it works from a snapshot outside the lock the stages take.
+    Chunks can finish in any order; until the transcript is complete, every span of the book
+    (up to `duration`) without a finished chunk is written as a placeholder segment marked "pending".
+    """
+
+    def __init__(self, path: str, checkpoint_dir: str, duration: float = 0.0, min_interval: float = TRANSCRIPT_FLUSH_INTERVAL):
+        self.path = path
+        self.checkpoint_dir = checkpoint_dir
+        self.duration = duration
+        self.min_interval = min_interval
+        self.written = False
+        self.complete = False
+        self._offsets = {}
+        self._translations = {}
+        self._lock = threading.Lock()
+        # Held while transcript.json is being rewritten, so snapshots are written in order
+        self._write_lock = threading.Lock()
+        self._last_write = 0.0
+
+    def add_chunk(self, idx: int, offset: float):
+        with self._lock:
+            self._offsets[idx] = offset
+        self.flush()
+
+    def set_translations(self, idx: int, translations: list):
+        """Stores the translations of a chunk's text segments, in segment order."""
+        with self._lock:
+            self._translations[idx] = translations
+        self.flush()
+
+    def _iter_segments(self, offsets: dict, translations: dict, complete: bool):
+        covered = 0.0
+        for idx in sorted(offsets):
+            checkpoint = load_checkpoint(checkpoint_path(self.checkpoint_dir, idx))
+            offset = offsets[idx]
+            if not complete and offset - covered >= MIN_GAP_SECONDS:
+                yield _pending_segment(covered, offset)
+            segments = shift_segments(checkpoint["segments"], offset)
+            if idx in translations:
+                chunk_translations = iter(translations[idx])
+                for segment in segments:
+                    if segment.get('text'):
+                        segment['translation'] = next(chunk_translations)
+            yield from segments
+            covered = offset + checkpoint["duration"]
+        if not complete and self.duration - covered >= MIN_GAP_SECONDS:
+            yield _pending_segment(covered, self.duration)
+
+    def flush(self, force: bool = False):
+        """Rewrites transcript.json if it is due. Unless forced, skipped while another rewrite is running."""
+        if not self._write_lock.acquire(blocking=force):
+            return
+        try:
+            with self._lock:
+                if not force and time.monotonic() - self._last_write < self.min_interval:
+                    return
+                snapshot = (dict(self._offsets), dict(self._translations), self.complete)
+            write_transcript(self.path, self._iter_segments(*snapshot))
+            with self._lock:
+                self._last_write = time.monotonic()
+            self.written = True
+        finally:
+            self._write_lock.release()
+
+    def finish(self):
+        """Writes the finished transcript, without gap markers."""
+        with self._lock:
+            self.complete = True
+        self.flush(force=True)
+
+def _pending_segment(start: float, end: float) -> dict:
+    return {"text": "", "start": round(start, 3), "end": round(end, 3), "words": [], "pending": True}
+
+class _ChunkSchedule:
+    """
+    Staged chunks waiting to be transcribed, handed out nearest the listener first.
+    While `hot_position()` returns a time (seconds), the chunk covering it and the `read_ahead`
+    chunks after it are taken first; everything else is taken front to back. Each chunk is placed
+    on the timeline from the exact durations of the chunks before it as soon as it is staged, so
+    it can be transcribed before them.
+    """
+
+    def __init__(self, hot_position, read_ahead: int):
+        self.hot_position = hot_position
+        self.read_ahead = read_ahead
+        self._chunks = []
+        self._starts = []
+        self._end = 0.0
+        self._taken = set()
+        self._next = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def add(self, chunk_path: str):
+        duration = chunk_duration(chunk_path)
+        with self._cond:
+            self._chunks.append((chunk_path, self._end, duration))
+            self._starts.append(self._end)
+            self._end += duration
+            self._cond.notify_all()
+
+    def close(self):
+        """No more chunks will be added."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _pick(self) -> int | None:
+        hot = self.hot_position()
+        if hot is not None and hot < self._end:
+            # Chunks the chunker hasn't reached yet can't be picked; the front fills in meanwhile
+            first = max(0, bisect_right(self._starts, hot) - 1)
+            for idx in range(first, min(first + self.read_ahead + 1, len(self._chunks))):
+                if idx not in self._taken:
+                    return idx
+        while self._next in self._taken:
+            self._next += 1
+        return self._next if self._next < len(self._chunks) else None
+
+    def placed_chunks(self, stop: threading.Event):
+        """Yields (chunk index, path, timeline offset, duration) in transcription order until every chunk is taken."""
+        while True:
+            with self._cond:
+                while True:
+                    if stop.is_set():
+                        return
+                    idx = self._pick()
+                    if idx is not None:
+                        break
+                    if self._closed:
+                        return
+                    self._cond.wait(timeout=0.5)
+                self._taken.add(idx)
+                path, offset, duration = self._chunks[idx]
+            yield idx, path, offset, duration
+
+def _stage_throughput(total: int, chunks: dict, segments: dict, elapsed: float) -> tuple:
+    """
+    Per-stage counts and throughput since the pipeline started, plus an ETA in seconds (None until
+    both stages have finished a chunk). Translation trails transcription, so the later of the two wins.
+    """
+    elapsed = max(elapsed, 1e-6)
+    stages = {}
+    etas = []
+    for stage, key in (("transcription", "transcribed"), ("translation", "translated")):
+        chunk_rate = chunks[key] / elapsed
+        stages[stage] = {
+            "chunks_done": chunks[key],
+            "chunks_total": total,
+            "segments_done": segments[key],
+            "chunks_per_second": round(chunk_rate, 4),
+            "segments_per_second": round(segments[key] / elapsed, 2)
+        }
+        etas.append((total - chunks[key]) / chunk_rate if chunk_rate else None)
+    eta = None if None in etas else round(max(etas), 1)
+    return stages, eta
+
+def _load_json(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _run_pipeline(processor: AudioProcessor, input_file: str, writer: _TranscriptWriter, expected_chunks: int,
+                  report_progress, stage_slot, store: ArtifactStore, keys: dict, hot_position=None,
+                  read_ahead: int = DEFAULT_READ_AHEAD_CHUNKS):
+    """
+    Runs chunking, transcription and translation as three concurrent stages connected by bounded
+    queues: chunks are transcribed as soon as ffmpeg closes them, and each chunk's segments are
+    translated as soon as Whisper returns them.
+    Every stage writes its output into the artifact store under its content key (`keys`), and a stage
+    whose key is already complete replays the stored output instead of recomputing it.
+    Stage slots are taken in pipeline order (a stage only asks for its slot once the previous stage
+    holds its own), so jobs sharing a scheduler can never wait on each other in a cycle.
+    With a `hot_position` callable (the listener's position in seconds, or None), chunks staged on
+    disk are transcribed nearest that position first (see _ChunkSchedule); the chunker then runs
+    ahead of transcription instead of being held back by the queue.
+    """
+    from translation_service import translate_texts, TRANSLATION_FAILED
+
+    chunk_queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+    # In-memory chunks would all have to be held in RAM to be reordered, so they stay in order
+    schedule = _ChunkSchedule(hot_position, read_ahead) if hot_position and not processor.in_memory else None
+    segment_queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+    stop = threading.Event()
+    errors = []
+    counts = {"total": expected_chunks, "transcribed": 0, "translated": 0}
+    segment_counts = {"transcribed": 0, "translated": 0}
+    counts_lock = threading.Lock()
+    started = time.monotonic()
+
+    def put(q: queue.Queue, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def get(q: queue.Queue):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _STAGE_DONE
+
+    def set_total(total: int):
+        with counts_lock:
+            counts["total"] = total
+
+    def advance(key: str, segments: int):
+        with counts_lock:
+            counts[key] += 1
+            segment_counts[key] += segments
+            total = max(counts["total"], counts["transcribed"], 1)
+            transcribed, translated = counts["transcribed"], counts["translated"]
+            stages, eta = _stage_throughput(total, counts, segment_counts, time.monotonic() - started)
+        # Transcription covers 15% -> 85% and translation the last 15%, even though they overlap in time
+        percent = 15 + (transcribed / total) * 70 + (translated / total) * 15
+        report_progress(percent, f"Transcribed {transcribed}/{total} chunks, translated {translated}/{total}...",
+                        readable=writer.written, stages=stages, eta_seconds=eta)
+
+    def chunk_stage():
+        if store.is_complete(keys["transcript"]):
+            # Transcription will be replayed from the store, so no audio is needed
+            put(chunk_queue, _STAGE_DONE)
+            return
+
+        if processor.in_memory:
+            # Decoded audio goes straight from the ffmpeg pipe to Whisper; nothing is staged on disk
+            chunked = 0
+            with closing(processor.iter_chunks(Path(input_file), None)) as chunks:
+                for chunk in chunks:
+                    if stop.is_set():
+                        return
+                    put(chunk_queue, chunk)
+                    chunked += 1
+            set_total(chunked)
+            put(chunk_queue, _STAGE_DONE)
+            return
+
+        def emit_chunk(chunk_path: str):
+            if schedule is not None:
+                schedule.add(chunk_path)
+            else:
+                put(chunk_queue, chunk_path)
+
+        chunk_info = store.completion_info(keys["chunks"])
+        if chunk_info is not None:
+            logger.info("Reusing staged audio chunks")
+            STAGES_REUSED.inc(stage="chunks")
+            chunk_dir = store.path(keys["chunks"])
+            set_total(len(chunk_info["chunks"]))
+            for name in chunk_info["chunks"]:
+                emit_chunk(os.path.join(chunk_dir, name))
+        else:
+            chunk_dir = store.reset(keys["chunks"])
+            names = []
+            with closing(processor.iter_chunks(Path(input_file), Path(chunk_dir))) as chunks:
+                for chunk_path in chunks:
+                    if stop.is_set():
+                        return
+                    emit_chunk(str(chunk_path))
+                    names.append(chunk_path.name)
+            store.mark_complete(keys["chunks"], {"chunks": names})
+            set_total(len(names))
+        if schedule is not None:
+            schedule.close()
+        else:
+            put(chunk_queue, _STAGE_DONE)
+
+    def transcription_stage():
+        transcript_dir = store.path(keys["transcript"])
+
+        def emit(idx: int, offset: float, segments: list):
+            writer.add_chunk(idx, offset)
+            put(segment_queue, (idx, segments))
+            advance("transcribed", len(segments))
+
+        transcript_info = store.completion_info(keys["transcript"])
+        if transcript_info is not None:
+            logger.info("Reusing staged transcription")
+            STAGES_REUSED.inc(stage="transcript")
+            set_total(transcript_info["chunks"])
+            for idx in range(transcript_info["chunks"]):
+                if stop.is_set():
+                    return
+                checkpoint = load_checkpoint(checkpoint_path(transcript_dir, idx))
+                emit(idx, checkpoint["offset"], shift_segments(checkpoint["segments"], checkpoint["offset"]))
+            put(segment_queue, _STAGE_DONE)
+            return
+
+        def chunk_stream():
+            while True:
+                chunk_path = get(chunk_queue)
+                if chunk_path is _STAGE_DONE:
+                    return
+                yield chunk_path
+
+        placed = schedule.placed_chunks(stop) if schedule is not None else place_chunks(chunk_stream())
+        # Chunks are checkpointed into the stage directory as they finish; after a crash, chunks
+        # with a valid checkpoint are replayed instead of transcribed again
+        transcribed_chunks = 0
+        with closing(iter_transcribed_placed_chunks(placed, checkpoint_dir=transcript_dir)) as transcribed:
+            for idx, offset, segments in transcribed:
+                if stop.is_set():
+                    return
+                emit(idx, offset, segments)
+                transcribed_chunks += 1
+        # The chunk stream also ends when another stage fails; only a clean run is complete
+        if stop.is_set():
+            return
+        store.mark_complete(keys["transcript"], {"chunks": transcribed_chunks})
+        put(segment_queue, _STAGE_DONE)
+
+    def translation_stage():
+        translation_dir = store.path(keys["translation"])
+        translation_failed = False
+        chunks_seen = 0
+        chunks_stored = 0
+        while True:
+            item = get(segment_queue)
+            if item is _STAGE_DONE:
+                break
+            idx, segments = item
+            chunks_seen += 1
+            pending = [segment for segment in segments if segment.get('text')]
+            translation_path = os.path.join(translation_dir, f"chunk_{idx:03d}.json")
+            translations = None
+
+            if os.path.exists(translation_path):
+                translations = _load_json(translation_path)
+            elif not translation_failed:
+                # We explicitly let errors during translation not crash the whole process;
+                # after a failure the remaining segments are still drained so transcription keeps flowing.
+                try:
+                    translations = translate_texts([segment['text'] for segment in pending])
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    logger.error(f"Translation failed: {e}")
+                    translation_failed = True
+                # Chunks with failed sentences aren't stored, so the next run retries them
+                if translations is not None and TRANSLATION_FAILED not in translations:
+                    write_json_atomic(translation_path, translations)
+
+            if translations is not None and len(translations) == len(pending):
+                writer.set_translations(idx, translations)
+                if os.path.exists(translation_path):
+                    chunks_stored += 1
+            advance("translated", len(pending))
+
+        if not stop.is_set() and chunks_stored == chunks_seen:
+            store.mark_complete(keys["translation"], {"chunks": chunks_stored})
+
+    def start_stage(name: str, body, wait_for: threading.Event | None, acquired: threading.Event):
+        def run():
+            try:
+                waited_at = time.time()
+                waited = time.perf_counter()
+                if wait_for is not None:
+                    wait_for.wait()
+                if stop.is_set():
+                    return
+                with stage_slot(name):
+                    STAGE_WAIT_SECONDS.record(waited_at, time.perf_counter() - waited, stage=name)
+                    acquired.set()
+                    with PIPELINE_STAGE_SECONDS.time(stage=name):
+                        body()
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                # Never leave the next stage waiting on a stage that has exited
+                acquired.set()
+
+        # The stage threads record their spans into the job's trace
+        thread = threading.Thread(target=run_in_context(run), name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    ffmpeg_acquired = threading.Event()
+    transcription_acquired = threading.Event()
+    translation_acquired = threading.Event()
+    threads = [
+        start_stage("ffmpeg", chunk_stage, None, ffmpeg_acquired),
+        start_stage("transcription", transcription_stage, ffmpeg_acquired, transcription_acquired),
+        start_stage("translation", translation_stage, transcription_acquired, translation_acquired),
+    ]
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        cancelled = [e for e in errors if isinstance(e, JobCancelled)]
+        raise cancelled[0] if cancelled else errors[0]
+
+def _make_processor(staging_dir: str, metadata: dict) -> AudioProcessor:
     """
-    Unified pipeline to process an audio file: chunking, transcribing, and setting up for playback.
+    Builds the chunking AudioProcessor from the "chunking" section of config.json.
+    With several transcription workers, the target chunk length is shortened (down to
+    `chunking.min_seconds`) so every worker gets at least two chunks of a short book.
+    Unless `chunking.align_chapters` is false, chunks are cut at the book's chapter edges, so each
+    chapter's transcript is a contiguous run of segments.
     """
+    config = get_config_section("chunking")
+    duration = metadata.get('duration_seconds') or 0
+    chunk_seconds = config.get("target_seconds", AudioProcessor.CHUNK_SECONDS)
+    workers = max(1, int(get_transcription_config().get("workers", 1)))
+    if workers > 1 and duration:
+        chunk_seconds = max(config.get("min_seconds", 120), min(chunk_seconds, duration / (workers * 2)))
+    return AudioProcessor(
+        output_dir=staging_dir,
+        chunk_strategy=config.get("strategy", "silence"),
+        chunk_seconds=chunk_seconds,
+        search_seconds=config.get("search_seconds", AudioProcessor.SEARCH_SECONDS),
+        in_memory=config.get("in_memory", False),
+        chapter_starts=AudioProcessor.chapter_starts_from_metadata(metadata) if config.get("align_chapters", True) else None
+    )
+
+def process_audio_file(input_file: str, staging_dir: str = "staging", progress_callback=None, stage_slot=None,
+                       source_hash: str | None = None):
+    """
+    Unified pipeline to process an audio file: chunking, transcribing, translating and setting up for playback.
+    The stages run concurrently and transcript.json is rewritten as it grows, so the book becomes
+    readable after its first chunk.
+    Stage outputs are content-addressed from the file's SHA-256 (`source_hash`, computed if not given)
+    and the settings each stage depends on, so re-uploading the same book or changing only the
+    translation model reuses every stage that is still valid.
+    `stage_slot(name)` optionally returns a context manager held while a stage ("ffmpeg",
+    "transcription", "translation") runs, letting a scheduler limit how many jobs share a stage.
+    While the job runs, set_hot_position(project_id, seconds) moves the part of the book the player is
+    at (and `chunking.read_ahead_chunks` chunks after it) to the front of the transcription order.
+    With `telemetry.trace_jobs` in config.json, the job's timing spans (ffprobe, chunks, Whisper chunks,
+    translation batches, model loads, stage waits) are saved to <project>/trace.json in the Chrome
+    trace event format, for chrome://tracing or https://ui.perfetto.dev.
+    """
+    trace = Trace(Path(input_file).stem) if get_config_section("telemetry").get("trace_jobs", False) else None
+    try:
+        with tracing(trace), JOB_SECONDS.time():
+            return _process_audio_file(input_file, staging_dir, progress_callback, stage_slot, source_hash)
+    finally:
+        project_dir = os.path.join(staging_dir, Path(input_file).stem)
+        if trace is not None and os.path.isdir(project_dir):
+            try:
+                trace.save(os.path.join(project_dir, "trace.json"))
+            except OSError as e:
+                logger.warning(f"Could not save the job trace: {e}")
+
+def _process_audio_file(input_file: str, staging_dir: str, progress_callback, stage_slot, source_hash: str | None):
+    """The body of process_audio_file, run inside the job's trace."""
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"Input file {input_file} does not exist.")
 
-    def report_progress(progress: float, message: str):
+    def report_progress(progress: float, message: str, **extra):
         if progress_callback:
-            progress_callback(progress, message)
+            progress_callback(progress, message, **extra)
+
+    if stage_slot is None:
+        stage_slot = lambda stage: nullcontext()
 
-    # 1. Chunk audio
+    # 1. Validate and extract metadata
     logger.info("Starting Phase 1: Audio Processing")
     report_progress(5, "Extracting audio chunks...")
-    processor = AudioProcessor(output_dir=staging_dir)
-    processor.process(input_file)
+    project_dir, metadata = AudioProcessor(output_dir=staging_dir).prepare(input_file)
+    duration = metadata.get('duration_seconds') or 0
+    processor = _make_processor(staging_dir, metadata)
 
     # Note: AudioProcessor creates a subdirectory named after the file stem.
-    base_name = os.path.splitext(os.path.basename(input_file))[0]
-    project_staging_dir = os.path.join(staging_dir, base_name)
-    
-    if not os.path.exists(project_staging_dir):
-        raise RuntimeError(f"Processing failed: Directory {project_staging_dir} not created.")
-
-    # 2. Transcribe
-    logger.info("Starting Phase 2: Transcription")
-    report_progress(15, "Starting transcription...")
-    output_transcript = os.path.join(project_staging_dir, "transcript.json")
-    transcribe_chunks(project_staging_dir, output_transcript, progress_callback=report_progress)
-    
-    # 3. Save a copy of the original audio file for easy playback
-    logger.info("Starting Phase 3: Preparing Playback Media")
-    # Tell user transcript is ready by hitting 84%
-    report_progress(84, "Finalizing playback media...")
+    base_name = project_dir.name
+    project_staging_dir = str(project_dir)
+
+    # Work out the content address of every stage
+    from translation_service import get_translation_key
+    if not source_hash:
+        with SOURCE_HASH_SECONDS.time():
+            source_hash = hash_file(input_file)
+    store = ArtifactStore(os.path.join(staging_dir, "objects"))
+    keys = {"chunks": stage_key("chunks", {"source": source_hash, **processor.chunking_settings()})}
+    keys["transcript"] = stage_key("transcript", {"chunks": keys["chunks"], **transcription_settings()})
+    keys["translation"] = stage_key("translation", {"transcript": keys["transcript"], "model": get_translation_key()})
+
+    # A completed transcript stage is only usable if all of its chunk checkpoints survived
+    transcript_info = store.completion_info(keys["transcript"])
+    if transcript_info is not None:
+        transcript_dir = store.path(keys["transcript"])
+        if any(load_checkpoint(checkpoint_path(transcript_dir, idx)) is None for idx in range(transcript_info["chunks"])):
+            logger.warning("Staged transcription is missing checkpoints, transcribing again")
+            store.invalidate(keys["transcript"])
+
+    manifest = load_manifest(project_staging_dir)
+    manifest.update({
+        "source_sha256": source_hash,
+        "original_filename": os.path.basename(input_file),
+        "stages": {stage: {"key": key, "complete": store.is_complete(key)} for stage, key in keys.items()}
+    })
+    save_manifest(project_staging_dir, manifest)
+
+    # 2. Save a copy of the original audio file for easy playback, so it's there as soon as text is
+    logger.info("Preparing Playback Media")
     file_ext = os.path.splitext(input_file)[1]
     project_audio_path = os.path.join(project_staging_dir, f"original_audio{file_ext}")
-    
+
     if not os.path.exists(project_audio_path):
-        shutil.copy2(os.path.abspath(input_file), os.path.abspath(project_audio_path))
+        try:
+            # A hard link shares the uploaded bytes instead of copying them (the upload is deleted after the job)
+            os.link(os.path.abspath(input_file), os.path.abspath(project_audio_path))
+        except OSError:
+            shutil.copy2(os.path.abspath(input_file), os.path.abspath(project_audio_path))
         logger.info(f"Copied original media to {project_audio_path}")
 
-    # 4. Translate
-    logger.info("Starting Phase 4: Translation")
-    report_progress(85, "Translating transcript...")
-    from translation_service import translate_transcript_sync
-    # We explicitly let errors during translation not crash the whole process
+    # 3. Chunk, transcribe and translate as one streaming pipeline
+    logger.info("Starting Phase 2: Chunking, Transcription and Translation")
+    report_progress(15, "Starting transcription...")
+    output_transcript = os.path.join(project_staging_dir, "transcript.json")
+    # Chunks restart at every chapter edge
+    edges = [0.0] + processor.chapter_starts + [duration]
+    expected_chunks = max(1, sum(math.ceil((end - start) / processor.chunk_seconds) for start, end in zip(edges, edges[1:])))
+
+    writer = _TranscriptWriter(output_transcript, store.path(keys["transcript"]), duration=duration)
+    # The player reports where the listener is (set_hot_position); that part of the book is transcribed first
+    read_ahead = get_config_section("chunking").get("read_ahead_chunks", DEFAULT_READ_AHEAD_CHUNKS)
+    try:
+        _run_pipeline(processor, input_file, writer, expected_chunks, report_progress, stage_slot, store, keys,
+                      hot_position=lambda: get_hot_position(base_name), read_ahead=read_ahead)
+    finally:
+        clear_hot_position(base_name)
+    writer.finish()
+
+    for stage, key in keys.items():
+        manifest["stages"][stage]["complete"] = store.is_complete(key)
+    save_manifest(project_staging_dir, manifest)
+
     try:
-        translate_transcript_sync(output_transcript, progress_callback=report_progress)
+        index_transcript(staging_dir, base_name, output_transcript)
     except Exception as e:
-        logger.error(f"Translation failed: {e}")
+        logger.warning(f"Could not index {base_name} for search: {e}")
+    get_project_catalog(staging_dir).update_project(base_name)
 
-    report_progress(100, "Processing complete")
+    report_progress(100, "Processing complete", readable=True, eta_seconds=0)
     return {
         "project_id": base_name,
         "staging_dir": project_staging_dir,
-        "transcript_path": output_transcript, 
+        "transcript_path": output_transcript,
         "audio_path": project_audio_path
     }
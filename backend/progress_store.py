@@ -1,16 +1,103 @@
+import asyncio
+import threading
+
 # A simple global dictionary to track background processing states
 progress_store = {}
 
-def update_progress(project_id: str, status: str, progress: float, message: str):
-    progress_store[project_id] = {
-        "status": status,
-        "progress": progress,
-        "message": message
-    }
+# Live subscribers (progress streams) and the lock that guards both the store and the subscriber set
+_subscribers = set()
+_lock = threading.Lock()
+
+class ProgressSubscription:
+    """
+    Receives progress updates for one project (or all projects) on an asyncio event loop.
+    Updates are coalesced per project, so a slow client only ever gets the latest state instead
+    of a growing backlog.
+    """
+
+    def __init__(self, project_id: str | None, loop: asyncio.AbstractEventLoop):
+        self.project_id = project_id
+        self.loop = loop
+        self._pending = {}
+        self._ready = asyncio.Event()
+
+    def _deliver(self, project_id: str, state: dict):
+        if self.project_id is None or self.project_id == project_id:
+            # update_progress runs on worker threads; hand the state over to the subscriber's loop
+            self.loop.call_soon_threadsafe(self._put, project_id, state)
+
+    def _put(self, project_id: str, state: dict):
+        self._pending[project_id] = state
+        self._ready.set()
+
+    async def next(self, timeout: float | None = None) -> dict:
+        """Waits for updates and returns {project_id: state}; empty if `timeout` passes first."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self._ready.clear()
+        updates, self._pending = self._pending, {}
+        return updates
+
+def subscribe(project_id: str | None = None) -> ProgressSubscription:
+    """Subscribes the running event loop to updates for `project_id` (None for every project)."""
+    subscription = ProgressSubscription(project_id, asyncio.get_running_loop())
+    with _lock:
+        _subscribers.add(subscription)
+    return subscription
+
+def unsubscribe(subscription: ProgressSubscription):
+    with _lock:
+        _subscribers.discard(subscription)
+
+def update_progress(project_id: str, status: str, progress: float | None, message: str,
+                    queue_position: int | None = None, readable: bool | None = None,
+                    stages: dict | None = None, eta_seconds: float | None = None):
+    """
+    Records the latest state of a project's job and pushes it to subscribers.
+    A `progress` of None keeps the previous percentage (e.g. for "waiting" messages mid-job), and a
+    `readable` of None keeps the previous flag; it turns True once a partial transcript can be opened.
+    `stages` (per-stage counts and throughput) and `eta_seconds` likewise keep their previous value
+    when None, as long as the job was already processing; a new job starts without them.
+    """
+    with _lock:
+        previous = progress_store.get(project_id, {})
+        if progress is None:
+            progress = previous.get("progress", 0)
+        if readable is None:
+            readable = previous.get("readable", False)
+        carry_over = previous.get("status") == "processing"
+        if stages is None and carry_over:
+            stages = previous.get("stages")
+        if eta_seconds is None and carry_over:
+            eta_seconds = previous.get("eta_seconds")
+        state = {
+            "status": status,
+            "progress": progress,
+            "message": message,
+            "queue_position": queue_position,
+            "readable": readable,
+            "stages": stages,
+            "eta_seconds": eta_seconds
+        }
+        progress_store[project_id] = state
+        subscribers = list(_subscribers)
+    for subscription in subscribers:
+        try:
+            subscription._deliver(project_id, state)
+        except RuntimeError:
+            # The subscriber's event loop is closed; it is gone for good
+            unsubscribe(subscription)
 
 def get_progress(project_id: str):
     return progress_store.get(project_id, {"status": "unknown", "progress": 0, "message": "Not found"})
 
+def get_all_progress() -> dict:
+    with _lock:
+        return dict(progress_store)
+
 def remove_progress(project_id: str):
-    if project_id in progress_store:
-        del progress_store[project_id]
+    with _lock:
+        if project_id in progress_store:
+            del progress_store[project_id]
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from artifact_store import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 3
+# Staging entries that are not projects (the shared artifact store)
+NON_PROJECT_DIRS = {"objects"}
+# How often (at most) the staging directory is checked for projects added or removed behind our back
+DEFAULT_RECHECK_SECONDS = 2.0
+
+def _chapters(metadata: dict) -> list:
+    """Normalizes ffprobe's chapter list to [{index, title, start, end}] (seconds)."""
+    chapters = []
+    for idx, chapter in enumerate(metadata.get("chapters") or []):
+        try:
+            start, end = float(chapter["start_time"]), float(chapter["end_time"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        title = (chapter.get("tags") or {}).get("title") or f"Chapter {idx + 1}"
+        chapters.append({"index": len(chapters), "title": title, "start": start, "end": end})
+    return chapters
+
+def _load_json(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def scan_project(project_dir: str) -> dict:
+    """Builds the catalog entry of one project directory (a single listdir plus two small JSON reads)."""
+    files, sizes = {}, {}
+    transcript_mtime = None
+    with os.scandir(project_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if entry.name.startswith("original_audio."):
+                kind = "audio"
+            elif entry.name == "transcript.json":
+                kind = "transcript"
+            elif entry.name == "transcript.bin":
+                kind = "transcript_store"
+            else:
+                continue
+            stat_result = entry.stat()
+            files[kind] = entry.name
+            sizes[kind] = stat_result.st_size
+            if kind == "transcript":
+                transcript_mtime = stat_result.st_mtime
+
+    metadata = _load_json(os.path.join(project_dir, "metadata.json"))
+    manifest = _load_json(os.path.join(project_dir, "manifest.json"))
+    stages = manifest.get("stages") or {}
+    if stages:
+        complete = all(stage.get("complete") for stage in stages.values())
+    else:
+        # Projects processed before manifests existed only have a transcript once processing finished
+        complete = "transcript" in files
+    project_id = os.path.basename(project_dir)
+    return {
+        "id": project_id,
+        "name": project_id.replace("_", " "),
+        "updated_at": os.stat(project_dir).st_mtime,
+        # transcript.json can be rewritten in place, which leaves the directory's mtime alone
+        "transcript_mtime": transcript_mtime,
+        "duration": metadata.get("duration_seconds"),
+        "format": metadata.get("format"),
+        "chapters": _chapters(metadata),
+        "complete": complete,
+        "files": files,
+        "sizes": {**sizes, "total": sum(sizes.values())}
+    }
+
+class ProjectCatalog:
+    """
+    In-memory index of the projects in a staging directory, persisted to <staging_dir>/catalog.json.
+    Each entry holds a project's duration, chapters, completion, artifact file names and sizes, so
+    listing the library and finding a project's media are dictionary lookups instead of directory scans.
+    Jobs update their project when they write it (update_project). Otherwise a project is only re-read
+    when its directory's or transcript's mtime changes, e.g. while it is being processed again. At most
+    every `recheck_seconds` the staging directory and each known project are stat'ed to notice this.
+    """
+
+    def __init__(self, staging_dir: str, recheck_seconds: float = DEFAULT_RECHECK_SECONDS):
+        self.staging_dir = os.path.abspath(staging_dir)
+        self.path = os.path.join(self.staging_dir, "catalog.json")
+        self.recheck_seconds = recheck_seconds
+        self._projects = {}
+        self._staging_mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+
+        saved = _load_json(self.path)
+        if saved.get("version") == CATALOG_VERSION:
+            self._projects = saved.get("projects", {})
+        # Validate the saved entries once (one stat per project); only changed projects are re-read
+        self.refresh(full=True)
+
+    def _save(self):
+        try:
+            unchanged = os.stat(self.staging_dir).st_mtime == self._staging_mtime
+            write_json_atomic(self.path, {"version": CATALOG_VERSION, "projects": self._projects})
+            # Writing the catalog touches the staging directory; don't mistake that for a new project
+            if unchanged:
+                self._staging_mtime = os.stat(self.staging_dir).st_mtime
+        except OSError as e:
+            logger.warning(f"Could not save the project catalog: {e}")
+
+    def _rescan(self, project_id: str) -> bool:
+        """Re-reads one project into the catalog (or drops it if it is gone). Returns True if it changed."""
+        project_dir = os.path.join(self.staging_dir, project_id)
+        try:
+            entry = scan_project(project_dir)
+        except (FileNotFoundError, NotADirectoryError):
+            entry = None
+        previous = self._projects.get(project_id)
+        if entry is None:
+            self._projects.pop(project_id, None)
+        else:
+            self._projects[project_id] = entry
+        return entry != previous
+
+    def _changed_on_disk(self, entry: dict) -> bool:
+        """True if a project's directory or transcript.json was modified (or removed) since it was read."""
+        project_dir = os.path.join(self.staging_dir, entry["id"])
+        try:
+            if os.stat(project_dir).st_mtime != entry["updated_at"]:
+                return True
+        except OSError:
+            return True
+        try:
+            transcript_mtime = os.stat(os.path.join(project_dir, "transcript.json")).st_mtime
+        except OSError:
+            transcript_mtime = None
+        return transcript_mtime != entry.get("transcript_mtime")
+
+    def refresh(self, full: bool = False):
+        """
+        Brings the catalog up to date with the disk. Cheap unless something changed: a stat of the
+        staging directory and two per known project, plus a re-read of projects that have no transcript
+        yet (they are being processed) or whose directory or transcript changed. `full` also lists the
+        staging directory, catching projects added or removed while the app was not running.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not full and now - self._checked_at < self.recheck_seconds:
+                return
+            self._checked_at = now
+            try:
+                staging_mtime = os.stat(self.staging_dir).st_mtime
+            except FileNotFoundError:
+                if self._projects:
+                    self._projects = {}
+                    self._staging_mtime = None
+                return
+
+            changed = False
+            if full or staging_mtime != self._staging_mtime:
+                present = set()
+                with os.scandir(self.staging_dir) as entries:
+                    for entry in entries:
+                        if entry.name in NON_PROJECT_DIRS or entry.name.startswith(".") or not entry.is_dir():
+                            continue
+                        present.add(entry.name)
+                        known = self._projects.get(entry.name)
+                        if known is None or self._changed_on_disk(known):
+                            changed |= self._rescan(entry.name)
+                for project_id in set(self._projects) - present:
+                    del self._projects[project_id]
+                    changed = True
+                self._staging_mtime = staging_mtime
+            else:
+                for project_id, entry in list(self._projects.items()):
+                    if "transcript" not in entry["files"] or self._changed_on_disk(entry):
+                        changed |= self._rescan(project_id)
+            if changed:
+                self._save()
+
+    def update_project(self, project_id: str):
+        """Re-reads one project now, e.g. after a job wrote to it."""
+        with self._lock:
+            if self._rescan(project_id):
+                self._save()
+
+    def get(self, project_id: str) -> dict | None:
+        """A project's entry, or None if there is no such project."""
+        self.refresh()
+        with self._lock:
+            entry = self._projects.get(project_id)
+            if entry is None and self._is_project_name(project_id) and os.path.isdir(os.path.join(self.staging_dir, project_id)):
+                # Created since the last check
+                self.update_project(project_id)
+                entry = self._projects.get(project_id)
+            return entry
+
+    def projects(self) -> list:
+        """Every project, most recently updated first."""
+        self.refresh()
+        with self._lock:
+            return sorted(self._projects.values(), key=lambda entry: entry["updated_at"], reverse=True)
+
+    def latest(self) -> dict | None:
+        """The most recently updated project that has a transcript."""
+        return next((entry for entry in self.projects() if "transcript" in entry["files"]), None)
+
+    def file_path(self, entry: dict, kind: str) -> str | None:
+        """Absolute path of a project's artifact ("audio", "transcript", "transcript_store"), if it has one."""
+        name = entry["files"].get(kind)
+        return os.path.join(self.staging_dir, entry["id"], name) if name else None
+
+    @staticmethod
+    def _is_project_name(project_id: str) -> bool:
+        return (bool(project_id) and os.path.basename(project_id) == project_id
+                and not project_id.startswith(".") and project_id not in NON_PROJECT_DIRS)
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def get_project_catalog(staging_dir: str) -> ProjectCatalog:
+    """The shared catalog of a staging directory."""
+    staging_dir = os.path.abspath(staging_dir)
+    with _catalogs_lock:
+        if staging_dir not in _catalogs:
+            _catalogs[staging_dir] = ProjectCatalog(staging_dir)
+        return _catalogs[staging_dir]
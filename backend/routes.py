@@ -1,9 +1,20 @@
-from fastapi import APIRouter, Request, HTTPException, status, UploadFile, File, BackgroundTasks
-from services import stream_media_file, get_transcript_data
-from processing_service import process_audio_file
+from fastapi import APIRouter, Request, Response, HTTPException, status, UploadFile, File
+from services import (stream_media_file, get_transcript_data, get_transcript_window, seek_transcript, get_chapters,
+                      get_chapter_transcript)
+from processing_service import process_audio_file, set_hot_position
+from job_queue import JobScheduler, DEFAULT_MAX_WORKERS
+from app_config import get_config_section
+from artifact_store import HASH_BLOCK_SIZE
+from search_index import get_search_index, DEFAULT_PAGE_SIZE
+from model_registry import get_model_registry
+from upload_store import UploadStore, UploadOffsetMismatch
+from project_catalog import get_project_catalog
+from telemetry import render_prometheus
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 import os
-import glob
-import shutil
+import json
+import hashlib
 
 router = APIRouter()
 
@@ -15,53 +26,76 @@ TEMP_DIR = os.path.join(BASE_DIR, "temp")
 
 os.makedirs(TEMP_DIR, exist_ok=True)
 
-def get_latest_project_dir():
-    if not os.path.exists(STAGING_DIR):
-        return None
-    # Get all subdirectories
-    subdirs = [os.path.join(STAGING_DIR, d) for d in os.listdir(STAGING_DIR) if os.path.isdir(os.path.join(STAGING_DIR, d))]
-    if not subdirs:
-        return None
-    # Sort by modification time to get the latest
-    latest_subdir = max(subdirs, key=os.path.getmtime)
-    return latest_subdir
+SUPPORTED_EXTENSIONS = ('.mp3', '.m4b')
+uploads = UploadStore(os.path.join(TEMP_DIR, "uploads"))
+
+def run_job(job: dict, progress_callback, stage_slot):
+    process_audio_file(job["input_path"], STAGING_DIR, progress_callback=progress_callback, stage_slot=stage_slot,
+                       source_hash=job.get("source_hash"))
+
+_scheduler_config = get_config_section("scheduler")
+scheduler = JobScheduler(
+    os.path.join(STAGING_DIR, "jobs.db"),
+    run_job,
+    max_workers=_scheduler_config.get("max_workers", DEFAULT_MAX_WORKERS),
+    stage_limits=_scheduler_config.get("stage_limits")
+)
+
+def get_project(project_id: str | None = None) -> dict:
+    """
+    Catalog entry of a project, or of the latest one if project_id is not given. Raises 404 if there is none.
+    """
+    catalog = get_project_catalog(STAGING_DIR)
+    project = catalog.get(project_id) if project_id else catalog.latest()
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+def get_project_file(project_id: str | None, kind: str, missing: str) -> str:
+    """Path of one of a project's artifacts (see ProjectCatalog.file_path); 404 with `missing` if it has none."""
+    path = get_project_catalog(STAGING_DIR).file_path(get_project(project_id), kind)
+    if path is None:
+        raise HTTPException(status_code=404, detail=missing)
+    return path
 
 @router.get("/projects")
 async def list_projects():
     """
-    List all processed projects in the staging directory.
+    List all processed projects in the staging directory, with their duration, chapters and sizes.
     """
-    if not os.path.exists(STAGING_DIR):
-        return []
-    
-    from progress_store import get_progress
-    
     projects = []
-    for d in os.listdir(STAGING_DIR):
-        dir_path = os.path.join(STAGING_DIR, d)
-        if os.path.isdir(dir_path):
-            # Check if it has a transcript
-            if os.path.exists(os.path.join(dir_path, "transcript.json")):
-                # Check current progress status
-                prog = get_progress(d)
-                
-                # If progress is complete, or not found (app restarted), it's ready.
-                # If it's processing and >84%, it's transcribing/translating but readable.
-                status = "ready"
-                if prog["status"] == "processing" and prog["progress"] >= 85:
-                    status = "translating"
-                elif prog["status"] == "processing" and prog["progress"] < 85:
-                    # Still early, shouldn't really be here yet but handle gracefully
-                    continue
-                    
-                projects.append({
-                    "id": d,
-                    "name": d.replace("_", " "),
-                    "status": status
-                })
+    for project in get_project_catalog(STAGING_DIR).projects():
+        # Only projects with a transcript can be opened
+        if "transcript" not in project["files"]:
+            continue
+        # Check current progress status
+        prog = get_progress(project["id"])
+
+        # If progress is complete, or not found (app restarted), it's ready.
+        # If it's processing and the partial transcript is readable, it's still
+        # transcribing/translating but can be opened.
+        status = "ready"
+        if prog["status"] == "processing" and (prog.get("readable") or prog["progress"] >= 85):
+            status = "translating"
+        elif prog["status"] == "processing":
+            # Still early, shouldn't really be here yet but handle gracefully
+            continue
+
+        projects.append({
+            "id": project["id"],
+            "name": project["name"],
+            "status": status,
+            "duration": project["duration"],
+            "chapters": project["chapters"],
+            "complete": project["complete"],
+            "sizes": project["sizes"]
+        })
     return projects
 
-from progress_store import update_progress, get_progress
+from progress_store import get_progress, get_all_progress, subscribe, unsubscribe
+
+# Seconds between keep-alive comments on an idle progress stream
+PROGRESS_HEARTBEAT_SECONDS = 15
 
 @router.get("/progress")
 async def check_progress(project_id: str):
@@ -70,90 +104,269 @@ async def check_progress(project_id: str):
     """
     return get_progress(project_id)
 
+@router.get("/progress/stream")
+async def stream_progress(request: Request, project_id: str | None = None):
+    """
+    Server-Sent Events stream of progress updates for one project, or for every project when
+    project_id is omitted. Each `progress` event carries the project_id and the same state as
+    /progress, including per-stage throughput and the ETA. The current state is sent on connect.
+    """
+    subscription = subscribe(project_id)
+
+    def event(pid: str, state: dict) -> str:
+        return f"event: progress\ndata: {json.dumps({'project_id': pid, **state})}\n\n"
+
+    async def events():
+        try:
+            current = {project_id: get_progress(project_id)} if project_id else get_all_progress()
+            for pid, state in current.items():
+                yield event(pid, state)
+            while not await request.is_disconnected():
+                updates = await subscription.next(timeout=PROGRESS_HEARTBEAT_SECONDS)
+                if not updates:
+                    yield ": keep-alive\n\n"
+                for pid, state in updates.items():
+                    yield event(pid, state)
+        finally:
+            unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.post("/upload")
-async def upload_audio(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def upload_audio(file: UploadFile = File(...), priority: int = 0):
     """
-    Upload an audio file and start processing in the background.
+    Upload an audio file and queue it for processing.
+    Jobs with a higher `priority` are processed first.
     """
-    if not file.filename.lower().endswith(('.mp3', '.m4b')):
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Only .mp3 and .m4b files are supported")
 
+    # Hash while writing so the pipeline can look up already-processed stages by content
     temp_path = os.path.join(TEMP_DIR, file.filename)
+    hasher = hashlib.sha256()
     with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+        for block in iter(lambda: file.file.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+            buffer.write(block)
 
     # Determine project ID earlier to start tracking immediately
     base_name = os.path.splitext(file.filename)[0]
 
-    # Initialize progress store
-    update_progress(base_name, "processing", 0, "Uploaded. Waiting in queue...")
-
-    # Start processing in background
-    def run_processing():
-        try:
-            # We will add a progress_callback parameter to process_audio_file soon
-            from progress_store import update_progress
-            def callback(progress: float, message: str):
-                update_progress(base_name, "processing", progress, message)
-            
-            process_audio_file(temp_path, STAGING_DIR, progress_callback=callback)
-            update_progress(base_name, "done", 100, "Processing complete")
-        except Exception as e:
-            update_progress(base_name, "error", 0, str(e))
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-
-    background_tasks.add_task(run_processing)
+    # Queue the job; the scheduler publishes its queue position to the progress store
+    scheduler.enqueue(base_name, temp_path, priority=priority, source_hash=hasher.hexdigest())
     
     return {
-        "message": "Upload successful. Processing started.",
+        "message": "Upload successful. Processing queued.",
         "filename": file.filename,
         "project_id": base_name
     }
 
+def _upload_headers(info: dict) -> dict:
+    return {"Upload-Offset": str(info["offset"]), "Upload-Length": str(info["length"]), "Cache-Control": "no-store"}
+
+@router.post("/uploads", status_code=201)
+async def create_upload(filename: str, length: int, response: Response, priority: int = 0):
+    """
+    Start a resumable upload of `length` bytes. Send the data with PATCH /uploads/{upload_id}
+    (in as many pieces as needed), then POST /uploads/{upload_id}/finalize to queue processing.
+    """
+    filename = os.path.basename(filename)
+    if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Only .mp3 and .m4b files are supported")
+    if length <= 0:
+        raise HTTPException(status_code=400, detail="Upload length must be positive")
+
+    info = await uploads.create(filename, length, priority)
+    response.headers.update(_upload_headers(info))
+    response.headers["Location"] = f"/api/uploads/{info['upload_id']}"
+    return info
+
+@router.head("/uploads/{upload_id}")
+async def upload_offset(upload_id: str):
+    """
+    Current offset of a resumable upload (Upload-Offset header), to resume after a dropped connection.
+    """
+    info = uploads.get(upload_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return Response(status_code=200, headers=_upload_headers(info))
+
+@router.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    """
+    Metadata and current offset of a resumable upload.
+    """
+    info = uploads.get(upload_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return info
+
+@router.patch("/uploads/{upload_id}")
+async def append_upload(upload_id: str, request: Request):
+    """
+    Append the request body to an upload. The Upload-Offset header must equal the upload's current
+    offset (409 otherwise). The body is written to disk and hashed as it streams in; bytes received
+    before a dropped connection are kept.
+    """
+    if request.headers.get("content-type") != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type must be application/offset+octet-stream")
+    try:
+        offset = int(request.headers["upload-offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Missing or invalid Upload-Offset header")
+
+    try:
+        new_offset = await uploads.append(upload_id, offset, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadOffsetMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ClientDisconnect:
+        # The bytes that did arrive are kept; the client resumes from HEAD's Upload-Offset
+        return Response(status_code=400)
+    return Response(status_code=204, headers={"Upload-Offset": str(new_offset)})
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str):
+    """
+    Complete an upload and queue it for processing, like /upload. The file is moved into place
+    rather than copied, and its hash was computed while it arrived.
+    """
+    info = uploads.get(upload_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    try:
+        input_path, digest, info = await uploads.finalize(upload_id)
+    except KeyError:
+        # Finalized (or aborted) by a concurrent request
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadOffsetMismatch as e:
+        raise HTTPException(status_code=409, detail=f"Upload is incomplete ({e.offset} of {info['length']} bytes)",
+                            headers={"Upload-Offset": str(e.offset)})
+
+    base_name = os.path.splitext(info["filename"])[0]
+    scheduler.enqueue(base_name, input_path, priority=info["priority"], source_hash=digest)
+    return {
+        "message": "Upload successful. Processing queued.",
+        "filename": info["filename"],
+        "project_id": base_name
+    }
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def abort_upload(upload_id: str):
+    """
+    Abandon a resumable upload and delete the bytes received so far.
+    """
+    try:
+        if not await uploads.abort(upload_id):
+            raise KeyError(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return Response(status_code=204)
+
+@router.get("/jobs")
+async def list_jobs():
+    """
+    List queued and running processing jobs in the order they will be processed.
+    """
+    return scheduler.list_jobs()
+
+@router.post("/cancel")
+async def cancel_job(project_id: str):
+    """
+    Cancel the queued or running processing job for a project.
+    """
+    if not scheduler.cancel(project_id):
+        raise HTTPException(status_code=404, detail="No active job for this project")
+    return {"project_id": project_id, "cancelled": True}
+
+@router.post("/playback/position")
+async def report_playback_position(project_id: str, t: float):
+    """
+    Report where the listener is in a book (`t` in seconds). If the book is still being processed,
+    the chunk covering that position and the few after it are transcribed and translated next.
+    """
+    if t < 0:
+        raise HTTPException(status_code=400, detail="Time must not be negative")
+    # Finished books have nothing to reorder
+    active = get_progress(project_id)["status"] in ("queued", "processing")
+    if active:
+        set_hot_position(project_id, t)
+    return {"project_id": project_id, "position": t, "prioritized": active}
+
 @router.get("/transcript")
-async def serve_latest_transcript(project_id: str | None = None):
+async def serve_latest_transcript(project_id: str | None = None, start: float | None = None, end: float | None = None,
+                                  offset: int | None = None, limit: int | None = None):
     """
     Serve transcript JSON data. If project_id is provided, serve that specific one.
     Otherwise serve the latest.
+    With `start`/`end` (seconds) or `offset`/`limit` (segment indices), only that window of segments
+    is returned, read from the compact transcript store.
     """
-    if project_id:
-        target_dir = os.path.join(STAGING_DIR, project_id)
-    else:
-        target_dir = get_latest_project_dir()
-
-    if not target_dir or not os.path.exists(target_dir):
-        raise HTTPException(status_code=404, detail="Project not found")
-        
-    file_path = os.path.join(target_dir, "transcript.json")
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Transcript not found")
-    
+    file_path = get_project_file(project_id, "transcript", "Transcript not found")
+    if any(param is not None for param in (start, end, offset, limit)):
+        return get_transcript_window(file_path, start=start, end=end, offset=offset, limit=limit)
     return get_transcript_data(file_path)
 
-@router.get("/media")
+@router.get("/transcript/seek")
+async def seek_transcript_endpoint(t: float, project_id: str | None = None):
+    """
+    Find the segment and word being spoken at time `t` (seconds), plus the neighbouring words and
+    segment start times. The lookup is a binary search, so it costs the same for any book length.
+    """
+    file_path = get_project_file(project_id, "transcript", "Transcript not found")
+    return seek_transcript(file_path, t)
+
+@router.get("/chapters")
+async def list_chapters(project_id: str | None = None):
+    """
+    List a book's chapters (from the audio file's chapter markers) with their time span, the segments
+    they cover and whether they are transcribed and translated yet. A book without chapter markers is
+    listed as a single chapter.
+    """
+    project = get_project(project_id)
+    file_path = get_project_file(project["id"], "transcript", "Transcript not found")
+    return {
+        "project_id": project["id"],
+        "duration": project["duration"],
+        "chapters": get_chapters(file_path, project["chapters"], project["name"], project["duration"], project["complete"])
+    }
+
+@router.get("/chapters/{index}/transcript")
+async def serve_chapter_transcript(index: int, project_id: str | None = None, offset: int = 0, limit: int | None = None):
+    """
+    Serve the transcript of one chapter, paged with `offset`/`limit` (segment indices within the chapter).
+    """
+    project = get_project(project_id)
+    file_path = get_project_file(project["id"], "transcript", "Transcript not found")
+    return get_chapter_transcript(file_path, project["chapters"], index, project["name"], project["duration"],
+                                  offset=offset, limit=limit)
+
+@router.get("/search")
+async def search_transcripts(q: str, project_id: str | None = None, field: str | None = None,
+                             limit: int = DEFAULT_PAGE_SIZE, offset: int = 0):
+    """
+    Full-text search over the Spanish text and English translations of every project.
+    Returns ranked segment hits (project, segment index, timestamps, highlighted snippets) one page
+    at a time. `field` restricts the search to "text" or "translation".
+    """
+    try:
+        return get_search_index(STAGING_DIR).search(q, project_id=project_id, field=field, limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.api_route("/media", methods=["GET", "HEAD"])
 async def serve_media(request: Request, project_id: str | None = None):
     """
     Serve the media file. If project_id is provided, serve that specific one.
     Otherwise serve the latest.
+    Supports byte ranges (including multiple), ETag/Last-Modified validation and If-Range.
     """
-    if project_id:
-        target_dir = os.path.join(STAGING_DIR, project_id)
-    else:
-        target_dir = get_latest_project_dir()
-
-    if not target_dir or not os.path.exists(target_dir):
-        raise HTTPException(status_code=404, detail="Project not found")
-        
-    # Look for the original audio file
-    audio_files = glob.glob(os.path.join(target_dir, "original_audio.*"))
-    if not audio_files:
-        raise HTTPException(status_code=404, detail="Media not found")
-        
-    file_path = audio_files[0]
-    range_header = request.headers.get("range")
-    return await stream_media_file(file_path, range_header)
+    file_path = get_project_file(project_id, "audio", "Media not found")
+    return await stream_media_file(file_path, request.headers)
 
 from pydantic import BaseModel
 
@@ -172,3 +385,27 @@ async def translate_text_endpoint(request: TranslateRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/translate/cache")
+async def translation_cache_stats():
+    """
+    Hit/miss counters and sizes of the translation cache.
+    """
+    from translation_service import get_translation_cache
+    return get_translation_cache().stats()
+
+@router.get("/models")
+async def model_stats():
+    """
+    Load state, estimated memory use and load/unload timings of the resident ML models.
+    """
+    return get_model_registry().stats()
+
+@router.get("/metrics")
+async def metrics():
+    """
+    Pipeline and API metrics in the Prometheus text format: timings of ffprobe, chunking, Whisper chunks,
+    translation batches, model loads, stage waits and HTTP handlers, plus counters of segments, words,
+    cache lookups and media bytes sent.
+    """
+    return Response(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
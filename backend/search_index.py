@@ -0,0 +1,194 @@
+import os
+import re
+import sys
+import sqlite3
+import logging
+import threading
+
+# Add the project root to sys.path so we can import modules from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_store import TranscriptStore, transcript_store_path, is_current_store, convert_transcript
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+SEARCH_FIELDS = ("text", "translation")
+
+def build_match_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 MATCH expression: every word must appear, the last one may be a
+    prefix (so results show up while typing). FTS5 operators in user input are treated as text.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+class SearchIndex:
+    """
+    Full-text index over the segments of every project, stored in SQLite FTS5.
+    Spanish text and English translations are indexed as separate columns, accents folded.
+    A project is re-indexed as a whole whenever its transcript changes, keyed by the transcript's mtime.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5(
+                    text, translation,
+                    project_id UNINDEXED, segment_index UNINDEXED, start UNINDEXED, end UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS indexed_projects (
+                    project_id TEXT PRIMARY KEY,
+                    transcript_mtime REAL NOT NULL,
+                    segments INTEGER NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def is_current(self, project_id: str, transcript_mtime: float) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT transcript_mtime FROM indexed_projects WHERE project_id = ?", (project_id,)
+            ).fetchone()
+        return row is not None and row["transcript_mtime"] == transcript_mtime
+
+    def index_project(self, project_id: str, segments, transcript_mtime: float) -> int:
+        """Replaces a project's entries with `segments` (any iterable of transcript segment dicts)."""
+        rows = (
+            (segment.get("text", ""), segment.get("translation") or "", project_id, idx,
+             segment.get("start", 0.0), segment.get("end", 0.0))
+            for idx, segment in enumerate(segments)
+        )
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM segments WHERE project_id = ?", (project_id,))
+            cursor = conn.executemany(
+                "INSERT INTO segments (text, translation, project_id, segment_index, start, end) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            count = cursor.rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_projects (project_id, transcript_mtime, segments) VALUES (?, ?, ?)",
+                (project_id, transcript_mtime, count)
+            )
+        logger.info(f"Indexed {count} segments of {project_id} for search")
+        return count
+
+    def remove_project(self, project_id: str):
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM segments WHERE project_id = ?", (project_id,))
+            conn.execute("DELETE FROM indexed_projects WHERE project_id = ?", (project_id,))
+
+    def indexed_projects(self) -> set:
+        with self._connect() as conn:
+            return {row["project_id"] for row in conn.execute("SELECT project_id FROM indexed_projects")}
+
+    def search(self, query: str, project_id: str | None = None, field: str | None = None,
+               limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> dict:
+        """
+        Ranked (BM25) segment hits for `query`, optionally within one project and/or one field.
+        Returns the total hit count and one page of hits with highlighted snippets.
+        """
+        match = build_match_query(query)
+        if not match:
+            return {"query": query, "total": 0, "offset": offset, "hits": []}
+        if field:
+            if field not in SEARCH_FIELDS:
+                raise ValueError(f"field must be one of {', '.join(SEARCH_FIELDS)}")
+            match = f"{field} : ({match})"
+
+        where = "segments MATCH ?"
+        params = [match]
+        if project_id:
+            where += " AND project_id = ?"
+            params.append(project_id)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM segments WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT project_id, segment_index, start, end, text, translation, "
+                f"snippet(segments, 0, '<mark>', '</mark>', '…', 16) AS text_snippet, "
+                f"snippet(segments, 1, '<mark>', '</mark>', '…', 16) AS translation_snippet, "
+                f"bm25(segments) AS score "
+                f"FROM segments WHERE {where} ORDER BY score LIMIT ? OFFSET ?",
+                params + [limit, max(0, offset)]
+            ).fetchall()
+
+        return {
+            "query": query,
+            "total": total,
+            "offset": offset,
+            "hits": [
+                {
+                    "project_id": row["project_id"],
+                    "segment_index": row["segment_index"],
+                    "start": row["start"],
+                    "end": row["end"],
+                    "text": row["text"],
+                    "translation": row["translation"] or None,
+                    "text_snippet": row["text_snippet"],
+                    "translation_snippet": row["translation_snippet"] or None,
+                    # bm25() is lower-is-better; expose it as higher-is-better
+                    "score": -row["score"]
+                }
+                for row in rows
+            ]
+        }
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_search_index(staging_dir: str) -> SearchIndex:
+    """The shared index of a staging directory (stored as <staging_dir>/search.db)."""
+    db_path = os.path.join(os.path.abspath(staging_dir), "search.db")
+    with _indexes_lock:
+        if db_path not in _indexes:
+            _indexes[db_path] = SearchIndex(db_path)
+        return _indexes[db_path]
+
+def index_transcript(staging_dir: str, project_id: str, transcript_path: str):
+    """(Re)indexes a project's transcript unless the index already has this version of it."""
+    index = get_search_index(staging_dir)
+    mtime = os.path.getmtime(transcript_path)
+    if index.is_current(project_id, mtime):
+        return
+    # Read through the compact store so the whole JSON never has to be parsed into memory
+    store_path = transcript_store_path(transcript_path)
+    if not is_current_store(store_path):
+        convert_transcript(transcript_path)
+    store = TranscriptStore(store_path)
+    index.index_project(project_id, (store.segment(idx) for idx in range(len(store))), mtime)
+
+def sync_search_index(staging_dir: str):
+    """Indexes projects whose transcripts are new or changed and drops projects that were deleted."""
+    if not os.path.isdir(staging_dir):
+        return
+    index = get_search_index(staging_dir)
+    present = set()
+    for project_id in os.listdir(staging_dir):
+        transcript_path = os.path.join(staging_dir, project_id, "transcript.json")
+        if not os.path.exists(transcript_path):
+            continue
+        present.add(project_id)
+        try:
+            index_transcript(staging_dir, project_id, transcript_path)
+        except Exception as e:
+            logger.warning(f"Could not index {project_id} for search: {e}")
+    for project_id in index.indexed_projects() - present:
+        index.remove_project(project_id)
@@ -1,83 +1,275 @@
 import os
-import json
+import sys
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
 from fastapi import Request, Response, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse
+
+# Add the project root to sys.path so we can import modules from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_store import TranscriptStore, transcript_store_path, convert_transcript, is_current_store
+from telemetry import counter
+
+logger = logging.getLogger(__name__)
+
+# Max segments returned by one windowed transcript request
+MAX_WINDOW_SEGMENTS = 500
+# Number of memory-mapped transcript stores kept open
+OPEN_STORES = 8
+
+MEDIA_BYTES_SENT = counter("media_bytes_sent_total", "Media bytes sent to players, by how they were sent.", labels=("mode",))
+
+_stores = OrderedDict()
+_stores_lock = threading.Lock()
 
 def get_transcript_data(file_path: str):
     """
-    Reads and returns the transcript JSON data.
+    Returns the whole transcript JSON file. The file is sent as-is rather than parsed and
+    re-serialized; use get_transcript_window for long books.
     """
+    return FileResponse(file_path, media_type="application/json")
+
+def open_transcript_store(file_path: str) -> TranscriptStore:
+    """
+    Returns the memory-mapped compact store for a transcript.json, building it first for
+    transcripts written before the store (or its current version) existed. Open stores are reused
+    until the file is replaced.
+    """
+    store_path = transcript_store_path(file_path)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        if not is_current_store(store_path):
+            logger.info(f"Building compact transcript store for {file_path}")
+            convert_transcript(file_path)
+        stat = os.stat(store_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with _stores_lock:
+            cached = _stores.get(store_path)
+            if cached and cached[0] == version:
+                _stores.move_to_end(store_path)
+                return cached[1]
+            # Stores that are replaced are simply dropped; requests still using them keep a valid mapping
+            store = TranscriptStore(store_path)
+            _stores[store_path] = (version, store)
+            while len(_stores) > OPEN_STORES:
+                _stores.popitem(last=False)
+            return store
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading transcript: {str(e)}")
 
-async def stream_media_file(file_path: str, range_header: str | None) -> Response:
+def get_transcript_window(file_path: str, start: float | None = None, end: float | None = None,
+                          offset: int | None = None, limit: int | None = None) -> dict:
+    """
+    Returns part of a transcript: the segments overlapping the time window [start, end) in seconds,
+    or `limit` segments from segment index `offset`. At most MAX_WINDOW_SEGMENTS are returned.
+    """
+    store = open_transcript_store(file_path)
+    if start is not None or end is not None:
+        first, stop = store.segment_range(start or 0.0, end if end is not None else float("inf"))
+    else:
+        first = offset or 0
+        stop = first + (limit if limit is not None else MAX_WINDOW_SEGMENTS)
+    first = max(0, first)
+    stop = min(stop, first + MAX_WINDOW_SEGMENTS, len(store))
+
+    return {
+        "total_segments": len(store),
+        "duration": store.duration,
+        "offset": first,
+        "segments": store.segments(first, stop)
+    }
+
+def _book_chapters(chapters: list, title: str, duration: float) -> list:
+    """A book's chapters, or the whole book as a single chapter when it has none."""
+    return chapters or [{"index": 0, "title": title, "start": 0.0, "end": duration}]
+
+def get_chapters(file_path: str, chapters: list, title: str, duration: float | None, complete: bool) -> list:
+    """
+    Lists a book's chapters with the index range of their segments in the transcript and how far
+    along they are, so a reader can open one chapter (get_chapter_transcript) without loading the rest.
+    A chapter counts as transcribed once the transcript reaches past it with no untranscribed gap
+    inside it (or the whole book is done).
+    """
+    store = open_transcript_store(file_path)
+    listed = []
+    for chapter in _book_chapters(chapters, title, duration or store.duration):
+        first, stop = store.starting_range(chapter["start"], chapter["end"])
+        with_text, translated = store.translation_counts(first, stop)
+        gaps = store.pending_count(*store.segment_range(chapter["start"], chapter["end"]))
+        transcribed = complete or (stop < len(store) and not gaps)
+        listed.append({
+            **chapter,
+            "first_segment": first,
+            "segment_count": stop - first,
+            "transcribed": transcribed,
+            "translated": transcribed and translated >= with_text
+        })
+    return listed
+
+def get_chapter_transcript(file_path: str, chapters: list, index: int, title: str, duration: float | None,
+                           offset: int = 0, limit: int | None = None) -> dict:
+    """
+    Returns the segments of one chapter, at most MAX_WINDOW_SEGMENTS at a time from `offset` within
+    the chapter. The chapter's range is found by binary search, so no other chapter is read.
+    """
+    store = open_transcript_store(file_path)
+    chapters = _book_chapters(chapters, title, duration or store.duration)
+    if not 0 <= index < len(chapters):
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    chapter = chapters[index]
+    first, stop = store.starting_range(chapter["start"], chapter["end"])
+    start = first + max(0, offset)
+    end = min(stop, start + min(limit if limit is not None else MAX_WINDOW_SEGMENTS, MAX_WINDOW_SEGMENTS))
+
+    return {
+        "chapter": chapter,
+        "chapter_segments": stop - first,
+        "offset": start - first,
+        "segments": store.segments(start, end)
+    }
+
+# Larger multi-range requests are answered with the whole file instead
+MAX_RANGES = 16
+
+def media_etag(stat_result: os.stat_result) -> str:
+    """Strong validator for a media file: it changes whenever the file is replaced or rewritten."""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+def _not_modified(headers, etag: str, mtime: float) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _if_range_matches(if_range: str, etag: str, last_modified: str) -> bool:
+    """If-Range needs a strong match: the exact ETag (never a weak one) or the exact Last-Modified date."""
+    if_range = if_range.strip()
+    if if_range.startswith("W/"):
+        return False
+    return if_range == etag or if_range == last_modified
+
+def parse_range_header(range_header: str, file_size: int) -> list:
     """
-    Handles streaming of physical media files with rigorous Range request support (Status 206).
-    This allows frontend audio players to correctly scrub through the file.
+    Parses a `bytes=` Range header into sorted, merged [start, end) ranges.
+    Returns [] when the header should be ignored (too many ranges); raises 400 or 416.
     """
-    file_size = os.path.getsize(file_path)
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        raise HTTPException(status_code=400, detail="Invalid Range header")
 
-    if not range_header:
-        # If no Range header, serve the whole file
-        def file_iterator():
-            with open(file_path, "rb") as f:
-                yield from f
-        
-        content_type = _get_content_type(file_path)
-        return StreamingResponse(file_iterator(), media_type=content_type)
-    
-    # Process Range request
-    # Expected format: "bytes=0-1024" or "bytes=500-"
+    ranges = []
     try:
-        range_str = range_header.replace("bytes=", "").split("-")
-        start = int(range_str[0])
-        
-        # End byte might not be provided
-        end = int(range_str[1]) if len(range_str) > 1 and range_str[1] else file_size - 1
-        
-        # Ensure bounds
-        if start >= file_size or end >= file_size or start > end:
-            raise HTTPException(
-                status_code=416, 
-                detail="Requested Range Not Satisfiable",
-                headers={"Content-Range": f"bytes */{file_size}"}
-            )
-            
+        for part in spec.split(","):
+            first, _, last = part.strip().partition("-")
+            if not _:
+                raise ValueError(part)
+            if not first:
+                # Suffix range: the last N bytes
+                length = int(last)
+                if length > 0:
+                    ranges.append((max(0, file_size - length), file_size))
+                continue
+            start = int(first)
+            end = min(int(last) + 1, file_size) if last else file_size
+            if end <= start and last:
+                raise ValueError(part)
+            if start < file_size:
+                ranges.append((start, end))
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid Range header")
 
-    chunk_size = end - start + 1
-
-    def chunk_generator(start_byte: int, end_byte: int):
-        with open(file_path, "rb") as f:
-            f.seek(start_byte)
-            # Yield in smaller pieces, e.g. 1MB at a time
-            bytes_to_read = end_byte - start_byte + 1
-            buffer_size = 1024 * 1024
-            while bytes_to_read > 0:
-                read_size = min(buffer_size, bytes_to_read)
-                data = f.read(read_size)
-                if not data:
-                    break
-                yield data
-                bytes_to_read -= len(data)
+    if not ranges:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested Range Not Satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    if len(ranges) > MAX_RANGES:
+        return []
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
 
+class MediaFileResponse(FileResponse):
+    """
+    Starlette's FileResponse, sending the byte ranges stream_media_file has already parsed and
+    validated. The request's Range is replaced by those ranges (and If-Range dropped) before
+    FileResponse reads it, so the two never disagree about what is sent. Whole files are handed to
+    the server with the ASGI pathsend extension where it is offered; otherwise, as under uvicorn,
+    FileResponse reads the file in a worker thread.
+    """
+
+    def __init__(self, path: str, ranges: list, headers: dict, stat_result: os.stat_result, media_type: str):
+        """`ranges` are [start, end) byte ranges; empty sends the whole file."""
+        super().__init__(path, headers=headers, media_type=media_type, stat_result=stat_result)
+        self.ranges = ranges
+
+    async def __call__(self, scope, receive, send):
+        request_headers = [(name, value) for name, value in scope["headers"] if name not in (b"range", b"if-range")]
+        if self.ranges:
+            spec = ",".join(f"{start}-{end - 1}" for start, end in self.ranges)
+            request_headers.append((b"range", f"bytes={spec}".encode("latin-1")))
+
+        async def counting_send(message):
+            if message["type"] == "http.response.pathsend":
+                MEDIA_BYTES_SENT.inc(self.stat_result.st_size, mode="pathsend")
+            elif message["type"] == "http.response.body":
+                MEDIA_BYTES_SENT.inc(len(message.get("body", b"")), mode="read")
+            await send(message)
+
+        await super().__call__({**scope, "headers": request_headers}, receive, counting_send)
+
+async def stream_media_file(file_path: str, request_headers) -> Response:
+    """
+    Serves a media file with strong ETags and Last-Modified, answering conditional requests
+    (If-None-Match / If-Modified-Since) with 304 and honouring single and multiple byte ranges,
+    guarded by If-Range. This allows frontend audio players to correctly scrub through the file.
+    """
+    stat_result = await asyncio.to_thread(os.stat, file_path)
+    file_size = stat_result.st_size
+    etag = media_etag(stat_result)
     headers = {
-        "Content-Range": f"bytes {start}-{end}/{file_size}",
         "Accept-Ranges": "bytes",
-        "Content-Length": str(chunk_size),
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        # Cached copies are revalidated, which costs a 304 rather than the file
+        "Cache-Control": "no-cache"
     }
 
-    content_type = _get_content_type(file_path)
-    return StreamingResponse(
-        chunk_generator(start, end),
-        status_code=206,
-        media_type=content_type,
-        headers=headers
-    )
+    if _not_modified(request_headers, etag, stat_result.st_mtime):
+        response = Response(status_code=304, headers=headers)
+        # A 304 has no body; don't advertise one
+        del response.headers["content-length"]
+        return response
+
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and if_range and not _if_range_matches(if_range, etag, headers["Last-Modified"]):
+        # The client's partial copy is stale; send the whole current file
+        range_header = None
+
+    ranges = parse_range_header(range_header, file_size) if range_header else []
+    return MediaFileResponse(file_path, ranges, headers, stat_result, _get_content_type(file_path))
 
 def _get_content_type(file_path: str) -> str:
     """Utility to determine appropriate MIME type."""
@@ -86,3 +278,9 @@ def _get_content_type(file_path: str) -> str:
     elif file_path.endswith(".m4b") or file_path.endswith(".m4a") or file_path.endswith(".mp4"):
         return "audio/mp4"
     return "application/octet-stream"
+
+def seek_transcript(file_path: str, time: float) -> dict:
+    """Returns the segment and word active at `time` (seconds), with their neighbours."""
+    if time < 0:
+        raise HTTPException(status_code=400, detail="Time must not be negative")
+    return open_transcript_store(file_path).seek(time)
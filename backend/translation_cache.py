@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 20000
+
+def normalize_text(text: str) -> str:
+    """Cache key normalization: Unicode NFC and collapsed whitespace. Case is kept, since it changes translations."""
+    return unicodedata.normalize("NFC", " ".join(text.split()))
+
+class TranslationCache:
+    """
+    Two-tier memo of translations keyed by (model name, normalized source text).
+    Lookups hit a bounded in-memory LRU first, then a SQLite file that persists across restarts
+    and is shared by the on-demand endpoint and batch transcript translation.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max(1, max_entries)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                model TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (model, source)
+            )
+        """)
+        self._conn.commit()
+
+    def _remember(self, key: tuple, translation: str):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: list) -> dict:
+        """Returns {text: translation} for every text that is cached. Texts not in the result are misses."""
+        found = {}
+        missing = {}
+        with self._lock:
+            for text in texts:
+                key = (model, normalize_text(text))
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key[1], []).append(text)
+
+            if missing:
+                sources = list(missing)
+                # Stay well under SQLite's bound-parameter limit
+                for start in range(0, len(sources), 500):
+                    batch = sources[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT source, translation FROM translations WHERE model = ? AND source IN ({placeholders})",
+                        [model] + batch
+                    ).fetchall()
+                    for source, translation in rows:
+                        self._remember((model, source), translation)
+                        for text in missing.pop(source):
+                            found[text] = translation
+                            self.disk_hits += 1
+
+            self.misses += sum(len(texts_for_key) for texts_for_key in missing.values())
+        return found
+
+    def get(self, model: str, text: str) -> str | None:
+        return self.get_many(model, [text]).get(text)
+
+    def put_many(self, model: str, pairs: list):
+        """Stores (source text, translation) pairs in both tiers."""
+        rows = [(model, normalize_text(text), translation) for text, translation in pairs]
+        if not rows:
+            return
+        with self._lock:
+            for model_name, source, translation in rows:
+                self._remember((model_name, source), translation)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (model, source, translation) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def put(self, model: str, text: str, translation: str):
+        self.put_many(model, [(text, translation)])
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            persisted = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_max_entries": self.max_entries,
+                "persisted_entries": persisted
+            }
@@ -2,75 +2,501 @@ import json
 import logging
 import asyncio
 import os
-from concurrent.futures import ThreadPoolExecutor
-import torch
-from transformers import MarianMTModel, MarianTokenizer
+import sys
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+
+# Add the project root to sys.path so we can import modules from the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_config import get_config_section, import_plugin
+from translation_cache import TranslationCache, DEFAULT_MAX_ENTRIES
+from transcript_store import write_transcript_store, transcript_store_path
+from search_index import index_transcript
+from model_registry import get_model_registry, estimated_memory_mb
+from telemetry import histogram, counter, register_collector
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL_NAME = "Helsinki-NLP/opus-mt-es-en"
+# Upper bound on padded source tokens (longest sentence * batch size) per generate call
+DEFAULT_MAX_BATCH_TOKENS = 2048
+DEFAULT_MAX_BATCH_SIZE = 32
+# On-demand requests arriving within this window are translated together as one batch
+DEFAULT_ON_DEMAND_MAX_WAIT_MS = 5
+DEFAULT_ON_DEMAND_MAX_BATCH_SIZE = 16
+TRANSLATION_FAILED = "*** Translation failed ***"
+# Rough resident size of a MarianMT model, used for the model registry's memory budget
+DEFAULT_MODEL_MEMORY_MB = 600
+# CTranslate2 engine: weights are quantized once at conversion, and an int8 opus-mt model is far smaller
+DEFAULT_CT2_COMPUTE_TYPE = "int8"
+DEFAULT_CT2_MEMORY_MB = 150
+DEFAULT_MAX_DECODING_LENGTH = 512
+TRANSLATION_BATCH_SECONDS = histogram("translation_batch_seconds", "Time of one padded translation (generate) call.",
+                                      labels=("engine", "priority"))
+TRANSLATION_WAIT_SECONDS = histogram("translation_wait_seconds", "Time a translation batch waited for the model.",
+                                     labels=("priority",))
+SENTENCES_TRANSLATED = counter("sentences_translated_total", "Sentences sent to the translation model.", labels=("priority",))
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "staging", "translation_cache.db")
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "staging", "models")
+
 # Model config
+def get_translation_config() -> dict:
+    return get_config_section("translation")
+
 def get_translation_model():
-    model_name = "Helsinki-NLP/opus-mt-es-en"
-    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
-    if os.path.exists(config_path):
+    return get_translation_config().get("model", DEFAULT_MODEL_NAME)
+
+def plan_batches(lengths: dict, max_tokens: int, max_batch_size: int) -> list:
+    """
+    Groups input indices into mini-batches by token length.
+    Indices are sorted by length so each batch pads to a similar size, and a batch is closed
+    once adding another sentence would push (longest length * batch size) over `max_tokens`.
+    """
+    batches = []
+    current = []
+    current_max = 0
+    for idx in sorted(lengths, key=lambda i: lengths[i]):
+        length = max(lengths[idx], 1)
+        longest = max(current_max, length)
+        if current and (longest * (len(current) + 1) > max_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+            longest = length
+        current.append(idx)
+        current_max = longest
+    if current:
+        batches.append(current)
+    return batches
+
+class _PriorityGate:
+    """
+    Serializes access to the model, letting on-demand callers in ahead of background ones.
+    Background batch jobs take the gate per mini-batch, so an on-demand request waits for at most
+    one mini-batch of a running transcript translation.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._busy = False
+        self._waiting_high = 0
+
+    @contextmanager
+    def hold(self, high_priority: bool = False):
+        with self._cond:
+            if high_priority:
+                self._waiting_high += 1
+            while self._busy or (not high_priority and self._waiting_high):
+                self._cond.wait()
+            if high_priority:
+                self._waiting_high -= 1
+            self._busy = True
         try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                model_name = config.get("translation", {}).get("model", model_name)
-        except Exception as e:
-            logger.warning(f"Could not read config.json, defaulting to {model_name}. Error: {e}")
-    return model_name
+            yield
+        finally:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+class MarianEngine:
+    """
+    The default translation engine: MarianMT in PyTorch.
+    Engines load a model (`load`), count source tokens for batch planning (`token_counts`) and
+    translate a padded batch with one sentence per input row (`generate`).
+    torch and transformers are imported on first use, so importing this module stays cheap.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.name = model_name
+        self._device = None
+
+    @property
+    def device(self) -> str:
+        if self._device is None:
+            import torch
+            self._device = "mps" if torch.backends.mps.is_available() else "cpu"
+        return self._device
+
+    def load(self):
+        from transformers import MarianMTModel, MarianTokenizer
+        logger.info(f"Loading local translation model {self.model_name} on {self.device}...")
+        tokenizer = MarianTokenizer.from_pretrained(self.model_name)
+        model = MarianMTModel.from_pretrained(self.model_name).to(self.device)
+        return tokenizer, model
+
+    def unload(self, loaded):
+        if self.device == "mps":
+            import torch
+            torch.mps.empty_cache()
 
-MODEL_NAME = get_translation_model()
+    def token_counts(self, loaded, texts: list) -> list:
+        tokenizer, _ = loaded
+        return [len(ids) for ids in tokenizer(texts, truncation=True)["input_ids"]]
+
+    def generate(self, loaded, texts: list) -> list:
+        import torch
+        tokenizer, model = loaded
+        inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True).to(self.device)
+        with torch.inference_mode():
+            translated = model.generate(**inputs)
+        return tokenizer.batch_decode(translated, skip_special_tokens=True)
+
+_conversion_lock = threading.Lock()
+
+def convert_to_ctranslate2(model_name: str, models_dir: str = MODELS_DIR, quantization: str = DEFAULT_CT2_COMPUTE_TYPE) -> str:
+    """
+    Converts a Hugging Face MarianMT model to a CTranslate2 model quantized to `quantization`, once,
+    and returns its directory under `models_dir`. The tokenizer and generation settings are saved
+    next to it, so later loads need neither PyTorch nor the Hugging Face cache.
+    """
+    output_dir = os.path.join(models_dir, f"{model_name.strip('/').replace('/', '--')}-ct2-{quantization}")
+    with _conversion_lock:
+        if os.path.exists(os.path.join(output_dir, "model.bin")):
+            return output_dir
+
+        from ctranslate2.converters import TransformersConverter
+        from transformers import GenerationConfig, MarianTokenizer
+        logger.info(f"Converting {model_name} to CTranslate2 ({quantization}) in {output_dir}...")
+        tmp_dir = output_dir + ".tmp"
+        TransformersConverter(model_name).convert(tmp_dir, quantization=quantization, force=True)
+        MarianTokenizer.from_pretrained(model_name).save_pretrained(tmp_dir)
+        try:
+            GenerationConfig.from_pretrained(model_name).save_pretrained(tmp_dir)
+        except OSError:
+            pass  # No generation config: greedy decoding
+        os.replace(tmp_dir, output_dir)
+        return output_dir
+
+class CTranslate2Engine:
+    """
+    MarianMT converted to CTranslate2 and quantized (int8 by default), for fast CPU translation with a
+    fraction of PyTorch's memory. The model is converted on first load (see `convert_to_ctranslate2`).
+    Config (`translation`): "compute_type", "device", "inter_threads", "intra_threads" (0 = all cores),
+    "beam_size" (default: the model's own), "models_dir" and "memory_mb".
+    """
+
+    def __init__(self, model_name: str, config: dict):
+        self.model_name = model_name
+        self.compute_type = config.get("compute_type", DEFAULT_CT2_COMPUTE_TYPE)
+        self.name = f"ctranslate2:{model_name}:{self.compute_type}"
+        self.device = config.get("device", "cpu")
+        self.inter_threads = config.get("inter_threads", 1)
+        self.intra_threads = config.get("intra_threads", 0)
+        self.beam_size = config.get("beam_size")
+        self.models_dir = config.get("models_dir", MODELS_DIR)
+        self.memory_mb = config.get("memory_mb", DEFAULT_CT2_MEMORY_MB)
+
+    def load(self):
+        import ctranslate2
+        from transformers import MarianTokenizer
+        model_dir = convert_to_ctranslate2(self.model_name, self.models_dir, self.compute_type)
+        logger.info(f"Loading CTranslate2 translation model {model_dir} ({self.compute_type}) on {self.device}...")
+        translator = ctranslate2.Translator(model_dir, device=self.device, compute_type=self.compute_type,
+                                            inter_threads=self.inter_threads, intra_threads=self.intra_threads)
+        generation = {}
+        generation_path = os.path.join(model_dir, "generation_config.json")
+        if os.path.exists(generation_path):
+            with open(generation_path, "r", encoding="utf-8") as f:
+                generation = json.load(f)
+        options = {
+            # Decode like MarianMT's generate() does by default, so both engines agree
+            "beam_size": self.beam_size or generation.get("num_beams") or 1,
+            "max_decoding_length": generation.get("max_length") or DEFAULT_MAX_DECODING_LENGTH
+        }
+        return MarianTokenizer.from_pretrained(model_dir), translator, options
+
+    def unload(self, loaded):
+        _, translator, _ = loaded
+        translator.unload_model()
+
+    def token_counts(self, loaded, texts: list) -> list:
+        tokenizer, _, _ = loaded
+        return [len(ids) for ids in tokenizer(texts, truncation=True)["input_ids"]]
+
+    def generate(self, loaded, texts: list) -> list:
+        tokenizer, translator, options = loaded
+        sources = [tokenizer.convert_ids_to_tokens(ids) for ids in tokenizer(texts, truncation=True)["input_ids"]]
+        results = translator.translate_batch(sources, max_batch_size=len(sources), **options)
+        return [tokenizer.decode(tokenizer.convert_tokens_to_ids(result.hypotheses[0]), skip_special_tokens=True)
+                for result in results]
+
+def get_translation_engine(config: dict | None = None):
+    """
+    Builds the engine named by `translation.engine`: "marian" (default, PyTorch), "ctranslate2"
+    (quantized CPU inference), or a "module:attribute" plugin path whose attribute is called as
+    `factory(model_name, config)` (e.g. the benchmark stubs).
+    """
+    config = config if config is not None else get_translation_config()
+    engine = config.get("engine", "marian")
+    model_name = config.get("model", DEFAULT_MODEL_NAME)
+    if engine == "marian":
+        return MarianEngine(model_name)
+    if engine == "ctranslate2":
+        return CTranslate2Engine(model_name, config)
+    return import_plugin(engine)(model_name, config)
 
 class LocalTranslator:
-    def __init__(self):
-        self.model = None
-        self.tokenizer = None
-        self.device = "mps" if torch.backends.mps.is_available() else "cpu"
-        self._is_loaded = False
+    """
+    Local translation with a pluggable engine (MarianMT in PyTorch by default, or CTranslate2). The
+    engine's loaded model lives in the shared model registry, which keeps it loaded across requests
+    and unloads it when idle or when memory is needed.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or get_translation_engine()
+        self._gate = _PriorityGate()
+        self.registry_name = f"translation:{self.engine.name}"
+        # Engines that know their footprint (e.g. a quantized model) say so; otherwise use the configured estimate
+        memory_mb = getattr(self.engine, "memory_mb", None) or estimated_memory_mb("translation", DEFAULT_MODEL_MEMORY_MB)
+        get_model_registry().register(self.registry_name, self.engine.load, self.engine.unload, memory_mb=memory_mb)
 
     def load_model(self):
-        if not self._is_loaded:
-            logger.info(f"Loading local translation model {MODEL_NAME} on {self.device}...")
-            self.tokenizer = MarianTokenizer.from_pretrained(MODEL_NAME)
-            self.model = MarianMTModel.from_pretrained(MODEL_NAME).to(self.device)
-            self._is_loaded = True
-            logger.info("Translation model loaded successfully.")
-
-    def translate(self, text: str) -> str:
+        """Loads the model now (if it is not resident yet) instead of on the first translation."""
+        get_model_registry().load(self.registry_name)
+
+    def _generate(self, texts: list, high_priority: bool = False) -> list:
+        """Runs one padded generate call over a list of sentences, one sentence per input row."""
+        priority = "on_demand" if high_priority else "background"
+        with get_model_registry().use(self.registry_name) as loaded:
+            waited = time.perf_counter()
+            with self._gate.hold(high_priority):
+                TRANSLATION_WAIT_SECONDS.observe(time.perf_counter() - waited, priority=priority)
+                with TRANSLATION_BATCH_SECONDS.time(trace_args={"sentences": len(texts)}, engine=self.engine.name,
+                                                    priority=priority):
+                    translations = self.engine.generate(loaded, texts)
+        SENTENCES_TRANSLATED.inc(len(texts), priority=priority)
+        return translations
+
+    def translate(self, text: str, high_priority: bool = False) -> str:
         """
         Translates a single sentence using the local Hugging Face model.
         The user explicitly requested translating one sentence at a time for best results.
         """
         if not text or not text.strip():
             return ""
-            
-        self.load_model()
-        
+
         try:
-            # Tokenize and translate
-            inputs = self.tokenizer(text, return_tensors="pt", padding=True).to(self.device)
-            translated = self.model.generate(**inputs)
-            result = self.tokenizer.batch_decode(translated, skip_special_tokens=True)[0]
-            return result
+            return self._generate([text], high_priority)[0]
         except Exception as e:
             logger.error(f"Translation error for text '{text[:20]}...': {e}")
-            return "*** Translation failed ***"
+            return TRANSLATION_FAILED
+
+    def translate_batch(self, texts: list, max_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+                        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, progress_callback=None,
+                        high_priority: bool = False) -> list:
+        """
+        Translates a list of sentences and returns the results in the same order.
+        Every sentence is still its own input row (see `translate`); sentences of similar token
+        length are just padded together so a single generate call covers a whole mini-batch.
+        `progress_callback(done, total)` is called after each batch.
+        `high_priority` batches (on-demand requests) get the model before background batches.
+        """
+        results = [""] * len(texts)
+        pending = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not pending:
+            return results
+
+        # Hold the model for the whole batch run so it cannot be unloaded between mini-batches
+        with get_model_registry().use(self.registry_name) as loaded:
+            lengths = dict(zip(pending, self.engine.token_counts(loaded, [texts[i] for i in pending])))
+
+            done = 0
+            for batch in plan_batches(lengths, max_tokens, max_batch_size):
+                try:
+                    for idx, translation in zip(batch, self._generate([texts[i] for i in batch], high_priority)):
+                        results[idx] = translation
+                except Exception as e:
+                    # Retry the batch one sentence at a time so a single bad input only fails itself
+                    logger.error(f"Batch translation error ({len(batch)} sentences), retrying individually: {e}")
+                    for idx in batch:
+                        results[idx] = self.translate(texts[idx], high_priority)
+
+                done += len(batch)
+                if progress_callback:
+                    progress_callback(done, len(pending))
+
+        return results
+
+class TranslationBatcher:
+    """
+    Coalesces concurrent on-demand translations. Requests that arrive within `max_wait_ms` of the
+    first one (up to `max_batch_size`) are deduplicated and run as one high-priority padded batch
+    on a dispatcher thread; each caller gets a Future for its own sentence. While a batch runs the
+    next requests queue up and go out together in the following batch, so latency grows with batch
+    size rather than with the number of waiting callers.
+    """
+
+    def __init__(self, translator: LocalTranslator, max_batch_size: int = DEFAULT_ON_DEMAND_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_ON_DEMAND_MAX_WAIT_MS):
+        self.translator = translator
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="translation-batcher", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                # Take whatever queued up during the previous batch without waiting
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                translated = dict(zip(texts, self.translator.translate_batch(
+                    texts, max_batch_size=self.max_batch_size, high_priority=True
+                )))
+            except Exception as e:
+                logger.error(f"On-demand translation batch of {len(texts)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for text, future in batch:
+                future.set_result(translated[text])
+
+# Singleton instances, created on first use so importing this module doesn't build an engine
+_translator = None
+_batcher = None
+_singletons_lock = threading.Lock()
+
+def get_translator() -> LocalTranslator:
+    """Returns the shared translator, creating it (but not loading its model) on first use."""
+    global _translator
+    with _singletons_lock:
+        if _translator is None:
+            _translator = LocalTranslator()
+        return _translator
 
-# Singleton instance
-_translator = LocalTranslator()
-# Use a thread pool to avoid blocking the main event loop
-_executor = ThreadPoolExecutor(max_workers=2) # Keep max workers low for local ML models to prevent memory overload
+def get_batcher() -> TranslationBatcher:
+    """Returns the shared on-demand batcher, creating it on first use."""
+    global _batcher
+    translator = get_translator()
+    with _singletons_lock:
+        if _batcher is None:
+            config = get_translation_config()
+            _batcher = TranslationBatcher(
+                translator,
+                max_batch_size=config.get("on_demand_max_batch_size", DEFAULT_ON_DEMAND_MAX_BATCH_SIZE),
+                max_wait_ms=config.get("on_demand_max_wait_ms", DEFAULT_ON_DEMAND_MAX_WAIT_MS)
+            )
+        return _batcher
+
+def get_translation_key() -> str:
+    """
+    The name translations are cached and content-addressed under: the engine's name, which for the
+    default engine is the model name, so other engines never reuse MarianMT's translations.
+    """
+    return get_translator().engine.name
+
+def warm_up_translation():
+    """Loads the translation model ahead of the first request."""
+    get_translator().load_model()
+
+_cache = None
+
+def get_translation_cache() -> TranslationCache:
+    """Returns the shared translation cache, opening it on first use."""
+    global _cache
+    if _cache is None:
+        max_entries = get_translation_config().get("cache_max_entries", DEFAULT_MAX_ENTRIES)
+        _cache = TranslationCache(CACHE_PATH, max_entries=max_entries)
+        register_collector(_collect_cache_metrics)
+    return _cache
+
+def _collect_cache_metrics() -> list:
+    stats = _cache.stats()
+    return [
+        ("translation_cache_lookups_total", "counter", "Translation cache lookups by result.",
+         [({"result": "memory_hit"}, stats["memory_hits"]), ({"result": "disk_hit"}, stats["disk_hits"]),
+          ({"result": "miss"}, stats["misses"])]),
+        ("translation_cache_entries", "gauge", "Translations held by the cache.",
+         [({"tier": "memory"}, stats["memory_entries"]), ({"tier": "disk"}, stats["persisted_entries"])])
+    ]
+
+def _translate_on_demand(text: str) -> Future:
+    """Resolves a single string from the cache, or queues it for the next on-demand batch."""
+    future = Future()
+    if not text or not text.strip():
+        future.set_result("")
+        return future
+    cache = get_translation_cache()
+    cached = cache.get(get_translation_key(), text)
+    if cached is not None:
+        future.set_result(cached)
+        return future
+
+    def store(done: Future):
+        if done.exception() is None and done.result() != TRANSLATION_FAILED:
+            cache.put(get_translation_key(), text, done.result())
+
+    batched = get_batcher().submit(text)
+    batched.add_done_callback(store)
+    return batched
 
 def translate_text_sync(text: str) -> str:
     """Synchronous translation of a single string."""
-    return _translator.translate(text)
+    return _translate_on_demand(text).result()
 
 async def translate_text_async(text: str) -> str:
-    """Asynchronous translation of a single string."""
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(_executor, translate_text_sync, text)
+    """Asynchronous translation of a single string, batched with other concurrent requests."""
+    return await asyncio.wrap_future(_translate_on_demand(text))
+
+def translate_texts(texts: list, progress_callback=None) -> list:
+    """
+    Batch-translates a list of sentences with the batch sizes from config.json, preserving order.
+    Cached sentences are reused and only the misses (deduplicated) go to the model.
+    `progress_callback(done, total)` is called after each batch.
+    """
+    cache = get_translation_cache()
+    cached = cache.get_many(get_translation_key(), [text for text in texts if text and text.strip()])
+    misses = list(dict.fromkeys(text for text in texts if text and text.strip() and text not in cached))
+    # Repeats of a miss are translated along with its first occurrence, so they count as done up front
+    already_done = len(texts) - len(misses)
+
+    def on_batch_done(done: int, total: int):
+        if progress_callback:
+            progress_callback(already_done + done, len(texts))
+
+    config = get_translation_config()
+    translated = dict(zip(misses, get_translator().translate_batch(
+        misses,
+        max_tokens=config.get("max_batch_tokens", DEFAULT_MAX_BATCH_TOKENS),
+        max_batch_size=config.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE),
+        progress_callback=on_batch_done
+    )))
+    cache.put_many(get_translation_key(), [(text, translation) for text, translation in translated.items()
+                                if translation and translation != TRANSLATION_FAILED])
+    translated.update(cached)
+    return [translated.get(text, "") for text in texts]
 
 def translate_transcript_sync(file_path: str, progress_callback=None):
     """
@@ -85,26 +511,32 @@ def translate_transcript_sync(file_path: str, progress_callback=None):
         if total_segments == 0:
             return
 
-        # Pre-load the model before starting the loop so the time isn't counted against the first progress tick
-        _translator.load_model()
+        # Pre-load the model before starting so the load time isn't counted against the first progress tick
+        get_translator().load_model()
 
-        for idx, segment in enumerate(data):
-            # Only translate if there's text and it hasn't been translated yet
-            if 'text' in segment and 'translation' not in segment:
-                # The model performs best on single sentences, and since our `text`
-                # field correlates to sentences coming out of mlx-whisper segments,
-                # this meets the requirement perfectly.
-                segment['translation'] = translate_text_sync(segment['text'])
-                
+        # Only translate segments that have text and haven't been translated yet.
+        # The model performs best on single sentences, and since our `text` field correlates to
+        # sentences coming out of the whisper segments, each segment is one input row of a batch.
+        pending = [idx for idx, segment in enumerate(data) if 'text' in segment and 'translation' not in segment]
+
+        def on_batch_done(done: int, total: int):
             if progress_callback:
                 # Map segment progress to 85% -> 100% overall progress
-                percent_auth = 85 + ((idx / total_segments) * 15)
-                progress_callback(percent_auth, f"Translating piece {idx + 1}/{total_segments}...")
+                translated_so_far = total_segments - len(pending) + done
+                percent_auth = 85 + ((translated_so_far / total_segments) * 15)
+                progress_callback(percent_auth, f"Translating piece {translated_so_far}/{total_segments}...")
+
+        translations = translate_texts([data[idx]['text'] for idx in pending], progress_callback=on_batch_done)
+        for idx, translation in zip(pending, translations):
+            data[idx]['translation'] = translation
                 
-        # Save back the translated file
+        # Save back the translated file, keep its compact store in step and refresh the search index
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
-            
+        write_transcript_store(transcript_store_path(file_path), data)
+        project_dir = os.path.dirname(os.path.abspath(file_path))
+        index_transcript(os.path.dirname(project_dir), os.path.basename(project_dir), file_path)
+
     except Exception as e:
         logger.error(f"Failed to translate transcript {file_path}: {e}")
         if progress_callback:
@@ -0,0 +1,171 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import secrets
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Uploads not touched for this long are discarded
+UPLOAD_EXPIRY_SECONDS = 24 * 3600
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+class UploadOffsetMismatch(Exception):
+    """A PATCH did not start at the upload's current offset."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+class UploadStore:
+    """
+    Resumable uploads (create, append at an offset, finalize), in the spirit of the tus protocol.
+    Data is appended straight to `<root>/<id>.part` and hashed as it arrives, next to a small JSON
+    sidecar with the upload's metadata, so an upload survives dropped connections and server restarts.
+    The running SHA-256 lives in memory; after a restart it is rebuilt once from the bytes on disk.
+    Finalized uploads move to `<root>/<id>/<filename>`, so two uploads of the same file name never
+    overwrite each other's input; the directory is removed once the job has deleted the file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._hashers = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, upload_id: str) -> tuple:
+        if not _UPLOAD_ID.match(upload_id):
+            raise KeyError(upload_id)
+        base = os.path.join(self.root, upload_id)
+        return base + ".json", base + ".part"
+
+    def _lock_for(self, upload_id: str) -> asyncio.Lock:
+        with self._lock:
+            return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    async def create(self, filename: str, length: int, priority: int = 0) -> dict:
+        await self.expire()
+        upload_id = secrets.token_hex(16)
+        meta_path, data_path = self._paths(upload_id)
+        info = {"upload_id": upload_id, "filename": filename, "length": length, "priority": priority,
+                "created_at": time.time()}
+        open(data_path, "wb").close()
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        self._hashers[upload_id] = (hashlib.sha256(), 0)
+        return {**info, "offset": 0}
+
+    def get(self, upload_id: str) -> dict | None:
+        """The upload's metadata and current offset, or None if it doesn't exist."""
+        try:
+            meta_path, data_path = self._paths(upload_id)
+            with open(meta_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+            return {**info, "offset": os.path.getsize(data_path)}
+        except (KeyError, OSError, ValueError):
+            return None
+
+    def _hasher(self, upload_id: str, data_path: str, offset: int):
+        """The running hash of the first `offset` bytes, rebuilt from disk if it was lost."""
+        hasher, hashed = self._hashers.get(upload_id, (None, -1))
+        if hashed != offset:
+            hasher = hashlib.sha256()
+            with open(data_path, "rb") as f:
+                remaining = offset
+                while remaining:
+                    block = f.read(min(1024 * 1024, remaining))
+                    if not block:
+                        break
+                    hasher.update(block)
+                    remaining -= len(block)
+        return hasher
+
+    async def append(self, upload_id: str, offset: int, chunks) -> int:
+        """
+        Appends the byte chunks of an async iterator at `offset`, which must be the current offset.
+        Whatever arrives before the connection drops is kept. Returns the new offset.
+        """
+        async with self._lock_for(upload_id):
+            info = self.get(upload_id)
+            if info is None:
+                raise KeyError(upload_id)
+            if offset != info["offset"]:
+                raise UploadOffsetMismatch(info["offset"])
+            _, data_path = self._paths(upload_id)
+            hasher = await asyncio.to_thread(self._hasher, upload_id, data_path, offset)
+
+            def write(f, block: bytes):
+                f.write(block)
+                hasher.update(block)
+
+            with open(data_path, "r+b") as f:
+                f.seek(offset)
+                try:
+                    async for block in chunks:
+                        if offset + len(block) > info["length"]:
+                            raise ValueError("Upload exceeds its declared length")
+                        await asyncio.to_thread(write, f, block)
+                        offset += len(block)
+                finally:
+                    f.truncate(offset)
+                    self._hashers[upload_id] = (hasher, offset)
+            os.utime(self._paths(upload_id)[0])
+            return offset
+
+    async def finalize(self, upload_id: str) -> tuple:
+        """
+        Moves a complete upload to `<root>/<id>/<filename>` (a rename, not a copy) and returns
+        (that path, SHA-256 hex digest, metadata).
+        Holds the upload's lock, so a retried PATCH that is still writing can't race the move.
+        """
+        async with self._lock_for(upload_id):
+            info = self.get(upload_id)
+            if info is None:
+                raise KeyError(upload_id)
+            if info["offset"] != info["length"]:
+                raise UploadOffsetMismatch(info["offset"])
+            meta_path, data_path = self._paths(upload_id)
+            hasher = await asyncio.to_thread(self._hasher, upload_id, data_path, info["offset"])
+            destination_dir = os.path.join(self.root, upload_id)
+            os.makedirs(destination_dir, exist_ok=True)
+            destination = os.path.join(destination_dir, info["filename"])
+            os.replace(data_path, destination)
+            self._forget(upload_id, meta_path)
+            return destination, hasher.hexdigest(), info
+
+    async def abort(self, upload_id: str) -> bool:
+        """Deletes an unfinished upload. Holds the upload's lock, so it can't race an append or finalize."""
+        meta_path, data_path = self._paths(upload_id)
+        async with self._lock_for(upload_id):
+            if not os.path.exists(meta_path):
+                return False
+            if os.path.exists(data_path):
+                os.remove(data_path)
+            self._forget(upload_id, meta_path)
+            return True
+
+    def _forget(self, upload_id: str, meta_path: str):
+        os.remove(meta_path)
+        self._hashers.pop(upload_id, None)
+        with self._lock:
+            self._locks.pop(upload_id, None)
+
+    async def expire(self, max_age: float = UPLOAD_EXPIRY_SECONDS):
+        """
+        Discards uploads whose metadata hasn't been touched for `max_age` seconds, and the directories
+        of finalized uploads whose job has finished with the file.
+        """
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            upload_id, ext = os.path.splitext(name)
+            if ext == ".json" and os.path.getmtime(path) < cutoff:
+                logger.info(f"Discarding abandoned upload {upload_id}")
+                await self.abort(upload_id)
+            elif _UPLOAD_ID.match(name) and os.path.isdir(path) and not os.listdir(path):
+                os.rmdir(path)
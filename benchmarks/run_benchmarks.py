@@ -0,0 +1,396 @@
+"""
+End-to-end pipeline benchmark on a synthetic audiobook.
+
+    python -m benchmarks.run_benchmarks --hours 3 --chapters 20 --format m4b
+    python -m benchmarks.run_benchmarks --whisper faster --translator marian --compare benchmarks/results/base.json
+    python -m benchmarks.run_benchmarks --whisper faster --whisper-compute-type int8 --whisper-batch-size 8
+
+Measures how long the backend takes to import (benchmarks/startup.py), then generates (or reuses)
+a synthetic book and measures each stage on its own — chunking
+(AudioProcessor), transcription (transcribe_chunks), translation (translate_transcript_sync) — the
+whole streaming pipeline (process_audio_file), and the HTTP API serving the result. Every stage
+reports wall and CPU time, real-time factor, peak RSS of the process tree and bytes written to disk.
+Results are saved as JSON; --compare prints the change against an earlier run.
+
+By default Whisper and MarianMT are replaced by the deterministic stubs in benchmarks/stub_backends.py,
+so a run needs neither models nor network. The benchmark uses its own config file (the project's
+config.json with the overrides below) and its own working directory.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import argparse
+import platform
+import resource
+import threading
+import subprocess
+import http.client
+from urllib.parse import quote
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "backend"))
+
+from benchmarks.synthetic_audio import generate_book
+from benchmarks.startup import measure_startup
+
+WHISPER_BACKENDS = {"stub": "benchmarks.stub_backends:StubWhisper", "mlx": "mlx", "faster": "faster"}
+TRANSLATION_ENGINES = {"stub": "benchmarks.stub_backends:StubMarian", "marian": "marian", "ctranslate2": "ctranslate2"}
+DEFAULT_WORK_DIR = os.path.join(ROOT_DIR, "benchmarks", "work")
+DEFAULT_RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+# How often the process tree's memory is sampled while a stage runs
+RSS_SAMPLE_SECONDS = 0.05
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def _tree_rss_bytes() -> int | None:
+    """Resident memory of this process and all of its descendants (Linux /proc), or None elsewhere."""
+    total, pids, seen = 0, [os.getpid()], set()
+    while pids:
+        pid = pids.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * PAGE_SIZE
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            if pid == os.getpid():
+                return None
+    return total
+
+def _write_bytes() -> int | None:
+    """Bytes this process (and its reaped children) caused to be written to storage, or None without /proc."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _cpu_seconds() -> float:
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+def _dir_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+class StageMeter:
+    """Measures one stage: wall/CPU time, real-time factor, sampled peak RSS and disk bytes written."""
+
+    def __init__(self, results: dict, name: str, audio_seconds: float, output_dir: str | None = None):
+        self.results = results
+        self.name = name
+        self.audio_seconds = audio_seconds
+        self.output_dir = output_dir
+        self.extra = {}
+        self._stop = threading.Event()
+        self._peak_rss = 0
+
+    def _sample(self):
+        while True:
+            rss = _tree_rss_bytes()
+            if rss is not None:
+                self._peak_rss = max(self._peak_rss, rss)
+            if self._stop.wait(RSS_SAMPLE_SECONDS):
+                break
+
+    def __enter__(self):
+        print(f"[{self.name}] running...")
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._output_before = _dir_bytes(self.output_dir) if self.output_dir else 0
+        self._written_before = _write_bytes()
+        self._cpu_before = _cpu_seconds()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._start
+        cpu = _cpu_seconds() - self._cpu_before
+        self._stop.set()
+        self._sampler.join()
+        written_after = _write_bytes()
+        peak_rss = self._peak_rss or None
+        if peak_rss is None:
+            # No /proc: fall back to this process's lifetime high-water mark (KB on Linux, bytes on macOS)
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak_rss = maxrss if sys.platform == "darwin" else maxrss * 1024
+        self.results[self.name] = {
+            "ok": exc_type is None,
+            "error": repr(exc) if exc is not None else None,
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu, 3),
+            "realtime_factor": round(wall / self.audio_seconds, 5) if self.audio_seconds else None,
+            "peak_rss_mb": round(peak_rss / 2 ** 20, 1),
+            "disk_write_bytes": (written_after - self._written_before) if written_after is not None else None,
+            "output_bytes": (_dir_bytes(self.output_dir) - self._output_before) if self.output_dir else None,
+            **self.extra
+        }
+        print(f"[{self.name}] {json.dumps(self.results[self.name])}")
+        # Keep going with the other stages; the failure is recorded in the results
+        return exc_type is not None and issubclass(exc_type, Exception)
+
+def write_benchmark_config(path: str, args) -> dict:
+    """Writes the project's config.json with the benchmark's overrides to `path` and returns it."""
+    with open(os.path.join(ROOT_DIR, "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config.setdefault("transcription", {}).update({
+        "backend": WHISPER_BACKENDS[args.whisper],
+        "workers": args.workers,
+        "stub": {"realtime_factor": args.whisper_rtf}
+    })
+    faster = config["transcription"].setdefault("faster", {})
+    for key, value in (("model", args.whisper_model), ("compute_type", args.whisper_compute_type),
+                       ("batch_size", args.whisper_batch_size)):
+        if value is not None:
+            faster[key] = value
+    if args.cpu_threads is not None:
+        config["transcription"]["cpu_threads"] = args.cpu_threads
+    config.setdefault("translation", {}).update({
+        "engine": TRANSLATION_ENGINES[args.translator],
+        "stub": {"ms_per_token": args.translate_ms_per_token}
+    })
+    chunking = config.setdefault("chunking", {})
+    chunking["in_memory"] = args.in_memory
+    if args.chunk_seconds:
+        chunking["target_seconds"] = args.chunk_seconds
+    # Models are loaded by the stages themselves, so their load time shows up where it is paid
+    config.setdefault("models", {})["warmup"] = []
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4)
+    return config
+
+def _use_translation_cache(path: str):
+    """Points the translation cache at a fresh file, so a stage never reuses another stage's translations."""
+    import translation_service
+    translation_service.CACHE_PATH = path
+    translation_service._cache = None
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def run_http_stage(meter: StageMeter, staging_dir: str, project_id: str, duration: float, requests: int, concurrency: int):
+    """Serves the API on a local port and replays a mix of player requests against the processed book."""
+    import uvicorn
+    import routes
+    from fastapi import FastAPI
+
+    routes.STAGING_DIR = staging_dir
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    rng = random.Random(0)
+    media_size = os.path.getsize(next(Path(staging_dir, project_id).glob("original_audio.*")))
+
+    def make_request():
+        t = round(rng.uniform(0, max(duration - 60, 0)), 2)
+        kind = rng.choice(["projects", "chapters", "transcript_window", "seek", "search", "media_range", "translate"])
+        if kind == "projects":
+            return kind, "GET", "/api/projects", None, {}
+        if kind == "chapters":
+            return kind, "GET", f"/api/chapters?project_id={project_id}", None, {}
+        if kind == "transcript_window":
+            return kind, "GET", f"/api/transcript?project_id={project_id}&start={t}&end={t + 60}", None, {}
+        if kind == "seek":
+            return kind, "GET", f"/api/transcript/seek?project_id={project_id}&t={t}", None, {}
+        if kind == "search":
+            return kind, "GET", f"/api/search?q={quote(rng.choice(['libro', 'casa', 'noche camino']))}", None, {}
+        if kind == "media_range":
+            start = rng.randrange(0, max(media_size - 262144, 1))
+            return kind, "GET", f"/api/media?project_id={project_id}", None, {"Range": f"bytes={start}-{start + 262143}"}
+        body = json.dumps({"text": f"La casa de la noche numero {rng.randrange(200)}."})
+        return kind, "POST", "/api/translate", body, {"Content-Type": "application/json"}
+
+    plan = [make_request() for _ in range(requests)]
+    latencies = {}
+    stats = {"errors": 0, "response_bytes": 0}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def send(item):
+        kind, method, path, body, headers = item
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        start = time.perf_counter()
+        local.conn.request(method, path, body=body, headers=headers)
+        response = local.conn.getresponse()
+        data = response.read()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.setdefault(kind, []).append(elapsed)
+            stats["response_bytes"] += len(data)
+            stats["errors"] += response.status >= 400
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(send, plan))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    def percentile(values: list, p: float) -> float:
+        values = sorted(values)
+        return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 2)
+
+    meter.extra.update({
+        "requests": requests,
+        "concurrency": concurrency,
+        "requests_per_second": round(requests / elapsed, 1),
+        **stats,
+        "endpoints": {kind: {"count": len(values), "p50_ms": percentile(values, 0.5), "p95_ms": percentile(values, 0.95)}
+                      for kind, values in sorted(latencies.items())}
+    })
+
+def run(args) -> dict:
+    work_dir = os.path.abspath(args.work_dir)
+    run_dir = os.path.join(work_dir, "run")
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+
+    # The config must be in place before any project module reads it (spawned workers inherit the variable)
+    config_path = os.path.join(run_dir, "config.json")
+    config = write_benchmark_config(config_path, args)
+    os.environ["ACTIVE_TRANSLATE_CONFIG"] = config_path
+
+    print(f"Generating a {args.hours:g} h synthetic book with {args.chapters} chapters ({args.format})...")
+    input_file = generate_book(os.path.join(work_dir, "inputs"), args.hours, args.chapters, args.format)
+
+    results = {}
+    # Server startup, in fresh interpreters (before this process imports anything from the backend)
+    with StageMeter(results, "startup", 0) as meter:
+        meter.extra.update(measure_startup(config_path=config_path))
+
+    from audio_processor import AudioProcessor
+    from processing_service import process_audio_file, _make_processor
+    from transcriber import transcribe_chunks
+    from translation_service import translate_transcript_sync
+
+    stages_dir = os.path.join(run_dir, "stages")
+    project_dir, metadata = AudioProcessor(output_dir=stages_dir).prepare(input_file)
+    audio_seconds = metadata.get("duration_seconds") or args.hours * 3600
+
+    # The stages on their own: each one reads the previous stage's output from disk
+    with StageMeter(results, "chunking", audio_seconds, stages_dir) as meter:
+        processor = _make_processor(stages_dir, metadata)
+        processor.in_memory = False
+        meter.extra["chunks"] = sum(1 for _ in processor.iter_chunks(Path(input_file), project_dir))
+
+    transcript_path = os.path.join(project_dir, "transcript.json")
+    segments = []
+    with StageMeter(results, "transcription", audio_seconds, stages_dir) as meter:
+        transcribe_chunks(str(project_dir), transcript_path)
+        with open(transcript_path, "r", encoding="utf-8") as f:
+            segments = json.load(f)
+        meter.extra.update({"segments": len(segments), "words": sum(len(s.get("words", [])) for s in segments)})
+
+    _use_translation_cache(os.path.join(stages_dir, "translation_cache.db"))
+    with StageMeter(results, "translation", audio_seconds, stages_dir):
+        translate_transcript_sync(transcript_path)
+    results["translation"]["sentences_per_second"] = round(len(segments) / max(results["translation"]["wall_seconds"], 1e-3), 1)
+
+    # The streaming pipeline, where the stages overlap
+    pipeline_dir = os.path.join(run_dir, "pipeline")
+    _use_translation_cache(os.path.join(pipeline_dir, "translation_cache.db"))
+    with StageMeter(results, "pipeline", audio_seconds, pipeline_dir) as meter:
+        result = process_audio_file(input_file, pipeline_dir)
+
+    if args.http_requests and results["pipeline"]["ok"]:
+        with StageMeter(results, "http", audio_seconds) as meter:
+            run_http_stage(meter, pipeline_dir, result["project_id"], audio_seconds, args.http_requests, args.http_concurrency)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "params": vars(args),
+        "input": {"file": os.path.basename(input_file), "bytes": os.path.getsize(input_file),
+                  "audio_seconds": audio_seconds, "chapters": len(metadata.get("chapters") or [])},
+        "config": {section: config.get(section) for section in ("transcription", "chunking", "translation")},
+        "stages": results
+    }
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: dict, baseline: dict):
+    """Prints each stage's wall time, real-time factor and peak RSS next to a baseline run's."""
+    print("\nStage          wall s (base)        RTF (base)            peak RSS MB (base)")
+    for name, stage in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base:
+            print(f"{name:<14} {stage['wall_seconds']:>8}  (no baseline)")
+            continue
+        change = (stage["wall_seconds"] / base["wall_seconds"] - 1) * 100 if base["wall_seconds"] else 0
+        print(f"{name:<14} {stage['wall_seconds']:>8} ({base['wall_seconds']:>8}) {change:+6.1f}%  "
+              f"{stage['realtime_factor']} ({base['realtime_factor']})  {stage['peak_rss_mb']} ({base['peak_rss_mb']})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline on a synthetic audiobook.")
+    parser.add_argument("--hours", type=float, default=2.0, help="Length of the synthetic book.")
+    parser.add_argument("--chapters", type=int, default=12)
+    parser.add_argument("--format", choices=["mp3", "m4b"], default="mp3")
+    parser.add_argument("--whisper", choices=sorted(WHISPER_BACKENDS), default="stub")
+    parser.add_argument("--whisper-rtf", type=float, default=0.01,
+                        help="Stub Whisper: seconds of compute per second of audio.")
+    parser.add_argument("--translator", choices=sorted(TRANSLATION_ENGINES), default="stub")
+    parser.add_argument("--translate-ms-per-token", type=float, default=0.2,
+                        help="Stub translator: milliseconds per padded source token.")
+    parser.add_argument("--whisper-model", help="faster-whisper model size, e.g. large-v3 or medium (default: config.json).")
+    parser.add_argument("--whisper-compute-type", help="faster-whisper compute_type: float32, int8, int8_float32...")
+    parser.add_argument("--whisper-batch-size", type=int, help="faster-whisper batched inference batch size (0: sequential).")
+    parser.add_argument("--workers", type=int, default=1, help="transcription.workers")
+    parser.add_argument("--cpu-threads", type=int, help="transcription.cpu_threads (default: config.json)")
+    parser.add_argument("--chunk-seconds", type=float, default=0, help="chunking.target_seconds (default: config.json)")
+    parser.add_argument("--in-memory", action="store_true", help="chunking.in_memory for the pipeline stage")
+    parser.add_argument("--http-requests", type=int, default=500, help="Requests replayed against the API (0 skips it).")
+    parser.add_argument("--http-concurrency", type=int, default=8)
+    parser.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="Synthetic inputs (cached) and run outputs.")
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/<timestamp>.json).")
+    parser.add_argument("--compare", help="An earlier results JSON to compare against.")
+    args = parser.parse_args()
+
+    results = run(args)
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures how long the backend takes to import, in a fresh interpreter, and which heavy ML frameworks
+got imported on the way. The server should boot without any of them; they are loaded by the model
+registry (or the warm-up thread) when a model is first needed.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --max-seconds 1.0   # exits with status 1 if slower or a framework leaked in
+
+run_benchmarks.py includes the same measurement as its "startup" stage.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+# Frameworks that only model loading may import
+HEAVY_MODULES = ("torch", "transformers", "mlx", "mlx_whisper", "faster_whisper", "ctranslate2", "tensorflow")
+DEFAULT_RUNS = 3
+DEFAULT_MAX_SECONDS = 1.0
+SLOWEST_IMPORTS = 10
+
+PROBE = f"""
+import sys, time, json
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {HEAVY_MODULES!r} if name in sys.modules)
+print(json.dumps({{"import_seconds": elapsed, "heavy_modules": heavy, "modules": len(sys.modules)}}))
+"""
+
+def _probe(env: dict, importtime: bool = False) -> tuple:
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", PROBE]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing the backend failed:\n{result.stderr.strip()[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+def _slowest_imports(importtime_log: str, count: int) -> list:
+    """The modules with the largest self time in a `-X importtime` log, as {"module", "self_ms", "cumulative_ms"}."""
+    imports = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            imports.append({"module": name.strip(), "self_ms": round(int(self_us) / 1000, 1),
+                            "cumulative_ms": round(int(cumulative_us) / 1000, 1)})
+        except ValueError:
+            continue
+    return sorted(imports, key=lambda item: item["self_ms"], reverse=True)[:count]
+
+def measure_startup(runs: int = DEFAULT_RUNS, config_path: str | None = None) -> dict:
+    """
+    Imports the backend's `main` module `runs` times, each in a new interpreter, and returns the best
+    and median import time, the heavy frameworks it loaded and the slowest individual imports.
+    """
+    env = dict(os.environ)
+    if config_path:
+        env["ACTIVE_TRANSLATE_CONFIG"] = config_path
+    samples = [_probe(env)[0] for _ in range(max(1, runs))]
+    times = sorted(sample["import_seconds"] for sample in samples)
+    _, importtime_log = _probe(env, importtime=True)
+    return {
+        "import_seconds_best": round(times[0], 3),
+        "import_seconds_median": round(times[len(times) // 2], 3),
+        "modules_loaded": samples[-1]["modules"],
+        "heavy_modules": sorted({name for sample in samples for name in sample["heavy_modules"]}),
+        "slowest_imports": _slowest_imports(importtime_log, SLOWEST_IMPORTS)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long the backend takes to import.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help="Fail if the median import time is above this.")
+    parser.add_argument("--config", help="Config file to import with (default: config.json).")
+    args = parser.parse_args()
+
+    startup = measure_startup(args.runs, args.config)
+    print(json.dumps(startup, indent=2))
+    problems = []
+    if startup["import_seconds_median"] > args.max_seconds:
+        problems.append(f"median import time {startup['import_seconds_median']} s is over {args.max_seconds} s")
+    if startup["heavy_modules"]:
+        problems.append(f"importing the backend loaded {', '.join(startup['heavy_modules'])}")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
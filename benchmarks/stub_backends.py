@@ -0,0 +1,99 @@
+"""
+Deterministic stand-ins for Whisper and MarianMT, so the pipeline can be benchmarked on a CPU-only
+machine without model downloads. They are selected like any other plugin in config.json:
+
+    "transcription": {"backend": "benchmarks.stub_backends:StubWhisper", "stub": {"realtime_factor": 0.02}}
+    "translation": {"engine": "benchmarks.stub_backends:StubMarian", "stub": {"ms_per_token": 0.5}}
+
+Their output depends only on the audio length and the input text, and they spend a configurable
+amount of time per audio second / per token, so stage timings stay comparable between runs.
+"""
+import time
+import wave
+
+SAMPLE_RATE = 16000
+VOCABULARY = ("el", "la", "de", "que", "y", "en", "un", "libro", "capitulo", "casa", "noche", "camino",
+              "dijo", "tiempo", "mujer", "hombre", "ciudad", "agua", "mar", "luz", "sombra", "palabra")
+
+DEFAULT_WHISPER_REALTIME_FACTOR = 0.01
+DEFAULT_WHISPER_LOAD_SECONDS = 0.0
+DEFAULT_SEGMENT_SECONDS = 5.0
+DEFAULT_WORDS_PER_SECOND = 2.5
+
+DEFAULT_MARIAN_LOAD_SECONDS = 0.0
+DEFAULT_MARIAN_MS_PER_BATCH = 2.0
+DEFAULT_MARIAN_MS_PER_TOKEN = 0.2
+
+def _audio_seconds(audio) -> float:
+    """Length of a Whisper input: a 16 kHz float32 array or a WAV path."""
+    if hasattr(audio, "shape"):
+        return len(audio) / SAMPLE_RATE
+    with wave.open(str(audio), "rb") as f:
+        return f.getnframes() / float(f.getframerate())
+
+class StubWhisper:
+    """
+    Produces `words_per_second` words in segments of `segment_seconds`, with word timestamps,
+    after sleeping `realtime_factor` seconds per second of audio.
+    """
+
+    def __init__(self, config: dict, cpu_threads: int = 0):
+        stub = config.get("stub", {})
+        self.realtime_factor = stub.get("realtime_factor", DEFAULT_WHISPER_REALTIME_FACTOR)
+        self.segment_seconds = stub.get("segment_seconds", DEFAULT_SEGMENT_SECONDS)
+        self.words_per_second = stub.get("words_per_second", DEFAULT_WORDS_PER_SECOND)
+        time.sleep(stub.get("load_seconds", DEFAULT_WHISPER_LOAD_SECONDS))
+
+    def transcribe(self, audio) -> list:
+        duration = _audio_seconds(audio)
+        time.sleep(duration * self.realtime_factor)
+
+        segments = []
+        word_seconds = 1.0 / self.words_per_second
+        start = 0.0
+        while start + word_seconds <= duration:
+            end = min(start + self.segment_seconds, duration)
+            words = []
+            t = start
+            while t + word_seconds <= end:
+                text = VOCABULARY[(len(segments) * 7 + len(words) * 3) % len(VOCABULARY)]
+                words.append({"text": text, "start": round(t, 3), "end": round(t + word_seconds * 0.8, 3)})
+                t += word_seconds
+            segments.append({
+                "text": " ".join(word["text"] for word in words).capitalize() + ".",
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "words": words
+            })
+            start = end
+        return segments
+
+class StubMarian:
+    """
+    "Translates" by tagging each sentence, after sleeping `ms_per_batch` plus `ms_per_token` for
+    every padded token (longest sentence x batch size), like a padded generate call.
+    """
+
+    def __init__(self, model_name: str, config: dict):
+        stub = config.get("stub", {})
+        self.name = f"stub:{model_name}"
+        self.device = "cpu"
+        self.load_seconds = stub.get("load_seconds", DEFAULT_MARIAN_LOAD_SECONDS)
+        self.ms_per_batch = stub.get("ms_per_batch", DEFAULT_MARIAN_MS_PER_BATCH)
+        self.ms_per_token = stub.get("ms_per_token", DEFAULT_MARIAN_MS_PER_TOKEN)
+
+    def load(self):
+        time.sleep(self.load_seconds)
+        return self
+
+    def unload(self, loaded):
+        pass
+
+    def token_counts(self, loaded, texts: list) -> list:
+        # Roughly what a SentencePiece tokenizer gives for Spanish, plus the end-of-sentence token
+        return [len(text.split()) * 4 // 3 + 1 for text in texts]
+
+    def generate(self, loaded, texts: list) -> list:
+        padded = max(self.token_counts(loaded, texts)) * len(texts)
+        time.sleep((self.ms_per_batch + padded * self.ms_per_token) / 1000)
+        return [f"[en] {text}" for text in texts]
@@ -0,0 +1,67 @@
+"""
+Generates synthetic audiobooks for benchmarking: hours of "speech" (a warbling tone over a little
+noise) broken by short pauses, so the silence chunker has natural cut points, with chapter markers.
+Files are cached by their parameters, so repeated runs reuse the same input.
+"""
+import os
+import subprocess
+
+SAMPLE_RATE = 22050
+BITRATE = "64k"
+# One "sentence" of tone followed by a pause; a block of them is rendered once and looped
+SENTENCE_SECONDS = 6.5
+PAUSE_SECONDS = 0.8
+BLOCK_SENTENCES = 10
+CODECS = {"mp3": ["-c:a", "libmp3lame", "-id3v2_version", "3"], "m4b": ["-c:a", "aac", "-f", "mp4"]}
+
+def chapter_spans(duration: float, chapters: int) -> list:
+    """Deterministic, uneven chapter lengths covering [0, duration), as (start, end) pairs in seconds."""
+    weights = [1.0 + ((i * 37) % 10) / 10 for i in range(max(1, chapters))]
+    spans, start = [], 0.0
+    for i, weight in enumerate(weights):
+        end = duration if i == len(weights) - 1 else start + duration * weight / sum(weights)
+        spans.append((round(start, 3), round(end, 3)))
+        start = end
+    return spans
+
+def _write_ffmetadata(path: str, title: str, spans: list):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f";FFMETADATA1\ntitle={title}\n")
+        for idx, (start, end) in enumerate(spans):
+            f.write(f"[CHAPTER]\nTIMEBASE=1/1000\nSTART={int(start * 1000)}\nEND={int(end * 1000)}\n"
+                    f"title=Capitulo {idx + 1}\n")
+
+def generate_book(output_dir: str, hours: float, chapters: int = 12, fmt: str = "mp3") -> str:
+    """Returns the path of a synthetic book of `hours` with `chapters` chapters, generating it if needed."""
+    if fmt not in CODECS:
+        raise ValueError(f"Unsupported format: {fmt}. Allowed: {set(CODECS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"synthetic_{hours:g}h_{chapters}ch"
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    if os.path.exists(path):
+        return path
+
+    duration = hours * 3600
+    metadata_path = os.path.join(output_dir, f"{name}.ffmetadata")
+    _write_ffmetadata(metadata_path, name.replace("_", " "), chapter_spans(duration, chapters))
+
+    # Evaluating the expression per sample is slow, so render one block and loop it for the whole book
+    period = SENTENCE_SECONDS + PAUSE_SECONDS
+    voice = (f"0.25*sin(2*PI*(170+40*sin(2*PI*2.7*t))*t)*lt(mod(t,{period}),{SENTENCE_SECONDS})"
+             f"+0.004*(random(0)-0.5)")
+    block_path = os.path.join(output_dir, "voice_block.wav")
+    if not os.path.exists(block_path):
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi",
+                        "-i", f"aevalsrc=exprs='{voice}':s={SAMPLE_RATE}:d={period * BLOCK_SENTENCES}",
+                        block_path], check=True)
+
+    tmp_path = os.path.join(output_dir, f".{name}.tmp.{fmt}")
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-stream_loop", "-1", "-i", block_path, "-i", metadata_path, "-t", str(duration),
+        "-map", "0:a", "-map_metadata", "1", "-map_chapters", "1",
+        "-ac", "1", "-b:a", BITRATE, *CODECS[fmt], tmp_path
+    ]
+    subprocess.run(command, check=True)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,177 @@
+"""
+Checks the CTranslate2 translation engine against PyTorch MarianMT: both translate the same Spanish
+sentences, and the script reports how often they agree, how similar the translations are, and each
+engine's load time, memory and sentences per second.
+
+    python -m benchmarks.translation_parity
+    python -m benchmarks.translation_parity --compute-type int8_float32 --transcript staging/<project>/transcript.json
+
+The first run converts the model (see convert_to_ctranslate2), which needs PyTorch and the Hugging
+Face model once. Exits with status 1 if the mean similarity is below --min-similarity.
+tests/test_translation_parity.py runs the same check whenever the model is in the local cache.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+from difflib import SequenceMatcher
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "backend"))
+
+from translation_service import (MarianEngine, CTranslate2Engine, convert_to_ctranslate2, get_translation_model,
+                                 plan_batches, MODELS_DIR, DEFAULT_CT2_COMPUTE_TYPE, DEFAULT_MAX_BATCH_TOKENS,
+                                 DEFAULT_MAX_BATCH_SIZE)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+DEFAULT_MIN_SIMILARITY = 0.9
+DEFAULT_THROUGHPUT_SENTENCES = 512
+SENTENCES = (
+    "Era una noche oscura y tormentosa.",
+    "Mi padre me regaló este libro cuando cumplí diez años.",
+    "La casa estaba al final del camino, junto al río.",
+    "¿Dónde has estado todo este tiempo?",
+    "Nadie sabía de dónde venía aquel hombre.",
+    "El tren salió de la estación con dos horas de retraso.",
+    "Ella cerró la puerta sin decir una palabra.",
+    "Cuando llegamos a la ciudad, ya había amanecido.",
+    "No es fácil olvidar lo que uno ha visto en la guerra.",
+    "El médico dijo que tenía que descansar por lo menos una semana.",
+    "Las calles estaban llenas de gente que celebraba la victoria.",
+    "Durante muchos años vivió solo en una cabaña en la montaña.",
+    "—Te lo prometo —dijo ella, mirándome a los ojos.",
+    "El capitán ordenó que nadie abandonara el barco.",
+    "Aquel verano aprendí a nadar en el lago detrás de la escuela.",
+    "Mi abuela contaba historias de fantasmas junto al fuego.",
+    "Sí.",
+    "Capítulo tres.",
+    "El viento soplaba con fuerza y las olas golpeaban las rocas del puerto, mientras los pescadores "
+    "intentaban asegurar sus barcas antes de que llegara lo peor de la tormenta.",
+    "Nunca pensé que volvería a ver a mi hermano después de tantos años.",
+    "La carta llegó un martes por la mañana, cuando ya nadie la esperaba.",
+    "Tenemos que irnos antes de que se haga de noche.",
+    "El profesor escribió la fecha en la pizarra y se volvió hacia nosotros.",
+    "Todo lo que sé de mi madre lo sé por las fotografías.",
+)
+
+def _rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / 2 ** 20
+    except OSError:
+        return None
+
+def _load(engine) -> tuple:
+    """Loads an engine, returning (loaded model, load seconds, resident memory it added in MB)."""
+    gc.collect()
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    loaded = engine.load()
+    elapsed = time.perf_counter() - start
+    rss_after = _rss_mb()
+    added = round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None
+    return loaded, round(elapsed, 2), added
+
+def _translate(engine, loaded, texts: list) -> tuple:
+    """Translates `texts` with the service's batch planning; returns (translations, sentences per second)."""
+    lengths = dict(enumerate(engine.token_counts(loaded, texts)))
+    results = [""] * len(texts)
+    start = time.perf_counter()
+    for batch in plan_batches(lengths, DEFAULT_MAX_BATCH_TOKENS, DEFAULT_MAX_BATCH_SIZE):
+        for idx, translation in zip(batch, engine.generate(loaded, [texts[i] for i in batch])):
+            results[idx] = translation
+    elapsed = time.perf_counter() - start
+    return results, round(len(texts) / max(elapsed, 1e-6), 1)
+
+def _load_sentences(args) -> list:
+    if args.transcript:
+        with open(args.transcript, "r", encoding="utf-8") as f:
+            sentences = [segment["text"] for segment in json.load(f) if segment.get("text", "").strip()]
+        return sentences[:args.limit] if args.limit else sentences
+    if args.sentences:
+        with open(args.sentences, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    return list(SENTENCES)
+
+def run(args) -> dict:
+    sentences = _load_sentences(args)
+    throughput_texts = (sentences * (args.throughput_sentences // len(sentences) + 1))[:args.throughput_sentences]
+
+    # Convert first, so the conversion's PyTorch model doesn't count towards CTranslate2's memory
+    convert_to_ctranslate2(args.model, args.models_dir, args.compute_type)
+    engines = {
+        "ctranslate2": CTranslate2Engine(args.model, {"compute_type": args.compute_type, "models_dir": args.models_dir,
+                                                      "intra_threads": args.threads}),
+        "marian": MarianEngine(args.model)
+    }
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    report, translations = {}, {}
+    for name, engine in engines.items():
+        print(f"[{name}] loading...")
+        loaded, load_seconds, memory_mb = _load(engine)
+        translations[name], _ = _translate(engine, loaded, sentences)
+        _, sentences_per_second = _translate(engine, loaded, throughput_texts)
+        report[name] = {"load_seconds": load_seconds, "memory_mb": memory_mb, "sentences_per_second": sentences_per_second}
+        print(f"[{name}] {json.dumps(report[name])}")
+        engine.unload(loaded)
+        del loaded
+
+    speedup = report["ctranslate2"]["sentences_per_second"] / max(report["marian"]["sentences_per_second"], 1e-6)
+    return {
+        "model": args.model,
+        "compute_type": args.compute_type,
+        "sentences": len(sentences),
+        **compare(sentences, translations["marian"], translations["ctranslate2"], args.show),
+        "speedup": round(speedup, 2),
+        "engines": report
+    }
+
+def compare(sentences: list, references: list, candidates: list, show: int = 5) -> dict:
+    """How closely `candidates` (CTranslate2) match `references` (MarianMT): exact matches, mean similarity, worst pairs."""
+    pairs = list(zip(sentences, references, candidates))
+    similarities = [SequenceMatcher(None, reference, candidate).ratio() for _, reference, candidate in pairs]
+    worst = sorted(zip(similarities, pairs))[:show]
+    return {
+        "exact_match": round(sum(1 for _, a, b in pairs if a == b) / len(pairs), 3),
+        "mean_similarity": round(sum(similarities) / len(similarities), 4),
+        "largest_differences": [{"source": source, "marian": reference, "ctranslate2": candidate,
+                                 "similarity": round(similarity, 3)}
+                                for similarity, (source, reference, candidate) in worst if similarity < 1]
+    }
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare CTranslate2 translations with PyTorch MarianMT.")
+    parser.add_argument("--model", default=get_translation_model(), help="Hugging Face model (default: config.json).")
+    parser.add_argument("--compute-type", default=DEFAULT_CT2_COMPUTE_TYPE, help="int8, int8_float32, int16, float32...")
+    parser.add_argument("--models-dir", default=MODELS_DIR, help="Where converted models are cached.")
+    parser.add_argument("--sentences", help="A text file with one Spanish sentence per line.")
+    parser.add_argument("--transcript", help="A transcript.json whose segments are used as the sentences.")
+    parser.add_argument("--limit", type=int, default=0, help="Use at most this many transcript segments.")
+    parser.add_argument("--throughput-sentences", type=int, default=DEFAULT_THROUGHPUT_SENTENCES,
+                        help="Sentences translated to measure speed.")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads for both engines (default: all cores).")
+    parser.add_argument("--min-similarity", type=float, default=DEFAULT_MIN_SIMILARITY)
+    parser.add_argument("--show", type=int, default=5, help="How many of the largest differences to print.")
+    parser.add_argument("--output", help="Also save the report as JSON here.")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if report["mean_similarity"] < args.min_similarity:
+        print(f"FAIL: mean similarity {report['mean_similarity']} is below {args.min_similarity}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
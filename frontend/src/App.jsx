@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import Player from './components/Player';
 import Transcript from './components/Transcript';
 import ProjectSelector from './components/ProjectSelector';
@@ -6,11 +6,21 @@ import UploadButton from './components/UploadButton';
 import ReaderSettings from './components/ReaderSettings';
 
 const API_BASE_URL = 'http://localhost:8000';
+// While a book is still being processed: how far playback may move before the backend is told again,
+// and how often the partial transcript is reloaded
+const POSITION_REPORT_SECONDS = 30;
+const TRANSCRIPT_REFRESH_MS = 10000;
+// Only a window of segments around the playback position is loaded. It is moved once playback comes
+// within TRANSCRIPT_WINDOW_MARGIN segments of its edge, or jumps outside it.
+const TRANSCRIPT_WINDOW_SEGMENTS = 200;
+const TRANSCRIPT_WINDOW_MARGIN = 40;
 
 function App() {
   const [projects, setProjects] = useState([]);
   const [selectedProjectId, setSelectedProjectId] = useState(null);
   const [transcriptData, setTranscriptData] = useState([]);
+  // Where the loaded segments sit in the whole transcript: { offset, total }
+  const [transcriptWindow, setTranscriptWindow] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState(null);
   const [currentTime, setCurrentTime] = useState(0);
@@ -57,21 +67,41 @@ function App() {
     fetchProjects();
   }, [fetchProjects]);
 
+  const windowRequestRef = useRef(0);
+  const windowLoadingRef = useRef(false);
+
+  // Loads the window of segments around `time`: the backend finds the segment playing at that time
+  // (a binary search over the compact transcript store), then the window is read by segment index
+  const loadTranscriptWindow = useCallback(async (time) => {
+    const request = ++windowRequestRef.current;
+    windowLoadingRef.current = true;
+    try {
+      const project = selectedProjectId ? `project_id=${encodeURIComponent(selectedProjectId)}&` : '';
+      const seekResponse = await fetch(`${API_BASE_URL}/api/transcript/seek?${project}t=${Math.max(0, time)}`);
+      if (!seekResponse.ok) throw new Error('Failed to fetch transcript');
+      const { segment_index: segmentIndex } = await seekResponse.json();
+
+      const offset = Math.max(0, segmentIndex - TRANSCRIPT_WINDOW_SEGMENTS / 2);
+      const response = await fetch(`${API_BASE_URL}/api/transcript?${project}offset=${offset}&limit=${TRANSCRIPT_WINDOW_SEGMENTS}`);
+      if (!response.ok) throw new Error('Failed to fetch transcript');
+      const data = await response.json();
+
+      // A newer request (e.g. another jump) supersedes this one
+      if (request !== windowRequestRef.current) return;
+      setTranscriptData(data.segments);
+      setTranscriptWindow({ offset: data.offset, total: data.total_segments });
+    } finally {
+      if (request === windowRequestRef.current) windowLoadingRef.current = false;
+    }
+  }, [selectedProjectId]);
+
   // Fetch transcript when selected project changes
   useEffect(() => {
     const fetchTranscript = async () => {
       setIsLoading(true);
+      setTranscriptWindow(null);
       try {
-        const url = selectedProjectId
-          ? `${API_BASE_URL}/api/transcript?project_id=${selectedProjectId}`
-          : `${API_BASE_URL}/api/transcript`;
-
-        const response = await fetch(url);
-        if (!response.ok) throw new Error('Failed to fetch transcript');
-        const data = await response.json();
-
-        const parsedChunks = Array.isArray(data) ? data : data.chunks || data.segments || [];
-        setTranscriptData(parsedChunks);
+        await loadTranscriptWindow(0);
         setError(null);
       } catch (err) {
         console.warn("Backend not accessible or error fetching transcript.", err);
@@ -89,15 +119,65 @@ function App() {
     };
 
     fetchTranscript();
-  }, [selectedProjectId, projects.length]);
+  }, [loadTranscriptWindow, projects.length]);
+
+  // Move the window along with playback, and to wherever playback jumps
+  useEffect(() => {
+    if (!transcriptWindow || windowLoadingRef.current || transcriptData.length === 0) return;
+    const { offset, total } = transcriptWindow;
+    const hasBefore = offset > 0;
+    const hasAfter = offset + transcriptData.length < total;
+    const nearStart = transcriptData[Math.min(TRANSCRIPT_WINDOW_MARGIN, transcriptData.length - 1)].start;
+    const nearEnd = transcriptData[Math.max(0, transcriptData.length - TRANSCRIPT_WINDOW_MARGIN)].start;
+    if ((hasBefore && currentTime < nearStart) || (hasAfter && currentTime >= nearEnd)) {
+      loadTranscriptWindow(currentTime).catch((err) => console.warn("Could not load the transcript.", err));
+    }
+  }, [currentTime, transcriptData, transcriptWindow, loadTranscriptWindow]);
+
+  const selectedProject = projects.find((project) => project.id === selectedProjectId);
+  const isProcessing = selectedProject?.status === 'translating';
+  const lastReportedRef = useRef(null);
+  const currentTimeRef = useRef(0);
+
+  // Tell the backend where the listener is, so that part of a book still being processed is transcribed next
+  const reportPosition = useCallback((time) => {
+    lastReportedRef.current = time;
+    fetch(`${API_BASE_URL}/api/playback/position?project_id=${encodeURIComponent(selectedProjectId)}&t=${time}`, { method: 'POST' })
+      .catch((err) => console.warn("Could not report playback position.", err));
+  }, [selectedProjectId]);
+
+  useEffect(() => {
+    lastReportedRef.current = null;
+  }, [selectedProjectId]);
+
+  // Reload the partial transcript (and the project statuses) until the book is fully processed
+  useEffect(() => {
+    if (!isProcessing) return;
+    const timer = setInterval(async () => {
+      try {
+        await loadTranscriptWindow(currentTimeRef.current);
+      } catch (err) {
+        console.warn("Could not refresh the transcript.", err);
+      }
+      fetchProjects();
+    }, TRANSCRIPT_REFRESH_MS);
+    return () => clearInterval(timer);
+  }, [isProcessing, loadTranscriptWindow, fetchProjects]);
 
   const handleTimeUpdate = (time) => {
     setCurrentTime(time);
+    currentTimeRef.current = time;
+    // Also catches seeks made with the audio element's own controls
+    if (isProcessing && (lastReportedRef.current === null || Math.abs(time - lastReportedRef.current) > POSITION_REPORT_SECONDS)) {
+      reportPosition(time);
+    }
   };
 
   const handleSeek = (time) => {
     setCurrentTime(time);
+    currentTimeRef.current = time;
     setSeekSignal(prev => prev + 1);
+    if (isProcessing) reportPosition(time);
   };
 
   const audioUrl = selectedProjectId
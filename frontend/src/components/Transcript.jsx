@@ -15,7 +15,10 @@ const Transcript = ({ transcript, currentTime, onWordClick, settings, isPlaying,
         const items = Array.isArray(transcript) ? transcript : transcript?.chunks || transcript?.segments || [];
 
         items.forEach((item, itemIndex) => {
-            if (item.words && item.words.length > 0) {
+            if (item.pending) {
+                // Part of the book that hasn't been transcribed yet
+                words.push({ start: item.start, end: item.end, pending: true, segmentIndex: itemIndex });
+            } else if (item.words && item.words.length > 0) {
                 // New segment format
                 item.words.forEach((w) => {
                     words.push({ ...w, segmentText: item.text, translation: item.translation, segmentIndex: itemIndex });
@@ -28,28 +31,35 @@ const Transcript = ({ transcript, currentTime, onWordClick, settings, isPlaying,
         return words;
     }, [transcript]);
 
+    // Sorted start-time index over flatWords (running max, as Whisper timestamps can step back slightly)
+    const wordStarts = useMemo(() => {
+        const starts = new Float64Array(flatWords.length);
+        let max = -Infinity;
+        flatWords.forEach((w, i) => {
+            max = Math.max(max, w.start_time ?? w.start);
+            starts[i] = max;
+        });
+        return starts;
+    }, [flatWords]);
+
     // Sync logic: Find the index of the currently active word
     const activeIndex = useMemo(() => {
         // Add a 50ms forward buffer. If we jump exactly to a word's start time,
         // the audio player might round to 1ms before it. This precise buffer fixes jumping getting stuck.
         const searchTime = currentTime + 0.05;
 
-        const idx = flatWords.findIndex(
-            (chunk) => {
-                const start = chunk.start_time !== undefined ? chunk.start_time : chunk.start;
-                const end = chunk.end_time !== undefined ? chunk.end_time : chunk.end;
-                return searchTime >= start && searchTime <= end;
-            }
-        );
-        // If not found, try to find the closest word that we just passed
-        if (idx === -1 && flatWords.length > 0) {
-            for (let i = flatWords.length - 1; i >= 0; i--) {
-                const end = flatWords[i].end_time !== undefined ? flatWords[i].end_time : flatWords[i].end;
-                if (searchTime >= end) return i;
-            }
+        // Binary search for the last word that starts at or before the search time. Start times are
+        // made non-decreasing once in wordStarts, so this stays O(log n) on every timeupdate.
+        // If the time falls in a gap, that is also the closest word we just passed.
+        let lo = 0;
+        let hi = wordStarts.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (wordStarts[mid] <= searchTime) lo = mid + 1;
+            else hi = mid;
         }
-        return idx;
-    }, [currentTime, flatWords]);
+        return lo - 1;
+    }, [currentTime, wordStarts]);
 
     const activeWord = activeIndex !== -1 ? flatWords[activeIndex] : null;
 
@@ -182,7 +192,7 @@ const Transcript = ({ transcript, currentTime, onWordClick, settings, isPlaying,
             // Translation hotkeys
             if (e.key.toLowerCase() === 't' || e.key.toLowerCase() === 'w') {
                 const activeWord = curIdx !== -1 ? flatWords[curIdx] : null;
-                if (!activeWord) return;
+                if (!activeWord || activeWord.pending) return;
 
                 const isWordMode = e.key.toLowerCase() === 'w';
                 const textToTranslate = isWordMode ? (activeWord.word || activeWord.text) : activeWord.segmentText;
@@ -292,6 +302,23 @@ const Transcript = ({ transcript, currentTime, onWordClick, settings, isPlaying,
                                 else activeStyleClass = 'highlight-background scale-105 shadow-sm transform';
                             }
 
+                            if (chunk.pending) {
+                                return (
+                                    <span
+                                        key={index}
+                                        ref={isActive ? activeWordRef : null}
+                                        onClick={(e) => {
+                                            e.stopPropagation();
+                                            onWordClick(start);
+                                        }}
+                                        className="w-full italic text-base opacity-50 cursor-pointer py-2"
+                                        title="This part of the book is still being transcribed"
+                                    >
+                                        Transcribing…
+                                    </span>
+                                );
+                            }
+
                             return (
                                 <span
                                     key={index}
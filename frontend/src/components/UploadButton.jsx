@@ -1,6 +1,35 @@
 import React, { useState, useRef, useEffect } from 'react';
 import UploadProgress from './UploadProgress';
 
+const API_BASE = 'http://localhost:8000/api';
+// Size of each PATCH request of a resumable upload
+const UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024;
+const MAX_UPLOAD_RETRIES = 8;
+
+const errorDetail = async (response) => {
+    try {
+        const body = await response.json();
+        return body.detail || response.statusText;
+    } catch {
+        return response.statusText || 'Unknown error';
+    }
+};
+
+// The byte offset the server reports for an upload. A missing header means the browser can't read it
+// (e.g. it isn't exposed over CORS); reading that as 0 would restart the upload, so fail instead.
+const uploadOffset = (response) => {
+    const value = response.headers.get('Upload-Offset');
+    const offset = value === null ? NaN : Number(value);
+    if (!Number.isInteger(offset) || offset < 0) throw new Error('The server did not report the upload offset.');
+    return offset;
+};
+
+const formatEta = (seconds) => {
+    if (seconds < 60) return `${Math.ceil(seconds)}s`;
+    const minutes = Math.ceil(seconds / 60);
+    return minutes < 60 ? `${minutes} min` : `${Math.floor(minutes / 60)}h ${minutes % 60}m`;
+};
+
 const UploadButton = ({ onUploadSuccess }) => {
     const [isUploading, setIsUploading] = useState(false);
     const [progress, setProgress] = useState(0);
@@ -9,55 +38,132 @@ const UploadButton = ({ onUploadSuccess }) => {
     const fileInputRef = useRef(null);
     const isReadyTriggeredRef = useRef(false);
 
-    // Poll the backend for processing progress
+    const resetInput = () => {
+        if (fileInputRef.current) fileInputRef.current.value = '';
+    };
+
+    // Follow processing progress over a Server-Sent Events stream; the backend pushes every update
     useEffect(() => {
         if (!activeProjectId) return;
 
-        const interval = setInterval(async () => {
+        const source = new EventSource(`${API_BASE}/progress/stream?project_id=${activeProjectId}`);
+
+        source.addEventListener('progress', (event) => {
+            const data = JSON.parse(event.data);
+            const eta = data.eta_seconds > 0 ? ` (about ${formatEta(data.eta_seconds)} left)` : "";
+
+            if (data.status === "queued") {
+                setProgress(0);
+                setStatusText(data.message || "Waiting in queue...");
+            } else if (data.status === "processing") {
+                setProgress(data.progress);
+                setStatusText((data.message || "Processing...") + eta);
+
+                // The backend flags the book readable once the first chunk's transcript is written
+                if ((data.readable || data.progress >= 85) && !isReadyTriggeredRef.current) {
+                    isReadyTriggeredRef.current = true;
+                    if (onUploadSuccess) onUploadSuccess();
+                    // Don't set isUploading to false yet, keep showing progress circle
+                }
+            } else if (data.status === "done") {
+                source.close();
+                setProgress(100);
+                setStatusText("Done!");
+
+                setTimeout(() => {
+                    setIsUploading(false);
+                    setActiveProjectId(null);
+                    // Avoid double-calling if it was already triggered
+                    if (!isReadyTriggeredRef.current && onUploadSuccess) onUploadSuccess();
+                    resetInput();
+                }, 600);
+            } else if (data.status === "error" || data.status === "cancelled") {
+                source.close();
+                setIsUploading(false);
+                setActiveProjectId(null);
+                alert(data.status === "cancelled" ? "Processing was cancelled." : `Processing failed: ${data.message}`);
+                resetInput();
+            }
+        });
+
+        // EventSource reconnects by itself; the stream resends the current state when it does
+        source.onerror = () => console.error("Progress stream interrupted, reconnecting...");
+
+        return () => source.close();
+    }, [activeProjectId, onUploadSuccess]);
+
+    // Upload in chunks over the resumable upload API, so a dropped connection (or a page reload)
+    // continues from the last byte the server has instead of starting over
+    const uploadFile = async (file) => {
+        const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+        let uploadId = localStorage.getItem(resumeKey);
+        let offset = null;
+
+        if (uploadId) {
+            const response = await fetch(`${API_BASE}/uploads/${uploadId}`, { method: 'HEAD' });
+            if (response.ok) {
+                offset = uploadOffset(response);
+            } else {
+                localStorage.removeItem(resumeKey);
+            }
+        }
+        if (offset === null) {
+            const params = new URLSearchParams({ filename: file.name, length: file.size });
+            const response = await fetch(`${API_BASE}/uploads?${params}`, { method: 'POST' });
+            if (!response.ok) throw new Error(await errorDetail(response));
+            uploadId = (await response.json()).upload_id;
+            offset = 0;
+            localStorage.setItem(resumeKey, uploadId);
+        }
+
+        let failures = 0;
+        while (offset < file.size) {
+            setProgress((offset / file.size) * 100);
             try {
-                const response = await fetch(`http://localhost:8000/api/progress?project_id=${activeProjectId}`);
-                if (response.ok) {
-                    const data = await response.json();
-
-                    if (data.status === "processing") {
-                        setProgress(data.progress);
-                        setStatusText(data.message || "Processing...");
-
-                        // Phase 4 Translation starts at 85%. At this point it's ready to read!
-                        if (data.progress >= 85 && !isReadyTriggeredRef.current) {
-                            isReadyTriggeredRef.current = true;
-                            if (onUploadSuccess) onUploadSuccess();
-                            // Don't set isUploading to false yet, keep showing progress circle
-                        }
-                    } else if (data.status === "done") {
-                        clearInterval(interval);
-                        setProgress(100);
-                        setStatusText("Done!");
-
-                        setTimeout(() => {
-                            setIsUploading(false);
-                            setActiveProjectId(null);
-                            // Avoid double-calling if it was already triggered
-                            if (!isReadyTriggeredRef.current && onUploadSuccess) onUploadSuccess();
-                            if (fileInputRef.current) fileInputRef.current.value = '';
-                        }, 600);
-                    } else if (data.status === "error") {
-                        clearInterval(interval);
-                        setIsUploading(false);
-                        setActiveProjectId(null);
-                        alert(`Processing failed: ${data.message}`);
-                        if (fileInputRef.current) fileInputRef.current.value = '';
-                    }
+                const response = await fetch(`${API_BASE}/uploads/${uploadId}`, {
+                    method: 'PATCH',
+                    headers: {
+                        'Content-Type': 'application/offset+octet-stream',
+                        'Upload-Offset': String(offset)
+                    },
+                    body: file.slice(offset, offset + UPLOAD_CHUNK_SIZE)
+                });
+                if (response.status === 409) {
+                    // The server has a different offset (e.g. part of a failed chunk arrived); continue from there
+                    offset = uploadOffset(response);
+                    continue;
                 }
+                if (response.status >= 400 && response.status < 500) {
+                    localStorage.removeItem(resumeKey);
+                    throw new Error(await errorDetail(response));
+                }
+                if (!response.ok) throw new TypeError(`Server error ${response.status}`);
+                offset = uploadOffset(response);
+                failures = 0;
             } catch (error) {
-                console.error("Error polling progress", error);
+                if (!(error instanceof TypeError) || ++failures > MAX_UPLOAD_RETRIES) throw error;
+                // Network error: back off, then ask the server how much it kept
+                setStatusText(`Connection lost, retrying (${failures}/${MAX_UPLOAD_RETRIES})...`);
+                await new Promise((resolve) => setTimeout(resolve, Math.min(1000 * 2 ** failures, 30000)));
+                let response = null;
+                try {
+                    response = await fetch(`${API_BASE}/uploads/${uploadId}`, { method: 'HEAD' });
+                } catch {
+                    // Still offline; the next attempt will find out
+                }
+                if (response?.ok) offset = uploadOffset(response);
+                setStatusText("Uploading...");
             }
-        }, 2000); // poll every 2 seconds
+        }
 
-        return () => clearInterval(interval);
-    }, [activeProjectId, onUploadSuccess]);
+        setProgress(100);
+        const response = await fetch(`${API_BASE}/uploads/${uploadId}/finalize`, { method: 'POST' });
+        if (!response.ok) throw new Error(await errorDetail(response));
+        localStorage.removeItem(resumeKey);
+        return response.json();
+    };
 
-    const handleFileChange = (event) => {
+    const handleFileChange = async (event) => {
         const file = event.target.files[0];
         if (!file) return;
 
@@ -67,54 +173,21 @@ const UploadButton = ({ onUploadSuccess }) => {
         setActiveProjectId(null);
         isReadyTriggeredRef.current = false;
 
-        const formData = new FormData();
-        formData.append('file', file);
-
-        const xhr = new XMLHttpRequest();
-
-        xhr.upload.onprogress = (event) => {
-            if (event.lengthComputable) {
-                const percentComplete = (event.loaded / event.total) * 100;
-                setProgress(percentComplete);
-            }
-        };
-
-        xhr.onload = () => {
-            if (xhr.status >= 200 && xhr.status < 300) {
-                try {
-                    const data = JSON.parse(xhr.responseText);
-                    // Upload is done, now wait for processing
-                    setProgress(0); // Reset progress for processing phase
-                    setStatusText("Uploaded. Waiting in queue...");
-                    setActiveProjectId(data.project_id);
-                } catch {
-                    // Fallback if parsing fails
-                    setIsUploading(false);
-                    alert("Upload successful but failed to track processing schedule.");
-                }
-            } else {
-                let errorMessage = 'Upload failed';
-                try {
-                    const errorResponse = JSON.parse(xhr.responseText);
-                    errorMessage = `Upload failed: ${errorResponse.detail || xhr.responseText}`;
-                } catch {
-                    errorMessage = `Upload failed: ${xhr.statusText || 'Unknown error'}`;
-                }
-                alert(errorMessage);
-                setIsUploading(false);
-                if (fileInputRef.current) fileInputRef.current.value = '';
-            }
-        };
-
-        xhr.onerror = () => {
-            console.error("Upload error");
-            alert("Error connecting to server.");
+        let data;
+        try {
+            data = await uploadFile(file);
+        } catch (error) {
+            console.error("Upload error", error);
+            alert(error instanceof TypeError ? "Error connecting to server." : `Upload failed: ${error.message}`);
             setIsUploading(false);
-            if (fileInputRef.current) fileInputRef.current.value = '';
-        };
-
-        xhr.open('POST', 'http://localhost:8000/api/upload');
-        xhr.send(formData);
+            resetInput();
+            return;
+        }
+
+        // Upload is done, now wait for processing
+        setProgress(0); // Reset progress for processing phase
+        setStatusText("Uploaded. Waiting in queue...");
+        setActiveProjectId(data.project_id);
     };
 
     return (
@@ -0,0 +1,246 @@
+import gc
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from app_config import get_config_section
+from telemetry import histogram, register_collector
+
+logger = logging.getLogger(__name__)
+
+# Models unused for this long are unloaded (0 keeps them loaded until the budget needs the room)
+DEFAULT_IDLE_UNLOAD_SECONDS = 1800
+# Total estimated size of loaded models, in MB (0 means no limit)
+DEFAULT_MEMORY_BUDGET_MB = 0
+
+MODEL_LOAD_SECONDS = histogram("model_load_seconds", "Time to load a model (or start a worker pool).", labels=("model",))
+
+class _Entry:
+    def __init__(self, name, loader, unloader, memory_mb):
+        self.name = name
+        self.loader = loader
+        self.unloader = unloader
+        self.memory_mb = memory_mb
+        self.model = None
+        self.loaded = False
+        self.in_use = 0
+        self.last_used = 0.0
+        # Reentrant, so code that already holds a model can call helpers that use it too
+        self.lock = threading.RLock()
+        self.load_count = 0
+        self.unload_count = 0
+        self.last_load_seconds = None
+        self.total_load_seconds = 0.0
+        self.last_unload_seconds = None
+
+class ModelRegistry:
+    """
+    Keeps ML models resident across requests and jobs.
+    Models are registered by name with a loader (and optional unloader) and an estimated size.
+    They are loaded on first use or by warmup(), stay loaded while in use, are unloaded after
+    `idle_seconds` without use, and least recently used idle models are evicted when loading another
+    would exceed `memory_budget_mb`.
+    """
+
+    def __init__(self, memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB, idle_seconds: float = DEFAULT_IDLE_UNLOAD_SECONDS):
+        self.memory_budget_mb = memory_budget_mb
+        self.idle_seconds = idle_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def register(self, name: str, loader, unloader=None, memory_mb: float = 0):
+        """
+        Registers a model. `loader()` returns the loaded model and `unloader(model)` releases it.
+        Registering a name again keeps the existing entry (and its loaded model).
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(name, loader, unloader, memory_mb)
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._entries
+
+    @contextmanager
+    def use(self, name: str):
+        """Yields the model, loading it first if needed. It cannot be unloaded while in use."""
+        entry = self._entries[name]
+        with self._lock:
+            entry.in_use += 1
+        try:
+            with entry.lock:
+                if not entry.loaded:
+                    self._load(entry)
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def load(self, name: str):
+        """Loads a model now if it is not loaded yet."""
+        with self.use(name):
+            pass
+
+    def warmup(self, names: list):
+        """Loads the given models, logging (rather than raising) failures."""
+        for name in names:
+            try:
+                self.load(name)
+            except Exception as e:
+                logger.error(f"Warmup of model {name} failed: {e}")
+
+    def unload(self, name: str, wait: bool = True) -> bool:
+        """Unloads a model unless it is in use. Returns True if it was unloaded."""
+        entry = self._entries.get(name)
+        if entry is None or not entry.lock.acquire(blocking=wait):
+            return False
+        try:
+            with self._lock:
+                if not entry.loaded or entry.in_use:
+                    return False
+            self._unload(entry)
+            return True
+        finally:
+            entry.lock.release()
+
+    def unload_idle(self) -> list:
+        """Unloads every model that has not been used for `idle_seconds`."""
+        if not self.idle_seconds:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [entry.name for entry in self._entries.values()
+                    if entry.loaded and not entry.in_use and now - entry.last_used >= self.idle_seconds]
+        return [name for name in idle if self.unload(name, wait=False)]
+
+    def _load(self, entry: _Entry):
+        self._make_room(entry)
+        logger.info(f"Loading model {entry.name}...")
+        started_at = time.time()
+        started = time.perf_counter()
+        entry.model = entry.loader()
+        elapsed = time.perf_counter() - started
+        MODEL_LOAD_SECONDS.record(started_at, elapsed, model=entry.name)
+        with self._lock:
+            entry.loaded = True
+            entry.load_count += 1
+            entry.last_load_seconds = elapsed
+            entry.total_load_seconds += elapsed
+            entry.last_used = time.monotonic()
+        logger.info(f"Loaded model {entry.name} in {elapsed:.2f}s")
+        self._start_reaper()
+
+    def _unload(self, entry: _Entry):
+        logger.info(f"Unloading model {entry.name}...")
+        started = time.perf_counter()
+        model, entry.model = entry.model, None
+        with self._lock:
+            entry.loaded = False
+        if entry.unloader:
+            try:
+                entry.unloader(model)
+            except Exception as e:
+                logger.error(f"Unloading model {entry.name} failed: {e}")
+        del model
+        gc.collect()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            entry.unload_count += 1
+            entry.last_unload_seconds = elapsed
+        logger.info(f"Unloaded model {entry.name} in {elapsed:.2f}s")
+
+    def _make_room(self, entry: _Entry):
+        """Evicts least recently used idle models until `entry` fits in the memory budget."""
+        if not self.memory_budget_mb:
+            return
+        with self._lock:
+            loaded = [e for e in self._entries.values() if e.loaded and e is not entry]
+            used = sum(e.memory_mb for e in loaded)
+            victims = sorted((e for e in loaded if not e.in_use), key=lambda e: e.last_used)
+        for victim in victims:
+            if used + entry.memory_mb <= self.memory_budget_mb:
+                break
+            # Skip models another thread is loading or using rather than wait for them
+            if self.unload(victim.name, wait=False):
+                used -= victim.memory_mb
+        if used + entry.memory_mb > self.memory_budget_mb:
+            logger.warning(f"Loading {entry.name} ({entry.memory_mb:.0f} MB) exceeds the model memory budget "
+                           f"({used:.0f} of {self.memory_budget_mb:.0f} MB in use by models that are busy)")
+
+    def _start_reaper(self):
+        with self._lock:
+            if not self.idle_seconds or self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap, name="model-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        interval = max(1.0, min(60.0, self.idle_seconds / 4))
+        while True:
+            time.sleep(interval)
+            self.unload_idle()
+
+    def stats(self) -> dict:
+        """Load state, estimated memory and load/unload timings of every registered model."""
+        now = time.monotonic()
+        with self._lock:
+            models = {
+                entry.name: {
+                    "loaded": entry.loaded,
+                    "in_use": entry.in_use,
+                    "memory_mb": entry.memory_mb,
+                    "idle_seconds": round(now - entry.last_used, 1) if entry.loaded and not entry.in_use else None,
+                    "load_count": entry.load_count,
+                    "last_load_seconds": entry.last_load_seconds,
+                    "total_load_seconds": round(entry.total_load_seconds, 3),
+                    "unload_count": entry.unload_count,
+                    "last_unload_seconds": entry.last_unload_seconds
+                }
+                for entry in self._entries.values()
+            }
+            return {
+                "memory_budget_mb": self.memory_budget_mb,
+                "loaded_memory_mb": sum(entry.memory_mb for entry in self._entries.values() if entry.loaded),
+                "idle_unload_seconds": self.idle_seconds,
+                "models": models
+            }
+
+    def collect_metrics(self) -> list:
+        """Load state and usage of every model, for the metrics endpoint (see telemetry.register_collector)."""
+        stats = self.stats()["models"]
+        return [
+            ("model_loaded", "gauge", "Whether the model is loaded (1) or not (0).",
+             [({"model": name}, int(model["loaded"])) for name, model in stats.items()]),
+            ("model_in_use", "gauge", "Callers currently using the model.",
+             [({"model": name}, model["in_use"]) for name, model in stats.items()]),
+            ("model_memory_mb", "gauge", "Estimated memory of the loaded model.",
+             [({"model": name}, model["memory_mb"] if model["loaded"] else 0) for name, model in stats.items()]),
+            ("model_unloads_total", "counter", "Times the model was unloaded.",
+             [({"model": name}, model["unload_count"]) for name, model in stats.items()])
+        ]
+
+def get_models_config() -> dict:
+    """Returns the "models" section of config.json."""
+    return get_config_section("models")
+
+def estimated_memory_mb(kind: str, default: float) -> float:
+    """Configured size estimate for a kind of model ("translation", "transcription")."""
+    return get_models_config().get("memory_mb", {}).get(kind, default)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """Returns this process's model registry, configured from config.json on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            config = get_models_config()
+            _registry = ModelRegistry(
+                memory_budget_mb=config.get("memory_budget_mb", DEFAULT_MEMORY_BUDGET_MB),
+                idle_seconds=config.get("idle_unload_seconds", DEFAULT_IDLE_UNLOAD_SECONDS)
+            )
+            register_collector(_registry.collect_metrics)
+        return _registry
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Every metric name is prefixed with this in the Prometheus output
+METRIC_PREFIX = "active_translate_"
+# Histogram buckets (seconds), from a fast HTTP handler up to a slow Whisper chunk
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+_metrics = {}
+_collectors = []
+_registry_lock = threading.Lock()
+
+def _label_key(label_names: tuple, labels: dict) -> tuple:
+    if set(labels) != set(label_names):
+        raise ValueError(f"Expected labels {label_names}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in label_names)
+
+def _format_labels(label_names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    """A monotonically increasing count, per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{METRIC_PREFIX}{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+class Histogram:
+    """
+    A distribution of durations (seconds) per combination of label values.
+    `time()` also records the timed block as a span in the current job trace, if there is one.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def record(self, started: float, elapsed: float, trace_args: dict | None = None, pid: int | None = None, **labels):
+        """Observes `elapsed` seconds and adds a span that began at `started` (epoch seconds) to the current trace."""
+        self.observe(elapsed, **labels)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(self.span_name, started, elapsed, {**labels, **(trace_args or {})}, pid=pid)
+
+    @property
+    def span_name(self) -> str:
+        return self.name[:-len("_seconds")] if self.name.endswith("_seconds") else self.name
+
+    @contextmanager
+    def time(self, trace_args: dict | None = None, **labels):
+        """
+        Times the block. `trace_args` are extra details (e.g. a chunk index) that only go into the trace,
+        keeping the metric's label values few.
+        """
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(started, time.perf_counter() - start, trace_args, **labels)
+
+    def render(self) -> list:
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            for bound, bucket_count in [*zip(self.buckets, counts), ("+Inf", count)]:
+                le = 'le="' + (bound if bound == "+Inf" else _format_value(bound)) + '"'
+                lines.append(f"{METRIC_PREFIX}{self.name}_bucket{_format_labels(self.label_names, key, le)} {bucket_count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{METRIC_PREFIX}{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{METRIC_PREFIX}{self.name}_count{labels} {count}")
+        return lines
+
+def _register(cls, name: str, help: str, labels: tuple, **kwargs):
+    with _registry_lock:
+        if name not in _metrics:
+            _metrics[name] = cls(name, help, labels, **kwargs)
+        return _metrics[name]
+
+def counter(name: str, help: str, labels: tuple = ()) -> Counter:
+    """The process-wide counter called `name`, created on first use."""
+    return _register(Counter, name, help, labels)
+
+def histogram(name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    """The process-wide histogram called `name`, created on first use."""
+    return _register(Histogram, name, help, labels, buckets=buckets)
+
+def register_collector(collect):
+    """
+    Adds a callable that reports current values when metrics are rendered, for state that is cheaper
+    to read on demand than to track (e.g. loaded models). `collect()` returns a list of
+    (name, "gauge" or "counter", help, [(labels dict, value), ...]).
+    """
+    with _registry_lock:
+        if collect not in _collectors:
+            _collectors.append(collect)
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _registry_lock:
+        metrics = sorted(_metrics.values(), key=lambda metric: metric.name)
+        collectors = list(_collectors)
+
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {METRIC_PREFIX}{metric.name} {metric.help}")
+        lines.append(f"# TYPE {METRIC_PREFIX}{metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    for collect in collectors:
+        try:
+            families = collect()
+        except Exception as e:
+            lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {_escape(e)}")
+            continue
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {METRIC_PREFIX}{name} {help}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{METRIC_PREFIX}{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+class Trace:
+    """
+    Spans of one job in the Chrome trace event format, viewable in chrome://tracing or Perfetto.
+    Spans are grouped by process and thread, so the pipeline stages and worker processes each get a row.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, started: float, elapsed: float, args: dict | None = None, pid: int | None = None):
+        pid = pid or os.getpid()
+        thread = threading.current_thread()
+        # Spans reported for another process (a worker) go on that process's row
+        tid = thread.ident if pid == os.getpid() else pid
+        with self._lock:
+            if (pid, tid) not in self._threads:
+                self._threads[(pid, tid)] = thread.name if pid == os.getpid() else f"worker-{pid}"
+            self._events.append({
+                "name": name,
+                "cat": name.split("_")[0],
+                "ph": "X",
+                "ts": round(started * 1e6),
+                "dur": round(elapsed * 1e6),
+                "pid": pid,
+                "tid": tid,
+                "args": args or {}
+            })
+
+    def to_json(self) -> dict:
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        names = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+                 for (pid, tid), thread_name in threads.items()]
+        return {"traceEvents": names + events, "displayTimeUnit": "ms", "otherData": {"name": self.name}}
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f)
+        os.replace(tmp_path, path)
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+
+@contextmanager
+def tracing(trace: Trace | None):
+    """
+    Makes `trace` the current trace for the block. Threads started inside the block only see it when
+    their target is wrapped with `run_in_context`.
+    """
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def run_in_context(target):
+    """Wraps a thread target so it runs with the current trace of the thread that creates the wrapper."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(target, *args, **kwargs)
@@ -0,0 +1,22 @@
+"""
+The backend must import quickly and without the ML frameworks (see benchmarks/startup.py). It is
+imported with the stub models configured, so the measurement doesn't depend on which are installed.
+"""
+import json
+
+from benchmarks.startup import measure_startup, DEFAULT_MAX_SECONDS
+
+STUB_CONFIG = {
+    "transcription": {"backend": "benchmarks.stub_backends:StubWhisper"},
+    "translation": {"engine": "benchmarks.stub_backends:StubMarian"},
+    "models": {"warmup": []}
+}
+
+def test_backend_imports_quickly_without_ml_frameworks(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(STUB_CONFIG), encoding="utf-8")
+
+    startup = measure_startup(runs=3, config_path=str(config_path))
+
+    assert startup["heavy_modules"] == []
+    assert startup["import_seconds_median"] <= DEFAULT_MAX_SECONDS, startup["slowest_imports"]
@@ -0,0 +1,38 @@
+"""
+CTranslate2 translations must match PyTorch MarianMT's (see benchmarks/translation_parity.py). The stub
+engine checks that the service's batched path returns exactly what one sentence per generate call does;
+the real comparison runs whenever PyTorch, CTranslate2 and the model are available locally.
+"""
+import pytest
+
+from benchmarks import translation_parity
+from benchmarks.stub_backends import StubMarian
+from translation_service import LocalTranslator
+
+def _model_cached(model: str) -> bool:
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return False
+    return isinstance(try_to_load_from_cache(model, "config.json"), str)
+
+def test_batched_translation_matches_single_sentences():
+    engine = StubMarian("parity", {})
+    loaded = engine.load()
+    sentences = list(translation_parity.SENTENCES)
+    references = [engine.generate(loaded, [sentence])[0] for sentence in sentences]
+
+    batched = LocalTranslator(engine).translate_batch(sentences, max_tokens=64, max_batch_size=4)
+
+    report = translation_parity.compare(sentences, references, batched)
+    assert report["exact_match"] == 1.0, report["largest_differences"]
+
+def test_ctranslate2_matches_marian():
+    for module in ("torch", "transformers", "ctranslate2"):
+        pytest.importorskip(module)
+    args = translation_parity.build_parser().parse_args(["--throughput-sentences", "32"])
+    if not _model_cached(args.model):
+        pytest.skip(f"{args.model} is not in the local Hugging Face cache")
+
+    report = translation_parity.run(args)
+    assert report["mean_similarity"] >= translation_parity.DEFAULT_MIN_SIMILARITY, report["largest_differences"]
@@ -1,8 +1,24 @@
 import os
 import glob
 import json
+import time
 import wave
-import mlx_whisper
+import multiprocessing
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+from app_config import config_exists, get_config_section, import_plugin
+from transcript_store import TranscriptStoreWriter, transcript_store_path
+from model_registry import get_model_registry, estimated_memory_mb
+from telemetry import histogram, counter
+
+WHISPER_CHUNK_SECONDS = histogram("whisper_chunk_seconds", "Time Whisper takes to transcribe one chunk.", labels=("backend",))
+WHISPER_AUDIO_SECONDS = counter("whisper_audio_seconds_total", "Seconds of audio transcribed by Whisper.", labels=("backend",))
+SEGMENTS_TRANSCRIBED = counter("segments_transcribed_total", "Segments produced by Whisper.", labels=("backend",))
+WORDS_TRANSCRIBED = counter("words_transcribed_total", "Words (with timestamps) produced by Whisper.", labels=("backend",))
+CHUNKS_RESUMED = counter("chunks_resumed_total", "Chunks replayed from a checkpoint instead of transcribed.")
 
 def get_wav_duration(filepath):
     """Returns the duration of a WAV file in seconds."""
@@ -12,114 +28,465 @@ def get_wav_duration(filepath):
         duration = frames / float(rate)
         return duration
 
-def transcribe_chunks(staging_dir, output_filepath, progress_callback=None):
+MLX_MODEL_REPO = "mlx-community/whisper-large-v3-mlx"
+FASTER_MODEL_SIZE = "large-v3"
+# faster-whisper defaults (the "faster" section of the transcription config). float32 is exact on CPU;
+# int8 / int8_float32 are several times faster and smaller. A batch_size > 0 switches to batched
+# inference: the chunk is split into speech windows by VAD and the windows are decoded together.
+DEFAULT_FASTER_DEVICE = "cpu"
+DEFAULT_FASTER_COMPUTE_TYPE = "float32"
+DEFAULT_FASTER_BEAM_SIZE = 5
+DEFAULT_FASTER_BATCH_SIZE = 0
+# Rough resident size of one Whisper large-v3 instance, used for the model registry's memory budget
+DEFAULT_MODEL_MEMORY_MB = 3200
+
+def chunk_name(chunk):
+    """Chunks are WAV paths, or in-memory PcmChunk objects from AudioProcessor(in_memory=True)."""
+    return chunk.name if hasattr(chunk, "samples") else os.path.basename(chunk)
+
+def chunk_duration(chunk):
+    return chunk.duration if hasattr(chunk, "samples") else get_wav_duration(chunk)
+
+def chunk_audio(chunk):
+    """The audio argument for the Whisper backends: a float32 array or a file path."""
+    return chunk.samples if hasattr(chunk, "samples") else str(chunk)
+
+def get_transcription_config() -> dict:
+    """Returns the "transcription" section of config.json."""
+    if config_exists():
+        return get_config_section("transcription")
+    # Fallback to env var if config doesn't exist for backwards compatibility during transition
+    return {"backend": os.environ.get("WHISPER_BACKEND", "mlx")}
+
+def get_backend_name(config: dict) -> str:
     """
-    Transcribes all WAV chunks in the staging directory and outputs a combined
-    JSON transcript with word-level timestamps.
+    The configured Whisper backend: "mlx", "faster", or a "module:attribute" plugin path whose
+    attribute is called as `factory(config, cpu_threads)` and returns an object with a
+    `transcribe(audio)` method producing segments in our format (e.g. the benchmark stubs).
     """
-    # Find all .wav files and sort them alphabetically
-    chunk_files = sorted(glob.glob(os.path.join(staging_dir, "*.wav")))
-    
-    if not chunk_files:
-        print(f"No .wav files found in {staging_dir}")
-        return
+    backend = config.get("backend", "mlx")
+    return backend if ":" in backend else backend.lower()
 
-    combined_transcript = []
-    current_time_offset = 0.0
-    total_chunks = len(chunk_files)
+def get_faster_whisper_config(config=None) -> dict:
+    """The faster-whisper settings ("transcription" -> "faster" in config.json) with defaults filled in."""
+    faster = (config or get_transcription_config()).get("faster", {})
+    return {
+        "model": faster.get("model", FASTER_MODEL_SIZE),
+        "device": faster.get("device", DEFAULT_FASTER_DEVICE),
+        "compute_type": faster.get("compute_type", DEFAULT_FASTER_COMPUTE_TYPE),
+        "beam_size": int(faster.get("beam_size", DEFAULT_FASTER_BEAM_SIZE)),
+        "batch_size": int(faster.get("batch_size", DEFAULT_FASTER_BATCH_SIZE))
+    }
 
-    # Determine backend
-    backend = "mlx"
-    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
-    if os.path.exists(config_path):
-        try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                backend = config.get("transcription", {}).get("backend", "mlx").lower()
-        except Exception as e:
-            print(f"Warning: Could not read config.json, defaulting to mlx. Error: {e}")
-    else:
-        # Fallback to env var if config doesn't exist for backwards compatibility during transition
-        backend = os.environ.get("WHISPER_BACKEND", "mlx").lower()
+def transcription_settings(config=None) -> dict:
+    """
+    The settings that change transcription output (backend, model and decoding), used to
+    content-address staged transcripts. Performance-only knobs such as worker counts are left out.
+    """
+    config = config or get_transcription_config()
+    backend = get_backend_name(config)
+    model = {"mlx": MLX_MODEL_REPO}.get(backend, config.get("model", backend))
+    settings = {"backend": backend, "model": model, "language": "es"}
+    if backend == "faster":
+        faster = get_faster_whisper_config(config)
+        settings["model"] = faster["model"]
+        # Only added when they differ from the defaults, so earlier transcripts keep their keys
+        if faster["compute_type"] != DEFAULT_FASTER_COMPUTE_TYPE:
+            settings["compute_type"] = faster["compute_type"]
+        if faster["beam_size"] != DEFAULT_FASTER_BEAM_SIZE:
+            settings["beam_size"] = faster["beam_size"]
+        if faster["batch_size"]:
+            settings["batched"] = True
+    return settings
 
-    print(f"Using Whisper backend: {backend}")
+def _model_label(settings: dict) -> str:
+    """The model part of a registry name: the model plus any output-changing decode settings."""
+    return ":".join(key if value is True else str(value) for key, value in settings.items()
+                    if key not in ("backend", "language"))
 
+def load_whisper_model(backend, cpu_threads=0):
+    """
+    Loads the Whisper model for the given backend.
+    For mlx the "model" is the HF repo path; the weights are loaded into mlx_whisper's own model
+    cache, which transcribe() then reuses. For faster-whisper it is the model (or batched pipeline)
+    together with its decode options.
+    """
     if backend == "mlx":
-        import mlx_whisper
-        model_repo = "mlx-community/whisper-large-v3-mlx"
+        import mlx.core as mx
+        from mlx_whisper.transcribe import ModelHolder
+        model_repo = MLX_MODEL_REPO
         print(f"Loading mlx-whisper model: {model_repo}...")
+        # transcribe() looks the model up with fp16 weights by default
+        ModelHolder.get_model(model_repo, mx.float16)
+        return model_repo
     elif backend == "faster":
         from faster_whisper import WhisperModel
-        model_size = "large-v3"
-        print(f"Loading faster-whisper model: {model_size}...")
+        faster = get_faster_whisper_config()
+        mode = f"batched x{faster['batch_size']}" if faster["batch_size"] else "sequential"
+        print(f"Loading faster-whisper model: {faster['model']} ({faster['compute_type']} on {faster['device']}, {mode})...")
         # device="cpu" is safer/more common for faster-whisper on Mac unless specifically set up for MPS
-        # compute_type="float32" is recommended for CPU
-        model = WhisperModel(model_size, device="cpu", compute_type="float32")
+        model = WhisperModel(faster["model"], device=faster["device"], compute_type=faster["compute_type"],
+                             cpu_threads=cpu_threads)
+        options = {"beam_size": faster["beam_size"]}
+        if faster["batch_size"]:
+            from faster_whisper import BatchedInferencePipeline
+            model = BatchedInferencePipeline(model=model)
+            options["batch_size"] = faster["batch_size"]
+        return model, options
+    elif ":" in backend:
+        print(f"Loading Whisper backend plugin: {backend}...")
+        return import_plugin(backend)(get_transcription_config(), cpu_threads)
     else:
         raise ValueError(f"Unsupported Whisper backend: {backend}")
 
-    for idx, chunk_file in enumerate(chunk_files):
-        print(f"\nProcessing chunk: {os.path.basename(chunk_file)}")
-        print(f"Current timeline offset: {current_time_offset:.3f}s")
-        
-        if progress_callback:
-            percent_auth = 15 + ((idx / total_chunks) * 80)
-            progress_callback(percent_auth, f"Transcribing chunk {idx + 1}/{total_chunks}...")
+def transcribe_file(backend, model, chunk_file):
+    """
+    Transcribes a single chunk (a WAV path or a 16 kHz float32 array) and returns its segments with word-level timestamps.
+    Timestamps are relative to the start of the chunk; use `shift_segments` to place them on the book timeline.
+    """
+    segments_out = []
+
+    if backend == "mlx":
+        import mlx_whisper
+        result = mlx_whisper.transcribe(
+            chunk_file,
+            path_or_hf_repo=model,
+            language="es",
+            word_timestamps=True
+        )
         
-        if backend == "mlx":
-            result = mlx_whisper.transcribe(
-                chunk_file,
-                path_or_hf_repo=model_repo,
-                language="es",
-                word_timestamps=True
-            )
-            
-            if 'segments' in result:
-                for segment in result['segments']:
-                    segment_data = {
-                        "text": segment.get('text', '').strip(),
-                        "start": round(segment.get('start', 0.0) + current_time_offset, 3),
-                        "end": round(segment.get('end', 0.0) + current_time_offset, 3),
-                        "words": []
-                    }
-                    if 'words' in segment:
-                        for word_info in segment['words']:
-                            segment_data["words"].append({
-                                "text": word_info['word'].strip(),
-                                "start": round(word_info['start'] + current_time_offset, 3),
-                                "end": round(word_info['end'] + current_time_offset, 3)
-                            })
-                    if segment_data["text"] or segment_data["words"]:
-                        combined_transcript.append(segment_data)
+        for segment in result.get('segments', []):
+            segment_data = {
+                "text": segment.get('text', '').strip(),
+                "start": segment.get('start', 0.0),
+                "end": segment.get('end', 0.0),
+                "words": []
+            }
+            for word_info in segment.get('words', []):
+                segment_data["words"].append({
+                    "text": word_info['word'].strip(),
+                    "start": word_info['start'],
+                    "end": word_info['end']
+                })
+            if segment_data["text"] or segment_data["words"]:
+                segments_out.append(segment_data)
+    
+    elif backend == "faster":
+        # faster-whisper returns a generator of segments. In batched mode the timestamps of each
+        # speech window are already moved back to the start of the chunk.
+        whisper, options = model
+        segments, info = whisper.transcribe(chunk_file, language="es", word_timestamps=True, **options)
         
-        elif backend == "faster":
-            # faster-whisper returns a generator of segments
-            segments, info = model.transcribe(chunk_file, language="es", word_timestamps=True)
-            
-            for segment in segments:
-                segment_data = {
-                    "text": segment.text.strip(),
-                    "start": round(segment.start + current_time_offset, 3),
-                    "end": round(segment.end + current_time_offset, 3),
-                    "words": []
+        for segment in segments:
+            segment_data = {
+                "text": segment.text.strip(),
+                "start": segment.start,
+                "end": segment.end,
+                "words": []
+            }
+            if segment.words:
+                for word in segment.words:
+                    segment_data["words"].append({
+                        "text": word.word.strip(),
+                        "start": word.start,
+                        "end": word.end
+                    })
+            if segment_data["text"] or segment_data["words"]:
+                segments_out.append(segment_data)
+
+    else:
+        segments_out = [segment for segment in model.transcribe(chunk_file) if segment["text"] or segment["words"]]
+
+    return segments_out
+
+def shift_segments(segments, offset):
+    """Moves chunk-relative segment and word timestamps onto the book timeline."""
+    shifted = []
+    for segment in segments:
+        shifted.append({
+            "text": segment["text"],
+            "start": round(segment["start"] + offset, 3),
+            "end": round(segment["end"] + offset, 3),
+            "words": [
+                {
+                    "text": word["text"],
+                    "start": round(word["start"] + offset, 3),
+                    "end": round(word["end"] + offset, 3)
                 }
-                if segment.words:
-                    for word in segment.words:
-                        segment_data["words"].append({
-                            "text": word.word.strip(),
-                            "start": round(word.start + current_time_offset, 3),
-                            "end": round(word.end + current_time_offset, 3)
-                        })
-                if segment_data["text"] or segment_data["words"]:
-                    combined_transcript.append(segment_data)
-
-        # Update the running time offset using the exact duration of the WAV file
-        chunk_duration = get_wav_duration(chunk_file)
-        current_time_offset += chunk_duration
+                for word in segment["words"]
+            ]
+        })
+    return shifted
+
+def checkpoint_path(checkpoint_dir, idx):
+    return os.path.join(checkpoint_dir, f"chunk_{idx:03d}.json")
+
+def save_checkpoint(path, chunk_name, duration, offset, segments):
+    """
+    Atomically saves one chunk's transcription. Segments are stored chunk-relative, next to the
+    chunk's exact duration, so they can be placed on the timeline again after a resume.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"chunk": chunk_name, "duration": duration, "offset": offset, "segments": segments}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path, chunk_name=None, duration=None):
+    """Returns a saved chunk checkpoint, or None if it is missing, unreadable or was made from different audio."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if chunk_name is not None and checkpoint.get("chunk") != chunk_name:
+        return None
+    if duration is not None and abs(checkpoint.get("duration", -1) - duration) > 1e-6:
+        return None
+    return checkpoint
+
+def write_transcript(output_filepath, segments):
+    """
+    Streams segments into a JSON array one at a time and atomically replaces the output file,
+    so a transcript never has to be held in memory as a whole and readers never see a partial file.
+    The compact store used for windowed reads (transcript.bin) is built in the same pass and is
+    replaced first, so it is never older than the JSON it sits next to.
+    """
+    store = TranscriptStoreWriter()
+    tmp_path = output_filepath + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for idx, segment in enumerate(segments):
+            store.add_segment(segment)
+            f.write(",\n  " if idx else "\n  ")
+            f.write(json.dumps(segment, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+        f.write("\n]")
+    store.write(transcript_store_path(output_filepath))
+    os.replace(tmp_path, output_filepath)
+
+# Per-process state for the worker pool: each worker loads its model once in the initializer
+_worker_backend = None
+_worker_model = None
+
+def _init_worker(backend, cpu_threads):
+    global _worker_backend, _worker_model
+    _worker_backend = backend
+    _worker_model = load_whisper_model(backend, cpu_threads=cpu_threads)
+
+def _transcribe_in_worker(chunk_file):
+    """Returns the chunk's segments and (start time, seconds taken, worker pid) for the parent's metrics."""
+    started = time.time()
+    start = time.perf_counter()
+    segments = transcribe_file(_worker_backend, _worker_model, chunk_file)
+    return segments, (started, time.perf_counter() - start, os.getpid())
+
+def _record_transcribed(backend, idx, duration, segments, timing):
+    """Counts a freshly transcribed chunk and records its Whisper time, measured wherever it ran."""
+    started, elapsed, pid = timing
+    WHISPER_CHUNK_SECONDS.record(started, elapsed, trace_args={"chunk": idx, "audio_seconds": round(duration, 3)},
+                                 pid=pid, backend=backend)
+    WHISPER_AUDIO_SECONDS.inc(duration, backend=backend)
+    SEGMENTS_TRANSCRIBED.inc(len(segments), backend=backend)
+    WORDS_TRANSCRIBED.inc(sum(len(segment.get("words", [])) for segment in segments), backend=backend)
+
+def _worker_ready():
+    return True
+
+def unload_whisper_model(model):
+    """Releases a model returned by load_whisper_model."""
+    if isinstance(model, str):
+        # mlx: drop the weights from mlx_whisper's model cache
+        from mlx_whisper.transcribe import ModelHolder
+        ModelHolder.model = None
+        ModelHolder.model_path = None
+
+def start_worker_pool(backend, workers, cpu_threads):
+    """Starts the transcription worker processes and waits until each has loaded its model."""
+    print(f"Starting {workers} transcription workers x {cpu_threads} threads")
+    # "spawn" gives each worker a clean interpreter instead of forking a server process that has ML libraries loaded
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(backend, cpu_threads))
+    # Workers are spawned on demand, so submit one task per worker while none is idle yet
+    for future in [pool.submit(_worker_ready) for _ in range(workers)]:
+        future.result()
+    return pool
+
+def register_transcription_model(config=None) -> str:
+    """
+    Registers the Whisper model for the current transcription config in the model registry and
+    returns its registry name. With several workers the registered "model" is the whole warm worker
+    pool, so back-to-back jobs reuse the worker processes and their loaded models.
+    """
+    config = config or get_transcription_config()
+    settings = transcription_settings(config)
+    backend = settings["backend"]
+    workers = max(1, int(config.get("workers", 1)))
+    cpu_threads = int(config.get("cpu_threads", 0))
+    memory_mb = estimated_memory_mb("transcription", DEFAULT_MODEL_MEMORY_MB)
+    registry = get_model_registry()
+
+    if workers == 1:
+        name = f"whisper:{backend}:{_model_label(settings)}"
+        registry.register(name, lambda: load_whisper_model(backend, cpu_threads=cpu_threads), unload_whisper_model,
+                          memory_mb=memory_mb)
+        return name
+
+    if not cpu_threads:
+        # Split the machine's cores evenly between the workers
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    name = f"whisper-pool:{backend}:{_model_label(settings)}:{workers}x{cpu_threads}"
+    registry.register(name, lambda: start_worker_pool(backend, workers, cpu_threads),
+                      lambda pool: pool.shutdown(wait=True, cancel_futures=True), memory_mb=memory_mb * workers)
+    return name
+
+def warm_up_transcription():
+    """Loads the Whisper model (or starts the worker pool) for the current config ahead of the first job."""
+    get_model_registry().load(register_transcription_model())
+
+def place_chunks(chunk_files):
+    """
+    Numbers chunks in order and places each one on the book timeline right after the previous one,
+    yielding (chunk index, chunk, timeline offset, duration).
+    Each chunk's offset is the exact summed duration of the chunks before it. Durations come from
+    the WAV headers (or sample counts), so they are exact for resumed chunks as well.
+    """
+    offset = 0.0
+    for idx, chunk_file in enumerate(chunk_files):
+        duration = chunk_duration(chunk_file)
+        yield idx, chunk_file, offset, duration
+        offset += duration
+
+def iter_transcribed_chunks(chunk_files, checkpoint_dir=None):
+    """
+    Transcribes chunks as they arrive from `chunk_files` (a list, or a live stream of WAV paths or
+    in-memory PcmChunks still being produced by ffmpeg) and yields (chunk index, timeline offset, segments) in chunk order,
+    with the segment timestamps already placed on the book timeline.
+    With a `checkpoint_dir`, each chunk is saved as soon as it is transcribed and chunks that already
+    have a valid checkpoint are not transcribed again.
+    With `transcription.workers` > 1 in config.json the chunks are transcribed in parallel worker processes.
+    """
+    return iter_transcribed_placed_chunks(place_chunks(chunk_files), checkpoint_dir=checkpoint_dir)
+
+def iter_transcribed_placed_chunks(placed_chunks, checkpoint_dir=None):
+    """
+    Like iter_transcribed_chunks, for chunks that are already numbered and placed on the timeline:
+    `placed_chunks` yields (chunk index, chunk, timeline offset, duration) in any order, and results
+    are yielded in that same order. This lets a caller transcribe the middle of a book first.
+    """
+    config = get_transcription_config()
+    backend = get_backend_name(config)
+    workers = max(1, int(config.get("workers", 1)))
+    registry = get_model_registry()
+    model_name = register_transcription_model(config)
+
+    print(f"Using Whisper backend: {backend}")
+
+    def resume(idx, chunk_file, duration):
+        if not checkpoint_dir:
+            return None
+        checkpoint = load_checkpoint(checkpoint_path(checkpoint_dir, idx), chunk_name(chunk_file), duration)
+        if checkpoint is None:
+            return None
+        print(f"Resuming {chunk_name(chunk_file)} from checkpoint")
+        CHUNKS_RESUMED.inc()
+        return checkpoint["segments"]
+
+    def finish(idx, chunk_file, duration, offset, segments):
+        if checkpoint_dir:
+            save_checkpoint(checkpoint_path(checkpoint_dir, idx), chunk_name(chunk_file), duration, offset, segments)
+        return idx, offset, shift_segments(segments, offset)
+
+    # The model (or worker pool) comes from the registry and stays resident after the job.
+    # It is acquired lazily, so a fully checkpointed book never pays for loading it.
+    stack = ExitStack()
+    model = None
+
+    if workers == 1:
+        with stack:
+            for idx, chunk_file, offset, duration in placed_chunks:
+                segments = resume(idx, chunk_file, duration)
+                if segments is None:
+                    if model is None:
+                        model = stack.enter_context(registry.use(model_name))
+                    print(f"\nProcessing chunk: {chunk_name(chunk_file)}")
+                    print(f"Current timeline offset: {offset:.3f}s")
+                    started = time.time()
+                    start = time.perf_counter()
+                    segments = transcribe_file(backend, model, chunk_audio(chunk_file))
+                    _record_transcribed(backend, idx, duration, segments, (started, time.perf_counter() - start, None))
+                yield finish(idx, chunk_file, duration, offset, segments)
+        return
+
+    def finished(idx, chunk_file, duration, offset, future):
+        segments, timing = future.result()
+        if timing is not None:
+            _record_transcribed(backend, idx, duration, segments, timing)
+        print(f"Finished chunk: {chunk_name(chunk_file)}")
+        return finish(idx, chunk_file, duration, offset, segments)
+
+    pool = None
+    broken = False
+    # Workers pull chunks from the pool's shared queue as they free up; results are handed back in submission order
+    pending = deque()
+    try:
+        for idx, chunk_file, offset, duration in placed_chunks:
+            segments = resume(idx, chunk_file, duration)
+            future = Future()
+            if segments is None:
+                if pool is None:
+                    pool = stack.enter_context(registry.use(model_name))
+                future = pool.submit(_transcribe_in_worker, chunk_audio(chunk_file))
+            else:
+                future.set_result((segments, None))
+            pending.append((idx, chunk_file, duration, offset, future))
+            # Yield finished chunks from the head of the line, and stop submitting once enough are in flight
+            while pending and (pending[0][4].done() or len(pending) > workers * 2):
+                yield finished(*pending.popleft())
+        while pending:
+            yield finished(*pending.popleft())
+    except BrokenProcessPool:
+        broken = True
+        raise
+    finally:
+        # The pool outlives this job, so only this job's queued chunks are dropped
+        for *_, future in pending:
+            future.cancel()
+        stack.close()
+        if broken:
+            # A worker died; start a fresh pool for the next job
+            registry.unload(model_name)
+
+def transcribe_chunks(staging_dir, output_filepath, progress_callback=None, checkpoint_dir=None):
+    """
+    Transcribes all WAV chunks in the staging directory and outputs a combined
+    JSON transcript with word-level timestamps.
+    Each chunk is checkpointed to `checkpoint_dir` (default: <staging_dir>/checkpoints) as soon as it
+    is done, so an interrupted run resumes where it stopped; the final transcript is merged from the
+    checkpoints one chunk at a time.
+    """
+    # Find all .wav files and sort them alphabetically
+    chunk_files = sorted(glob.glob(os.path.join(staging_dir, "*.wav")))
+    
+    if not chunk_files:
+        print(f"No .wav files found in {staging_dir}")
+        return
+
+    checkpoint_dir = checkpoint_dir or os.path.join(staging_dir, "checkpoints")
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    total_chunks = len(chunk_files)
+
+    offsets = []
+    for idx, offset, segments in iter_transcribed_chunks(chunk_files, checkpoint_dir=checkpoint_dir):
+        offsets.append(offset)
+        if progress_callback:
+            percent_auth = 15 + (((idx + 1) / total_chunks) * 80)
+            progress_callback(percent_auth, f"Transcribed chunk {idx + 1}/{total_chunks}...")
+
+    def merged_segments():
+        for idx, offset in enumerate(offsets):
+            yield from shift_segments(load_checkpoint(checkpoint_path(checkpoint_dir, idx))["segments"], offset)
 
     # Export to JSON
-    with open(output_filepath, 'w', encoding='utf-8') as f:
-        json.dump(combined_transcript, f, ensure_ascii=False, indent=2)
+    write_transcript(output_filepath, merged_segments())
     
     print(f"\nSuccessfully saved synchronized combined transcript to {output_filepath}")
 
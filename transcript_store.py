@@ -0,0 +1,274 @@
+import os
+import mmap
+import json
+import struct
+from array import array
+
+import numpy as np
+
+# Compact columnar transcript format, written next to transcript.json as transcript.bin.
+#
+# Layout: a fixed header followed by the sections below, each 8-byte aligned.
+#   header        magic, version, segment count, word count, then (offset, length) per section
+#   seg_start     float32[segments]
+#   seg_end       float32[segments]
+#   seg_words     uint32[segments + 1]   index of each segment's first word (CSR-style)
+#   seg_flags     uint8[segments]        bit 0: segment has a translation, bit 1: placeholder for audio not transcribed yet
+#   seg_text      uint32[segments + 1] offsets into the UTF-8 blob that follows
+#   seg_trans     uint32[segments + 1] offsets into the UTF-8 blob that follows
+#   word_start    float32[words]
+#   word_end      float32[words]
+#   word_text     uint32[words + 1] offsets into the UTF-8 blob that follows
+#   seg_seek      float32[segments]      running max of seg_start, the sorted key for time lookups
+#   word_seek     float32[words]         running max of word_start, likewise
+#   seg_end_max   float32[segments]      running max of seg_end, the sorted key for overlap lookups
+#
+# Readers mmap the file and view the columns with numpy, so opening a transcript costs a header
+# parse no matter how long the book is, and a window only touches the pages it reads.
+# Whisper timestamps can step backwards slightly at chunk and segment edges, so lookups by time
+# binary-search the precomputed running-max columns rather than the raw start times.
+
+MAGIC = b"ATTS"
+VERSION = 3
+SECTIONS = (
+    "seg_start", "seg_end", "seg_words", "seg_flags",
+    "seg_text_offsets", "seg_text", "seg_trans_offsets", "seg_trans",
+    "word_start", "word_end", "word_text_offsets", "word_text",
+    "seg_seek", "word_seek", "seg_end_max"
+)
+_HEADER = struct.Struct("<4sIII")
+_SECTION = struct.Struct("<QQ")
+_HEADER_SIZE = _HEADER.size + _SECTION.size * len(SECTIONS)
+_DTYPES = {
+    "seg_start": np.float32, "seg_end": np.float32, "seg_words": np.uint32, "seg_flags": np.uint8,
+    "seg_text_offsets": np.uint32, "seg_trans_offsets": np.uint32,
+    "word_start": np.float32, "word_end": np.float32, "word_text_offsets": np.uint32,
+    "seg_seek": np.float32, "word_seek": np.float32, "seg_end_max": np.float32
+}
+# Words returned on each side of the active word by TranscriptStore.seek
+SEEK_CONTEXT_WORDS = 5
+HAS_TRANSLATION = 1
+PENDING = 2
+
+def transcript_store_path(transcript_path: str) -> str:
+    """The compact store that belongs to a transcript.json."""
+    return os.path.splitext(transcript_path)[0] + ".bin"
+
+class _TextColumn:
+    """Accumulates strings as an offsets array plus one UTF-8 blob."""
+
+    def __init__(self):
+        self.offsets = array("I", [0])
+        self.blob = bytearray()
+
+    def append(self, text: str):
+        self.blob += text.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+class TranscriptStoreWriter:
+    """
+    Builds a transcript store one segment at a time. Columns are kept in compact arrays rather than
+    dicts, so building the store for a long book stays far smaller than the JSON it comes from.
+    """
+
+    def __init__(self):
+        self.seg_start = array("f")
+        self.seg_end = array("f")
+        self.seg_words = array("I", [0])
+        self.seg_flags = array("B")
+        self.seg_text = _TextColumn()
+        self.seg_trans = _TextColumn()
+        self.word_start = array("f")
+        self.word_end = array("f")
+        self.word_text = _TextColumn()
+
+    def add_segment(self, segment: dict):
+        self.seg_start.append(segment.get("start", 0.0))
+        self.seg_end.append(segment.get("end", 0.0))
+        self.seg_text.append(segment.get("text", ""))
+        translation = segment.get("translation")
+        self.seg_flags.append((HAS_TRANSLATION if translation is not None else 0) | (PENDING if segment.get("pending") else 0))
+        self.seg_trans.append(translation or "")
+        for word in segment.get("words") or []:
+            self.word_start.append(word.get("start", 0.0))
+            self.word_end.append(word.get("end", 0.0))
+            self.word_text.append(word.get("text", word.get("word", "")))
+        self.seg_words.append(len(self.word_start))
+
+    def _sections(self) -> list:
+        return [
+            self.seg_start, self.seg_end, self.seg_words, self.seg_flags,
+            self.seg_text.offsets, self.seg_text.blob, self.seg_trans.offsets, self.seg_trans.blob,
+            self.word_start, self.word_end, self.word_text.offsets, self.word_text.blob,
+            _running_max(self.seg_start), _running_max(self.word_start), _running_max(self.seg_end)
+        ]
+
+    def write(self, path: str):
+        """Atomically writes the store to `path`."""
+        sections = [memoryview(section).cast("B") for section in self._sections()]
+        table = []
+        position = _HEADER_SIZE
+        for section in sections:
+            position += -position % 8
+            table.append((position, len(section)))
+            position += len(section)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(self.seg_start), len(self.word_start)))
+            for offset, length in table:
+                f.write(_SECTION.pack(offset, length))
+            for (offset, _), section in zip(table, sections):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(section)
+        os.replace(tmp_path, path)
+
+def _running_max(times: array) -> np.ndarray:
+    return np.maximum.accumulate(np.frombuffer(times, dtype=np.float32)) if len(times) else np.zeros(0, np.float32)
+
+def is_current_store(path: str) -> bool:
+    """True if `path` is a store this version can read (older stores are rebuilt from their JSON)."""
+    try:
+        with open(path, "rb") as f:
+            magic, version, _, _ = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return False
+    return magic == MAGIC and version == VERSION
+
+def write_transcript_store(path: str, segments):
+    writer = TranscriptStoreWriter()
+    for segment in segments:
+        writer.add_segment(segment)
+    writer.write(path)
+
+def convert_transcript(transcript_path: str) -> str:
+    """Builds the compact store for a transcript.json written before the store existed."""
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        segments = json.load(f)
+    store_path = transcript_store_path(transcript_path)
+    write_transcript_store(store_path, segments)
+    return store_path
+
+class TranscriptStore:
+    """Read-only, memory-mapped view of a transcript store."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.segment_count, self.word_count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} transcript store")
+
+        self._columns = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + i * _SECTION.size)
+            dtype = _DTYPES.get(name, np.uint8)
+            self._columns[name] = np.frombuffer(self._mmap, dtype=dtype, count=length // np.dtype(dtype).itemsize,
+                                                offset=offset)
+
+    def __len__(self):
+        return self.segment_count
+
+    @property
+    def duration(self) -> float:
+        if not self.segment_count:
+            return 0.0
+        return float(self._columns["seg_end_max"][-1])
+
+    def _text(self, column: str, idx: int) -> str:
+        offsets = self._columns[column + "_offsets"]
+        return self._columns[column][offsets[idx]:offsets[idx + 1]].tobytes().decode("utf-8")
+
+    def segment(self, idx: int) -> dict:
+        """One segment in the same shape as transcript.json."""
+        c = self._columns
+        first, last = int(c["seg_words"][idx]), int(c["seg_words"][idx + 1])
+        segment = {
+            "text": self._text("seg_text", idx),
+            "start": round(float(c["seg_start"][idx]), 3),
+            "end": round(float(c["seg_end"][idx]), 3),
+            "words": [self.word(w) for w in range(first, last)]
+        }
+        if c["seg_flags"][idx] & HAS_TRANSLATION:
+            segment["translation"] = self._text("seg_trans", idx)
+        if c["seg_flags"][idx] & PENDING:
+            segment["pending"] = True
+        return segment
+
+    def word(self, idx: int) -> dict:
+        c = self._columns
+        return {
+            "text": self._text("word_text", idx),
+            "start": round(float(c["word_start"][idx]), 3),
+            "end": round(float(c["word_end"][idx]), 3)
+        }
+
+    def segments(self, start: int = 0, stop: int | None = None) -> list:
+        start = max(0, start)
+        stop = self.segment_count if stop is None else min(stop, self.segment_count)
+        return [self.segment(idx) for idx in range(start, stop)]
+
+    def segment_range(self, start_time: float, end_time: float) -> tuple:
+        """
+        Index range [first, stop) of the segments that overlap the time window: from the first segment
+        ending after `start_time` to the last one starting before `end_time`, searched on the running maxima.
+        """
+        c = self._columns
+        first = int(np.searchsorted(c["seg_end_max"], start_time, side="right"))
+        stop = int(np.searchsorted(c["seg_seek"], end_time, side="left"))
+        return first, max(first, stop)
+
+    def starting_range(self, start_time: float, end_time: float) -> tuple:
+        """
+        Index range [first, stop) of the segments that start within [start_time, end_time). When chunks
+        are cut at chapter edges this is exactly a chapter, even where an end time runs past the edge.
+        """
+        seek = self._columns["seg_seek"]
+        first = int(np.searchsorted(seek, start_time, side="left"))
+        stop = int(np.searchsorted(seek, end_time, side="left"))
+        return first, max(first, stop)
+
+    def translation_counts(self, start: int, stop: int) -> tuple:
+        """(segments with text, segments translated) within an index range."""
+        has_text = np.diff(self._columns["seg_text_offsets"][start:stop + 1]) > 0
+        translated = self._columns["seg_flags"][start:stop] & HAS_TRANSLATION
+        return int(np.count_nonzero(has_text)), int(np.count_nonzero(translated))
+
+    def pending_count(self, start: int, stop: int) -> int:
+        """Number of placeholder segments (audio not transcribed yet) within an index range."""
+        return int(np.count_nonzero(self._columns["seg_flags"][start:stop] & PENDING))
+
+    def seek(self, time: float, context: int = SEEK_CONTEXT_WORDS) -> dict:
+        """
+        Finds the segment and word playing at `time` by binary search: the last one starting at or
+        before it. `active` is False when `time` falls in a gap after that word. The words around it
+        and the start times of the neighbouring segments are included for navigation.
+        """
+        c = self._columns
+        seg_idx = int(np.searchsorted(c["seg_seek"], time, side="right")) - 1
+        word_idx = int(np.searchsorted(c["word_seek"], time, side="right")) - 1
+        result = {
+            "time": time,
+            "segment_index": seg_idx,
+            "word_index": word_idx,
+            "active": word_idx >= 0 and time <= float(c["word_end"][word_idx]),
+            "segment": None,
+            "previous_segment_start": None,
+            "next_segment_start": None,
+            "words": []
+        }
+        if seg_idx >= 0:
+            result["segment"] = self.segment(seg_idx)
+            if seg_idx > 0:
+                result["previous_segment_start"] = round(float(c["seg_start"][seg_idx - 1]), 3)
+        if seg_idx + 1 < self.segment_count:
+            result["next_segment_start"] = round(float(c["seg_start"][seg_idx + 1]), 3)
+
+        first = max(0, word_idx - context)
+        stop = min(self.word_count, max(word_idx, 0) + context + 1)
+        for idx in range(first, stop):
+            word = self.word(idx)
+            word["index"] = idx
+            result["words"].append(word)
+        return result